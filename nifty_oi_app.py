@@ -1,20 +1,16 @@
 import streamlit as st
-import requests
+from oi_core import debug_sidebar, get_option_chain, start_collector
 import pandas as pd
-import time
+from streamlit_autorefresh import st_autorefresh
 
 st.set_page_config(page_title="NIFTY OI Monitor", page_icon="📈", layout="centered")
 
+# Shared background poller: reruns read its latest snapshot instead of hitting NSE
+start_collector()
+debug_sidebar()  # stage timings, with ?debug=1 in the URL or NSE_DEBUG=1
+
 def fetch_oi():
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
-    url = "https://www.nseindia.com/api/option-chain-indices?symbol=NIFTY"
-    session = requests.Session()
-    session.get("https://www.nseindia.com", headers=headers)
-    response = session.get(url, headers=headers)
-    data = response.json()
+    data = get_option_chain("NIFTY")
     records = data["records"]["data"]
     underlying = data["records"]["underlyingValue"]
     expiry = data["records"]["expiryDates"][0]
@@ -35,17 +31,14 @@ def fetch_oi():
 st.title("📊 Live NIFTY Open Interest Monitor")
 
 refresh_time = 60
-placeholder = st.empty()
+# rerun on a timer instead of pinning a script thread in a sleep loop
+_ = st_autorefresh(interval=refresh_time * 1000, limit=None, key="refresh_counter")
 
-while True:
-    try:
-        underlying, expiry, atm, df = fetch_oi()
-        with placeholder.container():
-            st.subheader(f"NIFTY: {underlying:.2f}")
-            st.caption(f"Expiry: {expiry} | ATM Strike: {atm}")
-            st.dataframe(df, hide_index=True, use_container_width=True)
-            st.info(f"Auto-refreshes every {refresh_time} seconds")
-        time.sleep(refresh_time)
-    except Exception as e:
-        st.error(f"Error fetching data: {e}")
-        time.sleep(10)
+try:
+    underlying, expiry, atm, df = fetch_oi()
+    st.subheader(f"NIFTY: {underlying:.2f}")
+    st.caption(f"Expiry: {expiry} | ATM Strike: {atm}")
+    st.dataframe(df, hide_index=True, use_container_width=True)
+    st.info(f"Auto-refreshes every {refresh_time} seconds")
+except Exception as e:
+    st.error(f"Error fetching data: {e}")
@@ -0,0 +1,164 @@
+"""Shared fetch, parse and analytics pipeline for the option-chain pages."""
+from .analytics import (
+    PCR_WINDOWS, AtmWindow, OiLadder, atm_index, atm_window, diff_sign, fmt_pcr, is_sign_flip,
+    nearest_index, oi_sums, pcr, rocket_signal, trend_label,
+)
+from .alerts import (
+    Alert, AlertEngine, AlertNotifications, EmailAlerts, Signal, alert_email, alert_view, digest_email,
+    get_alert_engine,
+)
+from .archive import ARCHIVE_FIELDS, OiArchive, OiSeries, Segment, get_archive
+from .async_fetch import (
+    INDEX_SYMBOLS, AsyncOptionChainFetcher, OptionChainPoller, fetch_option_chains, fetch_option_chains_async,
+)
+from .cache import Snapshot, SnapshotCache
+from .collector import Collector, get_collector, start_collector
+from .debug import debug_sidebar
+from .decode import decode_option_chain
+from .diff import ChangeSet, diff_snapshots
+from .exporter import start_metrics_server
+from .fetch import fetch_option_chain, get_chain, get_option_chain, invalidate_option_chain, option_chain_cache
+from .history import MAX_OI_FIELDS, MaxOiHistory, StrikeRing, max_oi_history
+from .mailer import SmtpConnection, compose
+from .metrics import (
+    Counter, Gauge, Histogram, Registry, alerts_raised, alerts_suppressed, collector_snapshots, cookie_refreshes,
+    notification_seconds, notifications, nse_request_seconds, nse_requests, registry,
+)
+from .notify import (
+    Notification, Notifier, SinkTransport, SmtpTransport, SocketTransport, Transport, WebhookTransport, get_notifier,
+)
+from .parse import (
+    PCT_COLUMNS, ChainData, ChainIndex, build_chain_df, chain_df_from_columns, extract_chain,
+    find_underlying_value, leg_arrays, patch_chain_df, risk_columns, row_columns, rows_for_expiry,
+    safe_float, safe_int,
+)
+from .render import RenderCache, frame_digest, marshal_styler, render_cache, styled_dataframe
+from .replay import PayloadRecorder, ReplaySource, configure_replay, get_recorder, get_replay
+from .rules import Rule, RuleError, RuleSet, load_rules, parse_rule
+from .session import NSESessionPool, configure_pool, get_pool
+from .store import TICK_COLUMNS, TickStore, get_tick_store, read_ticks
+from .style import TRACKER_COLUMNS, CssGrid, tracker_grid, tracker_styler, tracker_table
+from .timing import STAGES, StageStats, StageTimer, stage_timer, timed
+
+__all__ = [
+    "ARCHIVE_FIELDS",
+    "Alert",
+    "AlertEngine",
+    "AlertNotifications",
+    "AsyncOptionChainFetcher",
+    "AtmWindow",
+    "ChainData",
+    "ChainIndex",
+    "ChangeSet",
+    "Collector",
+    "Counter",
+    "CssGrid",
+    "EmailAlerts",
+    "Gauge",
+    "Histogram",
+    "INDEX_SYMBOLS",
+    "MAX_OI_FIELDS",
+    "MaxOiHistory",
+    "NSESessionPool",
+    "Notification",
+    "Notifier",
+    "OiArchive",
+    "OiLadder",
+    "OiSeries",
+    "OptionChainPoller",
+    "PCR_WINDOWS",
+    "PCT_COLUMNS",
+    "PayloadRecorder",
+    "Registry",
+    "RenderCache",
+    "ReplaySource",
+    "Rule",
+    "RuleError",
+    "RuleSet",
+    "STAGES",
+    "Segment",
+    "Signal",
+    "SinkTransport",
+    "SmtpConnection",
+    "SmtpTransport",
+    "Snapshot",
+    "SnapshotCache",
+    "SocketTransport",
+    "StageStats",
+    "StageTimer",
+    "StrikeRing",
+    "TICK_COLUMNS",
+    "TRACKER_COLUMNS",
+    "TickStore",
+    "Transport",
+    "WebhookTransport",
+    "alert_email",
+    "alert_view",
+    "alerts_raised",
+    "alerts_suppressed",
+    "atm_index",
+    "atm_window",
+    "build_chain_df",
+    "chain_df_from_columns",
+    "collector_snapshots",
+    "compose",
+    "configure_pool",
+    "configure_replay",
+    "cookie_refreshes",
+    "debug_sidebar",
+    "decode_option_chain",
+    "diff_sign",
+    "diff_snapshots",
+    "digest_email",
+    "extract_chain",
+    "fetch_option_chain",
+    "fetch_option_chains",
+    "fetch_option_chains_async",
+    "find_underlying_value",
+    "fmt_pcr",
+    "frame_digest",
+    "get_alert_engine",
+    "get_archive",
+    "get_chain",
+    "get_collector",
+    "get_notifier",
+    "get_option_chain",
+    "get_pool",
+    "get_recorder",
+    "get_replay",
+    "get_tick_store",
+    "invalidate_option_chain",
+    "is_sign_flip",
+    "leg_arrays",
+    "load_rules",
+    "marshal_styler",
+    "max_oi_history",
+    "nearest_index",
+    "notification_seconds",
+    "notifications",
+    "nse_request_seconds",
+    "nse_requests",
+    "oi_sums",
+    "option_chain_cache",
+    "parse_rule",
+    "patch_chain_df",
+    "pcr",
+    "read_ticks",
+    "registry",
+    "render_cache",
+    "risk_columns",
+    "rocket_signal",
+    "row_columns",
+    "rows_for_expiry",
+    "safe_float",
+    "safe_int",
+    "stage_timer",
+    "start_collector",
+    "start_metrics_server",
+    "styled_dataframe",
+    "timed",
+    "tracker_grid",
+    "tracker_styler",
+    "tracker_table",
+    "trend_label",
+]
@@ -0,0 +1,555 @@
+"""Server-side alert engine: CE_PE_Diff sign flips and rocket changes.
+
+The email pages used to track the ATM CE_PE_Diff sign in
+``st.session_state``, so every open tab sent its own copy of each alert and
+nothing was sent with no tab open.  The engine below subscribes to the
+collector instead and evaluates each published snapshot once, for the
+nearest ``NSE_ALERT_EXPIRIES`` expiries and every expiry a page ``watch``-es,
+with the pages' rules:
+
+* ``flip``   - the ATM CE_PE_Diff sign went Positive <-> Negative
+* ``rocket`` - the rocket classification (PCR over ATM ±5, ATM ±4 OI and
+  ATM %OI) changed
+* ``rule``   - a rule of the ``NSE_ALERT_RULES`` file (see :mod:`oi_core.rules`)
+  holds on this snapshot
+
+Flips and rocket changes are evaluated on the frame the page shows: a view is
+an (expiry, risk mode, ndigits) of ``ChainIndex.frame``, the default being
+premium risk rounded to ints.  A page with another Risk definition watches
+its own view, whose alerts carry its ``alert_view`` name; rules are evaluated
+once per expiry, on the default view.
+
+A CE_PE_Diff hovering around zero flips on every tick; changes can be
+debounced before they are raised (all off by default, which raises and
+sends every change at once, as the pages did):
+
+* hysteresis - with ``NSE_ALERT_HYSTERESIS`` set, the sign only changes
+  once the diff leaves the ± band (a diff inside the band, or zero, keeps
+  the current sign)
+* dwell      - a new sign or rocket classification must hold for
+  ``NSE_ALERT_DWELL`` seconds of snapshots before it is confirmed
+* cooldown   - a flip / rocket change / rule is raised at most once per
+  ``NSE_ALERT_COOLDOWN`` seconds per (symbol, expiry); a change confirmed
+  during the cooldown is raised when it ends, against the last raised value,
+  so a flip and its flip-back inside the cooldown raise nothing
+* digest     - ``EmailAlerts`` sends at most one email per
+  ``NSE_ALERT_DIGEST`` seconds per recipient (or per its own ``digest``);
+  alerts arriving in between go out together in one digest at the end of
+  the window
+
+With a digest window a recipient gets at most one email per window however
+noisy the signal.  Held-back changes are counted in the ``alerts_suppressed`` metric.
+
+The last signal per (symbol, expiry, view), with its pending change and last
+raised values, is kept in memory and in ``NSE_ALERT_STATE`` (JSON, rewritten
+when any of those change) so a restart does not lose or re-raise a flip.
+Snapshots that are not newer than the last evaluated one, and alert ids
+already raised, are skipped.  Alerts fan out to ``subscribe``-d callbacks on
+the collector thread, e.g. ``EmailAlerts`` / ``AlertNotifications`` which
+queue them on a transport of the notifier (SMTP, webhook, socket, file).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from .analytics import diff_sign, is_sign_flip, pcr, rocket_signal
+from .metrics import alerts_raised, alerts_suppressed
+from .notify import Notification, SinkTransport, SmtpTransport, SocketTransport, WebhookTransport, get_notifier
+from .parse import RISK_MODES
+from .rules import RuleSet, load_rules
+
+log = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+ALERT_STATE = os.environ.get("NSE_ALERT_STATE", "alert_state.json")  # "" or 0: memory only
+ALERT_EXPIRIES = int(os.environ.get("NSE_ALERT_EXPIRIES", "1"))
+ALERT_RULES = os.environ.get("NSE_ALERT_RULES", "")  # rules file, one "name: rule" per line
+_band = os.environ.get("NSE_ALERT_HYSTERESIS", "")
+ALERT_HYSTERESIS = float(_band) if _band else None  # CE_PE_Diff band around zero; unset: plain sign
+ALERT_DWELL = float(os.environ.get("NSE_ALERT_DWELL", "0"))  # seconds a change must hold
+ALERT_COOLDOWN = float(os.environ.get("NSE_ALERT_COOLDOWN", "0"))  # seconds between alerts of a kind
+ALERT_DIGEST = float(os.environ.get("NSE_ALERT_DIGEST", "0"))  # seconds between emails per recipient
+DIGEST_MAX_ALERTS = 50
+ALERT_KINDS = ("flip", "rocket", "rule")
+NOTIFY_WEBHOOK = os.environ.get("NSE_NOTIFY_WEBHOOK", "")  # URL: every alert POSTed as JSON
+NOTIFY_SOCKET = os.environ.get("NSE_NOTIFY_SOCKET", "")    # host:port: JSON lines over TCP
+NOTIFY_FILE = os.environ.get("NSE_NOTIFY_FILE", "")        # path: JSON lines appended
+PCR_SPAN = 5      # PCR (all shown): ATM ±5
+ATM_PCR_SPAN = 4  # ATM OI: ATM ±4
+RECENT_ALERTS = 200
+ROW_FIELDS = ("CE_OI", "CE_%OI", "CE_Risk", "CE_PE_Diff", "CE_LTP", "PE_LTP", "PE_Risk", "PE_%OI", "PE_OI")
+
+
+@dataclass(frozen=True)
+class Signal:
+    sign: str      # confirmed (debounced) values
+    diff: int
+    rocket: str
+    fetched_at: float
+    pending: dict = field(default_factory=dict)  # "flip" / "rocket" -> [candidate value, first seen at]
+    alerted: dict = field(default_factory=dict)  # "flip" / "rocket" / "rule:<name>" -> [value, raised at]
+
+    def persisted(self):
+        return self.sign, self.rocket, self.pending, self.alerted
+
+
+@dataclass(frozen=True)
+class Alert:
+    kind: str      # "flip" | "rocket" | "rule"
+    symbol: str
+    expiry: str
+    fetched_at: float
+    previous: str
+    current: str
+    atm_strike: int
+    spot: float
+    total_pcr: float
+    row: dict = field(default_factory=dict)  # ATM row, display column names, ints (or ndigits floats)
+    rule: str = ""  # rule name, for kind "rule"
+    view: str = ""  # alert_view of the frame, "" for the default one
+
+    @property
+    def id(self):
+        kind = f"{self.kind}:{self.rule}" if self.rule else self.kind
+        expiry = f"{self.expiry}/{self.view}" if self.view else self.expiry
+        return f"{kind}:{self.symbol}:{expiry}:{int(self.fetched_at * 1000)}"
+
+    @property
+    def time_str(self):
+        return datetime.fromtimestamp(self.fetched_at, IST).strftime("%H:%M:%S")
+
+
+_SOURCE = {"CE_%OI": "CE_pchgOI", "PE_%OI": "PE_pchgOI"}  # display name -> frame column
+DEFAULT_VIEW = ("premium", None)
+
+
+def alert_view(risk="premium", ndigits=None):
+    """Name of the ``ChainIndex.frame(expiry, risk, ndigits)`` view alerts are evaluated on ("" by default)."""
+    if (risk, ndigits) == DEFAULT_VIEW:
+        return ""
+    return risk if ndigits is None else f"{risk}/{ndigits}"
+
+
+def banded_sign(diff, previous, band=ALERT_HYSTERESIS):
+    """CE_PE_Diff sign with hysteresis: inside ±``band`` (or at zero) the previous sign is kept.
+
+    ``band=None`` is the plain ``diff_sign``.
+    """
+    if band is None:
+        return diff_sign(diff)
+    if diff > band:
+        return "Positive"
+    if diff < -band:
+        return "Negative"
+    return previous or diff_sign(diff)
+
+
+def settle(confirmed, observed, pending, now, dwell=ALERT_DWELL):
+    """Dwell filter: ``observed`` replaces ``confirmed`` once it has held for ``dwell`` seconds.
+
+    ``pending`` is the ``[candidate, first seen at]`` from the previous tick
+    (or None); returns ``(confirmed, pending)``.
+    """
+    if observed == confirmed:
+        return confirmed, None
+    if pending is None or pending[0] != observed:
+        pending = [observed, now]
+    if now - pending[1] >= dwell:
+        return observed, None
+    return confirmed, pending
+
+
+def _atm_row(row, ndigits=None):
+    out = {k: row.get(_SOURCE.get(k, k), 0) for k in ROW_FIELDS}
+    if ndigits is None:
+        return {k: 0 if pd.isna(v) else int(v) for k, v in out.items()}
+    return {k: 0.0 if pd.isna(v) else round(float(v), ndigits) for k, v in out.items()}
+
+
+def _state_key(text):
+    symbol, expiry, *view = text.split("|")
+    risk, ndigits = view if view else ("premium", "")  # state written before views: the default one
+    return symbol, expiry, risk, int(ndigits) if ndigits else None
+
+
+class AlertEngine:
+    def __init__(self, state_path=ALERT_STATE, expiries=ALERT_EXPIRIES, recent=RECENT_ALERTS, rules=None,
+                 hysteresis=ALERT_HYSTERESIS, dwell=ALERT_DWELL, cooldown=ALERT_COOLDOWN):
+        self.state_path = state_path if state_path not in ("", "0") else None
+        self.expiries = expiries
+        self.hysteresis = hysteresis
+        self.dwell = dwell
+        self.cooldown = cooldown
+        if rules is None and ALERT_RULES:
+            rules = load_rules(ALERT_RULES)
+        self.rules = rules if isinstance(rules, RuleSet) or rules is None else RuleSet(rules)
+        self._state = {}  # (symbol, expiry, risk, ndigits) -> Signal
+        self._watched = set()  # (symbol, expiry, risk, ndigits) evaluated besides the nearest expiries
+        self._features = {}  # (symbol, expiry) -> rule feature row of the last snapshot
+        self._seen = deque(maxlen=recent)
+        self._recent = deque(maxlen=recent)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self.raised = 0
+        self._load()
+
+    # -- persistence --------------------------------------------------------
+
+    def _load(self):
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path) as f:
+                saved = json.load(f)
+            self._state = {_state_key(k): Signal(**v) for k, v in saved.items()}
+            self._watched = set(self._state)
+        except (OSError, ValueError, TypeError) as e:
+            log.warning("alerts: ignoring unreadable state %s: %s", self.state_path, e)
+
+    def _save(self):
+        if self.state_path is None:
+            return
+        data = {f"{s}|{e}|{r}|{'' if n is None else n}": asdict(sig) for (s, e, r, n), sig in self._state.items()}
+        tmp = self.state_path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            log.warning("alerts: cannot write %s: %s", self.state_path, e)
+
+    # -- evaluation ---------------------------------------------------------
+
+    def watch(self, symbol, expiry, risk="premium", ndigits=None):
+        """Evaluate ``chain.frame(expiry, risk, ndigits)`` of ``symbol`` on every snapshot until it expires.
+
+        Pages call it on every run with the view they show; the nearest
+        ``expiries`` are evaluated on the default view anyway.
+        """
+        if risk not in RISK_MODES:
+            raise ValueError(f"unknown risk mode: {risk!r}")
+        with self._lock:
+            self._watched.add((symbol, expiry, risk, ndigits))
+
+    def signal(self, symbol, expiry, risk="premium", ndigits=None):
+        """Last evaluated ``Signal`` for (symbol, expiry) on that view, or None."""
+        return self._state.get((symbol, expiry, risk, ndigits))
+
+    def _views(self, symbol, chain):
+        views = [(symbol, e, *DEFAULT_VIEW) for e in chain.expiry_dates[:self.expiries] if e in chain]
+        views += sorted((k for k in self._watched if k[0] == symbol and k[1] in chain and k not in views),
+                        key=lambda k: (chain.expiry_dates.index(k[1]), k[2], -1 if k[3] is None else k[3]))
+        return views
+
+    def _evaluate(self, symbol, chain, expiry, risk, ndigits, fetched_at, changed=True):
+        df = chain.frame(expiry, risk=risk, ndigits=ndigits)
+        if df.empty:
+            return None, []
+        spot = chain.spot_price
+        ladder = chain.ladder(expiry, ndigits=ndigits)
+        i = ladder.atm(spot)
+        row = _atm_row(df.iloc[i], ndigits)
+        total_pcr = pcr(*ladder.window(i, PCR_SPAN))
+        atm_pe_oi, atm_ce_oi = ladder.window(i, ATM_PCR_SPAN)
+        _, rocket = rocket_signal(total_pcr, atm_pe_oi, atm_ce_oi, row["PE_%OI"], row["CE_%OI"])
+        prev = self._state.get((symbol, expiry, risk, ndigits))
+        observed = {"flip": banded_sign(row["CE_PE_Diff"], prev and prev.sign, self.hysteresis), "rocket": rocket}
+        common = dict(symbol=symbol, expiry=expiry, fetched_at=fetched_at,
+                      atm_strike=int(df["strikePrice"].iloc[i]), spot=spot, total_pcr=total_pcr, row=row,
+                      view=alert_view(risk, ndigits))
+        confirmed, pending, alerted, alerts = dict(observed), {}, {}, []
+        if prev is not None:
+            alerted = dict(prev.alerted)
+            for kind, was in (("flip", prev.sign), ("rocket", prev.rocket)):
+                held = prev.pending.get(kind)
+                value, candidate = settle(was, observed[kind], held, fetched_at, self.dwell)
+                if candidate is not None:
+                    pending[kind] = candidate
+                if held is not None and value == was and (candidate is None or candidate[0] != held[0]):
+                    alerts_suppressed.inc(reason="dwell")  # candidate gave way before its dwell time
+                confirmed[kind] = value
+                last, at = alerted.get(kind, (was, 0.0))
+                if value == last:
+                    continue
+                if kind == "flip" and not is_sign_flip(last, value):
+                    alerted[kind] = [value, at]  # Zero -> a sign: nothing to raise
+                elif fetched_at - at < self.cooldown:
+                    if value != was:
+                        alerts_suppressed.inc(reason="cooldown")  # raised when the cooldown ends
+                else:
+                    alerted[kind] = [value, fetched_at]
+                    alerts.append(Alert(kind, previous=last, current=value, **common))
+        if self.rules and changed and (risk, ndigits) == DEFAULT_VIEW:  # unchanged data: nothing new for the rules
+            alerts += self._rule_alerts(symbol, chain, expiry, fetched_at, alerted, common)
+        sig = Signal(confirmed["flip"], row["CE_PE_Diff"], confirmed["rocket"], fetched_at, pending, alerted)
+        return sig, alerts
+
+    def _rule_alerts(self, symbol, chain, expiry, fetched_at, alerted, common):
+        try:
+            features = self.rules.features_of(chain, expiry)
+            last = self._features.get((symbol, expiry))
+            if last is None:
+                last = np.full_like(features, np.nan)  # crosses / changes / becomes need a previous tick
+            self._features[(symbol, expiry)] = features
+            fired = self.rules.fired(features, last, symbol)
+        except Exception:  # never let the rules cost the flip / rocket alerts
+            log.exception("alerts: rule evaluation failed for %s %s", symbol, expiry)
+            return []
+        alerts = []
+        for j in fired:
+            name = self.rules.rules[j].name
+            if fetched_at - alerted.get(f"rule:{name}", ("", 0.0))[1] < self.cooldown:
+                alerts_suppressed.inc(reason="cooldown")
+                continue
+            try:
+                alert = Alert("rule", previous=self.rules.describe(j, last), current=self.rules.describe(j, features),
+                              rule=name, **common)
+            except Exception:
+                log.exception("alerts: rule %s failed for %s %s", name, symbol, expiry)
+                continue
+            alerted[f"rule:{name}"] = ["", fetched_at]
+            alerts.append(alert)
+        return alerts
+
+    def evaluate(self, symbol, chain, fetched_at):
+        """Update the state from one parsed snapshot; returns the new alerts.
+
+        Unchanged snapshots are evaluated too: a pending change has to reach
+        its dwell time, and a change held back by the cooldown has to be
+        raised when it ends, even when the market is flat.
+        """
+        raised, dirty = [], False
+        changed = bool(chain.changes)
+        with self._lock:
+            for key in self._views(symbol, chain):
+                prev = self._state.get(key)
+                if prev is not None and fetched_at <= prev.fetched_at:
+                    continue  # replayed or republished snapshot
+                sig, alerts = self._evaluate(symbol, chain, *key[1:], fetched_at, changed)
+                if sig is None:
+                    continue
+                dirty |= prev is None or prev.persisted() != sig.persisted()
+                self._state[key] = sig
+                for alert in alerts:
+                    if alert.id not in self._seen:
+                        self._seen.append(alert.id)
+                        self._recent.append(alert)
+                        raised.append(alert)
+            for key in [k for k in self._state if k[0] == symbol and k[1] not in chain.expiry_dates]:
+                del self._state[key]  # expired
+                self._features.pop(key[:2], None)
+                dirty = True
+            self._watched -= {k for k in self._watched if k[0] == symbol and k[1] not in chain.expiry_dates}
+            if dirty:
+                self._save()
+        for alert in raised:
+            self.raised += 1
+            alerts_raised.inc(kind=alert.kind)
+            self._publish(alert)
+        return raised
+
+    # -- fan-out ------------------------------------------------------------
+
+    def subscribe(self, callback, key=None):
+        """Call ``callback(alert)`` for every new alert (on the collector thread).
+
+        ``key`` makes it idempotent: page reruns can subscribe on every run and
+        only the first callback for a key is kept.
+        """
+        with self._lock:
+            return self._subscribers.setdefault(key if key is not None else id(callback), callback)
+
+    def unsubscribe(self, key):
+        with self._lock:
+            self._subscribers.pop(key, None)
+
+    def _publish(self, alert):
+        for cb in list(self._subscribers.values()):
+            try:
+                cb(alert)
+            except Exception:
+                log.exception("alerts: subscriber %r failed on %s", cb, alert.id)
+
+    def on_snapshot(self, snapshot):
+        """Collector subscriber (unchanged snapshots only skip the rules)."""
+        chain = snapshot.parsed
+        if chain is not None:
+            self.evaluate(snapshot.key, chain, snapshot.fetched_at)
+
+    def attach(self, collector):
+        collector.subscribe(self.on_snapshot)
+        return self
+
+    def recent(self, symbol=None, view=None):
+        """Alerts raised so far (newest last), optionally for one symbol and one ``alert_view``."""
+        with self._lock:
+            return [a for a in self._recent
+                    if (symbol is None or a.symbol == symbol) and (view is None or a.view == view)]
+
+    def frame(self, symbol=None, view=None) -> pd.DataFrame:
+        """``recent`` as a table, newest first."""
+        rows = [{"time": a.time_str, "kind": a.rule or a.kind, "symbol": a.symbol, "expiry": a.expiry,
+                 "from": a.previous, "to": a.current, "ATM": a.atm_strike, "spot": a.spot}
+                for a in reversed(self.recent(symbol, view))]
+        return pd.DataFrame(rows, columns=["time", "kind", "symbol", "expiry", "from", "to", "ATM", "spot"])
+
+
+def alert_email(alert):
+    """(subject, body) of the sign-flip email the pages used to send (or of a rocket / rule alert)."""
+    if alert.kind != "flip":
+        return _change_email(alert)
+    direction = "Bullish → Bearish" if alert.previous == "Positive" else "Bearish → Bullish"
+    subject = f"{direction} ({alert.time_str})"
+    row = alert.row
+    diff = row["CE_PE_Diff"]
+    status = "BULLISH" if diff > 0 else ("BEARISH" if diff < 0 else "NEUTRAL")
+    side = "Positive→Call side stronger" if diff > 0 else ("Negative→Put side stronger" if diff < 0 else "Neutral")
+    lines = [
+        "ATM Sign Change Alert",
+        "",
+        f"Index: {alert.symbol}",
+        f"Expiry: {alert.expiry}" + (f" ({alert.view} risk)" if alert.view else ""),
+        f"ATM Strike: [ATM] {alert.atm_strike}",
+        "",
+        "FULL ATM ROW (display columns):",
+    ]
+    lines += [f"{k}: {row[k]}" for k in ("CE_OI", "CE_%OI", "CE_Risk", "CE_PE_Diff", "CE_LTP")]
+    lines += [f"StrikeLabel: [ATM] {alert.atm_strike}", f"SPOT: {int(alert.spot)}"]
+    lines += [f"{k}: {row[k]}" for k in ("PE_LTP", "PE_Risk", "PE_%OI", "PE_OI")]
+    lines += [
+        "",
+        f"Status: {status} ({alert.previous} → {alert.current})",
+        "",
+        f"CE_Risk = {row['CE_Risk']}",
+        f"PE_Risk = {row['PE_Risk']}",
+        f"Diff = {diff} ({side})",
+        "",
+        f"Time: {alert.time_str}",
+    ]
+    return subject, "\n".join(lines)
+
+
+def _change_email(alert):
+    subject = f"{alert.rule or alert.kind}: {alert.symbol} ({alert.time_str})"
+    lines = [
+        f"Alert rule: {alert.rule}" if alert.rule else f"Alert: {alert.kind}",
+        "",
+        f"Index: {alert.symbol}",
+        f"Expiry: {alert.expiry}" + (f" ({alert.view} risk)" if alert.view else ""),
+        f"ATM Strike: {alert.atm_strike}",
+        f"SPOT: {int(alert.spot)}",
+        f"Value: {alert.previous or '-'} → {alert.current}",
+        "",
+    ]
+    lines += [f"{k}: {v}" for k, v in alert.row.items()]
+    lines += ["", f"Time: {alert.time_str}"]
+    return subject, "\n".join(lines)
+
+
+def digest_email(alerts):
+    """(subject, body) of one email covering several alerts (at most ``DIGEST_MAX_ALERTS`` listed)."""
+    first, last = alerts[0], alerts[-1]
+    subject = f"{len(alerts)} option-chain alerts ({first.time_str}–{last.time_str})"
+    lines = [f"{len(alerts)} alerts since {first.time_str}:", ""]
+    if len(alerts) > DIGEST_MAX_ALERTS:
+        lines.append(f"(oldest {len(alerts) - DIGEST_MAX_ALERTS} not listed)")
+    for a in alerts[-DIGEST_MAX_ALERTS:]:
+        lines.append(f"{a.time_str}  {a.symbol} {a.expiry}{'/' + a.view if a.view else ''}  {a.rule or a.kind}: {a.previous or '-'} → {a.current}"
+                     f"  (ATM {a.atm_strike}, spot {int(a.spot)}, CE_PE_Diff {a.row.get('CE_PE_Diff', 0)})")
+    lines += ["", f"ATM row at {last.time_str} ({last.symbol} {last.expiry}, ATM {last.atm_strike}):"]
+    lines += [f"{k}: {v}" for k, v in last.row.items()]
+    return subject, "\n".join(lines)
+
+
+class AlertNotifications:
+    """Alert subscriber that queues a notification per alert on ``transport`` (see :mod:`oi_core.notify`).
+
+    At most one notification goes out per ``digest`` seconds: the first alert
+    after a quiet window is sent at once, later ones are held and sent as one
+    digest when the window ends.
+    """
+
+    def __init__(self, transport, kinds=ALERT_KINDS, digest=ALERT_DIGEST):
+        self.transport = transport
+        self.kinds = kinds
+        self.digest = digest
+        self._held = []
+        self._timer = None
+        self._last_sent = float("-inf")
+        self._lock = threading.Lock()
+
+    def __call__(self, alert):
+        if alert.kind not in self.kinds:
+            return
+        with self._lock:
+            self._held.append(alert)
+            if self._timer is not None:
+                return
+            wait = self._last_sent + self.digest - time.monotonic()
+            if wait > 0:
+                self._timer = threading.Timer(wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """Send whatever is held now, as one notification."""
+        with self._lock:
+            held, self._held, self._timer = self._held, [], None
+            if not held:
+                return
+            self._last_sent = time.monotonic()
+        subject, body = alert_email(held[0]) if len(held) == 1 else digest_email(held)
+        return get_notifier().submit(self.transport, Notification(subject, body, tuple(held)))
+
+
+class EmailAlerts(AlertNotifications):
+    """Sign-flip (and rule) alert emails to ``recipient``, sent as ``user``."""
+
+    def __init__(self, user, password, recipient, sender=None, kinds=("flip", "rule"), digest=ALERT_DIGEST):
+        super().__init__(SmtpTransport(user, password, recipient, sender), kinds, digest)
+        self.recipient = recipient
+
+
+def notify_channels():
+    """Subscribers for the ``NSE_NOTIFY_WEBHOOK`` / ``NSE_NOTIFY_SOCKET`` / ``NSE_NOTIFY_FILE`` channels.
+
+    Returns ``(key, subscriber)`` pairs; every alert kind is sent, and only
+    the webhook (usually a chat channel) is digested.
+    """
+    channels = []
+    if NOTIFY_WEBHOOK:
+        channels.append((("webhook", NOTIFY_WEBHOOK), AlertNotifications(WebhookTransport(NOTIFY_WEBHOOK))))
+    if NOTIFY_SOCKET:
+        host, _, port = NOTIFY_SOCKET.rpartition(":")
+        transport = SocketTransport(host or "127.0.0.1", int(port))
+        channels.append((("socket", NOTIFY_SOCKET), AlertNotifications(transport, digest=0)))
+    if NOTIFY_FILE:
+        transport = SinkTransport(NOTIFY_FILE, keep=0, name="file")
+        channels.append((("file", NOTIFY_FILE), AlertNotifications(transport, digest=0)))
+    return channels
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_alert_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = AlertEngine()
+                for key, subscriber in notify_channels():
+                    engine.subscribe(subscriber, key=key)
+                _engine = engine
+    return _engine
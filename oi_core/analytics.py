@@ -0,0 +1,149 @@
+"""ATM window, PCR and signal ("rocket") analytics on a parsed chain."""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .timing import timed
+
+INF = float("inf")
+PCR_WINDOWS = tuple(range(2, 21))
+
+
+@dataclass
+class AtmWindow:
+    df: pd.DataFrame  # ascending strikes, index reset to 0..n-1
+    atm_idx: int      # position of the ATM strike inside ``df``
+    atm_strike: float
+
+    @property
+    def atm_row(self):
+        return self.df.iloc[self.atm_idx]
+
+
+def nearest_index(strikes, spot_price):
+    """Position of the strike nearest ``spot_price`` in an ascending array (lower one on ties)."""
+    n = len(strikes)
+    i = int(np.searchsorted(strikes, spot_price))
+    if i >= n:
+        return n - 1
+    if i > 0 and spot_price - strikes[i - 1] <= strikes[i] - spot_price:
+        return i - 1
+    return i
+
+
+def atm_index(df, spot_price):
+    return nearest_index(df["strikePrice"].to_numpy(), spot_price)
+
+
+def atm_window(df, spot_price, before=5, after=5, atm_idx=None) -> AtmWindow:
+    """Slice ``before``/``after`` strikes around the strike nearest ``spot_price``.
+
+    Pass ``atm_idx`` (e.g. from ``OiLadder.atm``) to skip the ATM lookup.
+    """
+    with timed("analytics"):
+        atm_idx_full = atm_index(df, spot_price) if atm_idx is None else atm_idx
+        start_idx = max(0, atm_idx_full - before)
+        end_idx = min(len(df) - 1, atm_idx_full + after)
+        window = df.iloc[start_idx:end_idx + 1].copy().reset_index(drop=True)
+        atm_idx = atm_idx_full - start_idx
+        return AtmWindow(window, atm_idx, window.loc[atm_idx, "strikePrice"])
+
+
+def pcr(pe_oi, ce_oi):
+    return (pe_oi / ce_oi) if ce_oi != 0 else INF
+
+
+def oi_sums(df, center_idx=None, k=None):
+    """(PE_OI, CE_OI) over the whole frame or the ``center_idx`` ± ``k`` rows."""
+    if center_idx is not None and k is not None:
+        start = max(0, center_idx - k)
+        end = min(len(df) - 1, center_idx + k)
+        df = df.iloc[start:end + 1]
+    return df["PE_OI"].sum(), df["CE_OI"].sum()
+
+
+class OiLadder:
+    """Ascending strikes plus cumulative PE/CE OI of a strike-sorted frame.
+
+    ATM lookup is a binary search and the OI sums (hence PCR) of any ATM ± k
+    window or strike range are two prefix-sum differences.
+    """
+
+    def __init__(self, df):
+        self.strikes = df["strikePrice"].to_numpy(dtype=float)
+        self._pe = np.concatenate(([0], np.cumsum(df["PE_OI"].to_numpy())))
+        self._ce = np.concatenate(([0], np.cumsum(df["CE_OI"].to_numpy())))
+
+    def __len__(self):
+        return len(self.strikes)
+
+    def atm(self, spot_price):
+        return nearest_index(self.strikes, spot_price)
+
+    def sums(self, start, end):
+        """(PE_OI, CE_OI) over positions ``start``..``end`` inclusive, clipped to the ladder."""
+        start = max(0, start)
+        end = min(len(self) - 1, end)
+        if end < start:
+            return self._pe[0], self._ce[0]
+        return self._pe[end + 1] - self._pe[start], self._ce[end + 1] - self._ce[start]
+
+    def window(self, center_idx, k):
+        return self.sums(center_idx - k, center_idx + k)
+
+    def strike_range(self, low, high):
+        """(PE_OI, CE_OI) over strikes with ``low <= strike <= high``."""
+        start = int(np.searchsorted(self.strikes, low, side="left"))
+        end = int(np.searchsorted(self.strikes, high, side="right")) - 1
+        return self.sums(start, end)
+
+    def window_pcr(self, center_idx, k):
+        return pcr(*self.window(center_idx, k))
+
+    def pcr_table(self, center_idx, ks=PCR_WINDOWS) -> pd.DataFrame:
+        """PE/CE OI and PCR for every ATM ± k window in ``ks``."""
+        with timed("analytics"):
+            ks = np.asarray(ks, dtype=int)
+            start = np.clip(center_idx - ks, 0, len(self) - 1)
+            end = np.clip(center_idx + ks, 0, len(self) - 1) + 1
+            pe = self._pe[end] - self._pe[start]
+            ce = self._ce[end] - self._ce[start]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(ce != 0, pe / np.where(ce != 0, ce, 1), INF)
+            return pd.DataFrame({"Window": [f"ATM ±{k}" for k in ks], "PE_OI": pe, "CE_OI": ce, "PCR": ratio})
+
+
+def trend_label(value):
+    return "🟢 Bullish" if value > 1 else "🔴 Bearish"
+
+
+def fmt_pcr(value):
+    return f"{value:.2f}" if value != INF else "∞"
+
+
+def rocket_signal(total_pcr, atm_pe_oi, atm_ce_oi, atm_pe_pct, atm_ce_pct):
+    """Rocket classification ("Option B" - stronger confirmation) -> (symbol, text)."""
+    if (total_pcr > 1) and (atm_pe_oi > atm_ce_oi) and (atm_pe_pct > 0):
+        return "🟢🚀", "Strong Bullish"
+    if (total_pcr < 1) and (atm_ce_oi > atm_pe_oi) and (atm_ce_pct > 0):
+        return "🔴🚀", "Strong Bearish"
+    # partial confirmations or divergence
+    if (total_pcr > 1 and atm_pe_oi > atm_ce_oi) or (atm_pe_pct > 0 and atm_pe_oi > atm_ce_oi):
+        return "🟡⚠️", "Bullish but Risky"
+    if (total_pcr < 1 and atm_ce_oi > atm_pe_oi) or (atm_ce_pct > 0 and atm_ce_oi > atm_pe_oi):
+        return "🟡⚠️", "Bearish but Risky"
+    return "🤔", "Conflict / Wait"
+
+
+def diff_sign(value):
+    if value > 0:
+        return "Positive"
+    if value < 0:
+        return "Negative"
+    return "Zero"
+
+
+def is_sign_flip(prev_sign, curr_sign):
+    """Only Positive <-> Negative counts as a flip (Zero and first run do not)."""
+    return {prev_sign, curr_sign} == {"Positive", "Negative"}
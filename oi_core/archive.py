@@ -0,0 +1,351 @@
+"""Memory-mapped, fixed-width OI time series per (symbol, expiry).
+
+Each series is a list of segments under ``<root>/<symbol>/<expiry>/``; a new
+segment starts whenever the expiry's strike list changes::
+
+    seg-<first ms>/meta.json    fields, dtype, strike count
+    seg-<first ms>/strikes.npy  float64 strike axis (ascending)
+    seg-<first ms>/times.i8     int64 epoch-ms per snapshot, appended
+    seg-<first ms>/data.f4      float32 [time, strike, field] rows, appended
+
+Appending a snapshot writes one fixed-size row to each file.  Readers
+``np.memmap`` the files, so opening a week of 30 s snapshots costs a few
+syscalls, and slicing by time range or strike returns views into the map
+rather than copies.
+
+As a collector subscriber the archive only queues changed snapshots; a
+writer thread appends them and, every ``PRUNE_INTERVAL``, deletes closed
+segments older than ``NSE_ARCHIVE_MAX_AGE_DAYS`` and then the oldest ones
+until the archive fits in ``NSE_ARCHIVE_MAX_MB`` (``0`` disables a cap).
+"""
+import glob
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.environ.get("NSE_ARCHIVE_DIR", "oi_archive")
+ARCHIVE_ENABLED = os.environ.get("NSE_ARCHIVE", "1") not in ("0", "false", "no")
+ARCHIVE_MAX_AGE_DAYS = float(os.environ.get("NSE_ARCHIVE_MAX_AGE_DAYS", "30"))
+ARCHIVE_MAX_MB = float(os.environ.get("NSE_ARCHIVE_MAX_MB", "2048"))
+ARCHIVE_FIELDS = ("CE_OI", "PE_OI", "CE_LTP", "PE_LTP", "CE_pchgOI", "PE_pchgOI")
+DTYPE = np.float32
+PRUNE_INTERVAL = 600
+QUEUE_SIZE = 1000
+
+
+def series_dir(root, symbol, expiry):
+    return os.path.join(root, symbol, expiry)
+
+
+def _truncate(path, fields):
+    """Cut ``data.f4`` / ``times.i8`` of a segment back to the rows both files hold.
+
+    ``data.f4`` is written before ``times.i8``, so a write torn by a crash can
+    leave a row (or part of one) in either file; appending after it would
+    misalign every later row.
+    """
+    strikes = np.load(os.path.join(path, "strikes.npy"), mmap_mode="r")
+    row_bytes = np.dtype(DTYPE).itemsize * len(strikes) * len(fields)
+    times, data = os.path.join(path, "times.i8"), os.path.join(path, "data.f4")
+    rows = min(_count(times, 8), _count(data, row_bytes))
+    for name, size in ((times, rows * 8), (data, rows * row_bytes)):
+        if os.path.exists(name) and os.path.getsize(name) != size:
+            log.warning("archive: truncating torn write in %s", name)
+            os.truncate(name, size)
+    return strikes
+
+
+def _new_segment(parent, strikes, ms):
+    """Create ``seg-<ms>`` under ``parent`` with its axis and meta already in place.
+
+    The segment is built in a hidden sibling directory and renamed in, so
+    readers and ``prune`` never list a segment without ``meta.json``.
+    """
+    os.makedirs(parent, exist_ok=True)
+    while os.path.exists(os.path.join(parent, f"seg-{ms:013d}")):
+        ms += 1
+    path = os.path.join(parent, f"seg-{ms:013d}")
+    tmp = os.path.join(parent, f".seg-{ms:013d}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "strikes.npy"), strikes)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"fields": list(ARCHIVE_FIELDS), "dtype": np.dtype(DTYPE).str, "strikes": len(strikes)}, f)
+    os.replace(tmp, path)
+    return path
+
+
+def _segment_bytes(path):
+    return sum(os.path.getsize(f) for f in glob.glob(os.path.join(path, "*")))
+
+
+class OiArchive:
+    """Writer side: one fixed-width row per (symbol, expiry) and snapshot."""
+
+    def __init__(self, root=ARCHIVE_DIR, max_age_days=ARCHIVE_MAX_AGE_DAYS, max_mb=ARCHIVE_MAX_MB,
+                 queue_size=QUEUE_SIZE):
+        self.root = root
+        self.max_age_days = max_age_days
+        self.max_mb = max_mb
+        self._segments = {}  # (symbol, expiry) -> (segment dir, strikes)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self.dropped = 0
+        self.pruned = 0
+
+    def _current(self, symbol, expiry, strikes, ms):
+        key = (symbol, expiry)
+        seg = self._segments.get(key)
+        if seg is None:
+            # continue the newest segment on disk after a restart
+            existing = sorted(glob.glob(os.path.join(series_dir(self.root, symbol, expiry), "seg-*")))
+            if existing:
+                seg = (existing[-1], np.asarray(_truncate(existing[-1], ARCHIVE_FIELDS)))
+        if seg is None or not np.array_equal(seg[1], strikes):
+            seg = (_new_segment(series_dir(self.root, symbol, expiry), strikes, ms), strikes)
+        self._segments[key] = seg
+        return seg[0]
+
+    def append(self, symbol, chain, fetched_at=None):
+        """Append every expiry of a ``ChainIndex`` as one row per series."""
+        ms = int((fetched_at or time.time()) * 1000)
+        with self._lock:
+            for expiry in chain.expiry_dates:
+                arrays = chain.arrays(expiry)
+                if arrays is None or not len(arrays["strikePrice"]):
+                    continue
+                path = self._current(symbol, expiry, arrays["strikePrice"], ms)
+                row = np.stack([arrays[f] for f in ARCHIVE_FIELDS], axis=1).astype(DTYPE)
+                # data first, then the timestamp: a torn write leaves an unindexed row
+                with open(os.path.join(path, "data.f4"), "ab") as f:
+                    f.write(row.tobytes())
+                with open(os.path.join(path, "times.i8"), "ab") as f:
+                    f.write(np.int64(ms).tobytes())
+            # expiries that left the chain close their segments, so prune can delete them
+            listed = set(chain.expiry_dates)
+            for key in [k for k in self._segments if k[0] == symbol and k[1] not in listed]:
+                del self._segments[key]
+
+    def prune(self, now=None):
+        """Delete closed segments past the age cap, then the oldest until under the size cap."""
+        now = time.time() if now is None else now
+        with self._lock:
+            open_paths = {seg[0] for seg in self._segments.values()}
+            closed = []  # (first ms, path, bytes, last write)
+            for path in glob.glob(os.path.join(self.root, "*", "*", "seg-*")):
+                if path in open_paths:
+                    continue
+                try:
+                    closed.append((int(os.path.basename(path)[4:]), path, _segment_bytes(path),
+                                   os.path.getmtime(os.path.join(path, "times.i8"))))
+                except (OSError, ValueError):
+                    continue
+            closed.sort()
+            total = sum(b for _, _, b, _ in closed) + sum(_segment_bytes(p) for p in open_paths)
+            for _, path, size, written in closed:
+                too_old = self.max_age_days and now - written > self.max_age_days * 86400
+                too_big = self.max_mb and total > self.max_mb * 2 ** 20
+                if not (too_old or too_big):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                self.pruned += 1
+                try:
+                    os.rmdir(os.path.dirname(path))  # the expiry directory, once empty
+                except OSError:
+                    pass
+
+    # -- collector side ----------------------------------------------------
+
+    def on_snapshot(self, snapshot):
+        """Collector subscriber: queues changed snapshots for the writer thread; never blocks."""
+        chain = snapshot.parsed
+        if chain is None or not chain.changes:
+            return
+        try:
+            self._queue.put_nowait(snapshot)
+        except queue.Full:
+            self.dropped += 1
+            log.warning("archive: queue full, dropped %s snapshot", snapshot.key)
+
+    def attach(self, collector):
+        collector.subscribe(self.on_snapshot)
+        return self.start()
+
+    # -- writer thread -----------------------------------------------------
+
+    def _write(self, snapshot):
+        try:
+            self.append(snapshot.key, snapshot.parsed, snapshot.fetched_at)
+        except Exception:
+            log.exception("archive: append of %s to %s failed", snapshot.key, self.root)
+
+    def _safe_prune(self):
+        try:
+            self.prune()
+        except Exception:
+            log.exception("archive: pruning %s failed", self.root)
+
+    def _run(self):
+        last_prune = 0.0
+        while not self._stop.is_set():
+            if time.monotonic() - last_prune >= PRUNE_INTERVAL:
+                self._safe_prune()
+                last_prune = time.monotonic()
+            try:
+                self._write(self._queue.get(timeout=1))
+            except queue.Empty:
+                pass
+        while True:
+            try:
+                self._write(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="nse-oi-archive", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the writer after appending whatever is queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+class Segment:
+    """Read-only memory map of one segment."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.path = path
+        self.fields = tuple(meta["fields"])
+        self.strikes = np.load(os.path.join(path, "strikes.npy"), mmap_mode="r")
+        width = len(self.strikes) * len(self.fields)
+        dtype = np.dtype(meta["dtype"])
+        rows = min(_count(os.path.join(path, "times.i8"), 8),
+                   _count(os.path.join(path, "data.f4"), dtype.itemsize * width))
+        self.times = _map(os.path.join(path, "times.i8"), np.int64, (rows,))
+        self.data = _map(os.path.join(path, "data.f4"), dtype, (rows, len(self.strikes), len(self.fields)))
+
+    def __len__(self):
+        return len(self.times)
+
+    def rows(self, start_ms=None, end_ms=None):
+        """Row slice for ``start_ms <= t <= end_ms`` (binary search on the time axis)."""
+        lo = 0 if start_ms is None else int(np.searchsorted(self.times, start_ms, side="left"))
+        hi = len(self.times) if end_ms is None else int(np.searchsorted(self.times, end_ms, side="right"))
+        return slice(lo, hi)
+
+    def strike_pos(self, strike):
+        i = int(np.searchsorted(self.strikes, strike))
+        return i if i < len(self.strikes) and self.strikes[i] == strike else None
+
+    def view(self, start_ms=None, end_ms=None, low=None, high=None):
+        """(times, strikes, data) views restricted to a time range and a strike range."""
+        rows = self.rows(start_ms, end_ms)
+        lo = 0 if low is None else int(np.searchsorted(self.strikes, low, side="left"))
+        hi = len(self.strikes) if high is None else int(np.searchsorted(self.strikes, high, side="right"))
+        return self.times[rows], self.strikes[lo:hi], self.data[rows, lo:hi]
+
+
+def _count(path, row_bytes):
+    try:
+        return os.path.getsize(path) // row_bytes if row_bytes else 0
+    except OSError:
+        return 0
+
+
+def _map(path, dtype, shape):
+    if not shape[0]:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+def _open(path):
+    """``Segment(path)``, or None if ``prune`` deleted it while it was being listed."""
+    try:
+        return Segment(path)
+    except FileNotFoundError:
+        return None
+
+
+class OiSeries:
+    """Reader over every segment of one (symbol, expiry) series."""
+
+    def __init__(self, symbol, expiry, root=ARCHIVE_DIR):
+        self.symbol = symbol
+        self.expiry = expiry
+        paths = sorted(glob.glob(os.path.join(series_dir(root, symbol, expiry), "seg-*")))
+        self.segments = [s for s in map(_open, paths) if s is not None and len(s)]
+
+    def __len__(self):
+        return sum(len(s) for s in self.segments)
+
+    @property
+    def strikes(self):
+        """Union of the strike axes of all segments."""
+        if not self.segments:
+            return np.empty(0)
+        return np.unique(np.concatenate([np.asarray(s.strikes) for s in self.segments]))
+
+    def strike_history(self, strike, start=None, end=None, fields=ARCHIVE_FIELDS) -> pd.DataFrame:
+        """``fields`` of one strike over time (``start``/``end``: datetimes or epoch-ms).
+
+        Only the selected rows/columns of the maps are read; the result is
+        the one small copy, indexed by IST timestamp.
+        """
+        start_ms, end_ms = _ms(start), _ms(end)
+        times, cols = [], {f: [] for f in fields}
+        for seg in self.segments:
+            pos = seg.strike_pos(strike)
+            if pos is None:
+                continue
+            rows = seg.rows(start_ms, end_ms)
+            times.append(seg.times[rows])
+            for f in fields:
+                cols[f].append(seg.data[rows, pos, seg.fields.index(f)])
+        if not times:
+            return pd.DataFrame(columns=list(fields), index=pd.DatetimeIndex([], name="time"))
+        index = pd.to_datetime(np.concatenate(times), unit="ms", utc=True).tz_convert("Asia/Kolkata")
+        return pd.DataFrame({f: np.concatenate(v) for f, v in cols.items()},
+                            index=index.rename("time"))
+
+
+def _ms(t):
+    if t is None or isinstance(t, (int, np.integer)):
+        return t
+    return int(pd.Timestamp(t).timestamp() * 1000)
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    """Process-wide archive writer, or None when disabled (NSE_ARCHIVE=0)."""
+    global _archive
+    if _archive is None and ARCHIVE_ENABLED:
+        with _archive_lock:
+            if _archive is None:
+                _archive = OiArchive()
+    return _archive
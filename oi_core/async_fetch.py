@@ -0,0 +1,136 @@
+"""Concurrent option-chain fetches for several indices in one tick.
+
+Uses ``httpx.AsyncClient`` when httpx is installed; otherwise each symbol is
+fetched through the shared pooled ``requests`` session on a worker thread.
+Either way requests to the same host are capped by a semaphore, so polling
+four indices takes about as long as the slowest one instead of the sum.
+
+The collector polls through an ``OptionChainPoller``: one event loop and one
+open fetcher (so one ``httpx.AsyncClient`` and its keep-alive connections)
+for the life of the collector thread, instead of ``asyncio.run`` and a new
+client with fresh TCP/TLS handshakes on every tick.  Cookies NSE sets on API
+responses are copied back into the shared session pool.
+"""
+import asyncio
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+except ImportError:  # optional dependency
+    httpx = None
+
+from .decode import decode_option_chain
+from .fetch import OPTION_CHAIN_PATH, fetch_option_chain
+from .metrics import nse_request_seconds, nse_requests
+from .replay import get_replay
+from .session import AUTH_STATUSES, HEADERS, get_pool
+from .timing import timed
+
+INDEX_SYMBOLS = ("NIFTY", "BANKNIFTY", "FINNIFTY", "MIDCPNIFTY")
+HOST_CONCURRENCY = int(os.environ.get("NSE_HOST_CONCURRENCY", "4"))
+
+
+class AsyncOptionChainFetcher:
+    def __init__(self, max_per_host=HOST_CONCURRENCY, timeout=10):
+        self.pool = get_pool()
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._semaphores = {}
+        self._client = None
+        self._warm_lock = None
+
+    def _semaphore(self, url):
+        host = urlsplit(url).netloc
+        sem = self._semaphores.get(host)
+        if sem is None:
+            sem = self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        return sem
+
+    async def __aenter__(self):
+        # a replay is served by fetch_option_chain on the worker-thread path
+        if httpx is not None and get_replay() is None:
+            self._client = httpx.AsyncClient(headers=HEADERS, timeout=self.timeout,
+                                             limits=httpx.Limits(max_connections=self.max_per_host))
+            self._warm_lock = asyncio.Lock()
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _warm_up(self, force=False, since=None):
+        # cookies live in the shared sync pool so every tick (and thread) reuses them
+        async with self._warm_lock:
+            if force or self.pool.cookies_expired():
+                await asyncio.to_thread(self.pool.warm_up, force, since)
+            self._client.cookies.update(self.pool.session.cookies)
+
+    async def fetch(self, symbol):
+        url = f"{self.pool.base_url}{OPTION_CHAIN_PATH}"
+        async with self._semaphore(url):
+            if self._client is None or get_replay() is not None:
+                return await asyncio.to_thread(fetch_option_chain, symbol, self.timeout)
+            with timed("fetch", symbol=symbol):
+                await self._warm_up()
+                with nse_request_seconds.time():
+                    try:
+                        started = time.time()
+                        r = await self._client.get(url, params={"symbol": symbol})
+                        if r.status_code in AUTH_STATUSES:
+                            await self._warm_up(force=True, since=started)
+                            r = await self._client.get(url, params={"symbol": symbol})
+                    except httpx.HTTPError:
+                        nse_requests.inc(status="error")
+                        raise
+                if r.cookies:
+                    self.pool.store_cookies(r.cookies.jar)
+                nse_requests.inc(status=str(r.status_code))
+                r.raise_for_status()
+        with timed("decode", symbol=symbol):
+            return decode_option_chain(r.content)
+
+    async def fetch_many(self, symbols=INDEX_SYMBOLS):
+        """Fetch ``symbols`` concurrently; failures come back as exception values."""
+        results = await asyncio.gather(*(self.fetch(s) for s in symbols), return_exceptions=True)
+        return dict(zip(symbols, results))
+
+
+async def fetch_option_chains_async(symbols=INDEX_SYMBOLS, **kwargs):
+    async with AsyncOptionChainFetcher(**kwargs) as fetcher:
+        return await fetcher.fetch_many(tuple(symbols))
+
+
+def fetch_option_chains(symbols=INDEX_SYMBOLS, **kwargs):
+    """Blocking wrapper around :func:`fetch_option_chains_async` for one-off scripts."""
+    return asyncio.run(fetch_option_chains_async(symbols, **kwargs))
+
+
+class OptionChainPoller:
+    """Blocking ``poller(symbols)`` for repeated polls over one event loop and one open fetcher."""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self._loop = None
+        self._fetcher = None
+        self._lock = threading.Lock()
+
+    def __call__(self, symbols=INDEX_SYMBOLS):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            if self._fetcher is None:
+                self._fetcher = self._loop.run_until_complete(AsyncOptionChainFetcher(**self.kwargs).__aenter__())
+            return self._loop.run_until_complete(self._fetcher.fetch_many(tuple(symbols)))
+
+    def close(self):
+        with self._lock:
+            fetcher, self._fetcher = self._fetcher, None
+            loop, self._loop = self._loop, None
+            if loop is not None:
+                if fetcher is not None:
+                    loop.run_until_complete(fetcher.__aexit__(None, None, None))
+                loop.close()
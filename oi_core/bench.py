@@ -0,0 +1,315 @@
+"""Stage-by-stage benchmark of the fetch -> parse -> analyze -> render pipeline.
+
+Fixture payloads are generated by ``mock_nse.SyntheticMarket`` from a pinned
+seed and date, so every run times the same bytes (their sha256 is part of
+the report).  Each (symbol, size) case times the stages a page rerun goes
+through, in order::
+
+    decode          decode_option_chain on the raw response bytes
+    index           ChainIndex: rows grouped by expiry + strike-sorted leg arrays
+    frame           strike frame of the nearest expiry from a fresh index
+    row_build       first half of build_chain_df: field lists pulled out of the row dicts
+    dedupe_sort     second half: first row per strike, ascending, risk columns derived
+    diff            next snapshot against the previous index (change set + patched frame)
+    atm_pcr         OiLadder, ATM window, window sums and the PCR-by-window table
+    rocket          rocket classification and CE-PE diff signs of the window
+    style           tracker_table + tracker_grid, the pages13/14 ATM ±6 table and its rules
+    serialize       Styler -> encoded st.dataframe element (Streamlit's styler marshalling + Arrow)
+    render_cached   frame digest + render-cache hit + element decode (what an unchanged rerun pays)
+    rules           features + evaluation of ``BENCH_RULES`` (alert rule DSL) on the next snapshot
+
+Results go to a JSON report; ``--compare`` checks it against an earlier one::
+
+    python -m oi_core.bench --out bench_output.json
+    python -m oi_core.bench --out new.json --compare bench_output.json --threshold 1.25
+
+``--notify N`` instead measures alert delivery: N notifications through the
+notifier to a local sink (optionally slow, flaky or writing JSON lines),
+next to a slow sink that must not hold it up::
+
+    python -m oi_core.bench --notify 5000 --sink-fail 0.1 --slow-sink 0.5
+"""
+import argparse
+import hashlib
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime, timezone
+
+from streamlit.proto.Dataframe_pb2 import Dataframe as DataframeProto
+
+from .analytics import OiLadder, atm_window, diff_sign, pcr, rocket_signal
+from .decode import BACKEND, decode_option_chain
+from .mock_nse import SyntheticMarket
+from .notify import Notification, Notifier, SinkTransport
+from .parse import PCT_COLUMNS, ChainIndex, chain_df_from_columns, row_columns, safe_float
+from .render import RenderCache, frame_digest, marshal_styler
+from .rules import Rule, RuleSet
+from .style import tracker_grid, tracker_styler, tracker_table
+
+REPORT_VERSION = 1
+FIXTURE_SEED = 20260101
+FIXTURE_DATE = date(2026, 1, 1)
+FIXTURE_TIMESTAMP = "01-Jan-2026 15:30:00"
+# size -> (expiries, strikes either side of spot)
+BENCH_SIZES = {
+    "small": (1, 10),
+    "weekly": (1, 60),
+    "full": (15, 60),
+}
+BENCH_SYMBOLS = ("NIFTY", "BANKNIFTY")
+WINDOW = 6
+NOISE_FLOOR_MS = 0.05  # --compare ignores stages faster than this
+# 8 templates x 25 parameter sets: 200 alert rules, as a busy rules file would have
+BENCH_RULES = tuple(
+    Rule(f"{name}_{i}", text.format(k=2 + i % 9, x=0.8 + 0.02 * i, p=5 + 3 * i))
+    for name, text in (
+        ("pcr_up", "pcr({k}) crosses above {x}"),
+        ("pcr_low", "pcr({k}) < {x} and rocket is Strong Bearish"),
+        ("pe_wall", "max_oi_strike(PE, {k}) shifts"),
+        ("ce_build", "CE_%OI > {p} at any strike within {k}"),
+        ("pe_unwind", "PE_%OI < -{p} at any strike within {k}"),
+        ("flip", "CE_PE_Diff crosses 0 and pcr({k}) > {x}"),
+        ("risk", "CE_Risk > {p} at all strikes within {k} or PE_Risk > {p} at all strikes within {k}"),
+        ("rocket", "rocket becomes Strong Bullish or spot crosses below {p}"),
+    )
+    for i in range(25)
+)
+
+
+def fixture(symbol, size):
+    """Two consecutive pinned payloads (raw JSON bytes) for ``symbol`` at ``size``."""
+    expiries, strikes = BENCH_SIZES[size]
+    market = SyntheticMarket(strikes, expiries, seed=FIXTURE_SEED, today=FIXTURE_DATE)
+    out = []
+    for _ in range(2):
+        payload = market.payload(symbol)
+        payload["records"]["timestamp"] = FIXTURE_TIMESTAMP
+        out.append(json.dumps(payload).encode())
+    return tuple(out)
+
+
+def measure(fn, setup=None, repeat=20, min_time=0.2):
+    """Timings of ``fn()`` (or ``fn(setup())``, setup untimed) in milliseconds."""
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < repeat or (time.perf_counter() < deadline and len(samples) < 50 * repeat):
+        arg = setup() if setup is not None else None
+        t0 = time.perf_counter_ns()
+        fn(arg) if setup is not None else fn()
+        samples.append((time.perf_counter_ns() - t0) / 1e6)
+    samples.sort()
+    return {
+        "n": len(samples),
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+    }
+
+
+def run_case(symbol, size, repeat=20, min_time=0.2):
+    """Per-stage timings for one fixture -> ({stage: timings}, fixture info)."""
+    payload, next_payload = fixture(symbol, size)
+    raw, next_raw = decode_option_chain(payload), decode_option_chain(next_payload)
+    chain = ChainIndex.from_payload(raw, eager=False)
+    expiry = chain.expiry_dates[0]
+    spot = safe_float(chain.underlying_value)
+    df = chain.frame(expiry, ndigits=1).rename(columns=PCT_COLUMNS)
+    ladder = OiLadder(df)
+    atm = ladder.atm(spot)
+    win = atm_window(df, spot, WINDOW, WINDOW, atm_idx=atm)
+    display = tracker_table(win)
+    max_ce_oi, max_pe_oi = win.df["CE_OI"].max(), win.df["PE_OI"].max()
+    columns = row_columns(chain.rows(expiry))
+    cache = RenderCache()
+
+    def analyze():
+        lad = OiLadder(df)
+        i = lad.atm(spot)
+        w = atm_window(df, spot, WINDOW, WINDOW, atm_idx=i)
+        total = pcr(*lad.window(i, WINDOW))
+        return w, total, lad.window(i, 4), lad.pcr_table(i)
+
+    _, total_pcr, (atm_pe_oi, atm_ce_oi), _ = analyze()
+    rules = RuleSet(BENCH_RULES)
+    next_chain = ChainIndex.from_payload(next_raw, previous=chain)
+    last_features = rules.features_of(chain, expiry)
+
+    def evaluate_rules():
+        return rules.fired(rules.features_of(next_chain, expiry), last_features, symbol)
+
+    def rocket():
+        row = win.atm_row
+        signs = [diff_sign(v) for v in win.df["CE_PE_Diff"].tolist()]
+        return rocket_signal(total_pcr, atm_pe_oi, atm_ce_oi, row["PE_%OI"], row["CE_%OI"]), signs
+
+    def render_cached():
+        key = (symbol, expiry, WINDOW, frame_digest(display, win.atm_strike))
+        return DataframeProto.FromString(
+            cache.get_or_render(key, lambda: marshal_styler(tracker_styler(display, max_ce_oi, max_pe_oi))))
+
+    def fresh():
+        return ChainIndex.from_payload(raw, eager=False)
+
+    def with_frame():
+        prev = fresh()
+        prev.frame(expiry, ndigits=1)
+        return prev
+
+    render_cached()  # warm the cache: the stage times the hit
+    stages = [
+        ("decode", lambda: decode_option_chain(payload), None),
+        ("index", fresh, None),
+        ("frame", lambda c: c.frame(expiry, ndigits=1), fresh),
+        ("row_build", lambda: row_columns(chain.rows(expiry)), None),
+        ("dedupe_sort", lambda: chain_df_from_columns(columns, spot, ndigits=1), None),
+        ("diff", lambda prev: ChainIndex.from_payload(next_raw, previous=prev, eager=False)
+         .frame(expiry, ndigits=1), with_frame),
+        ("atm_pcr", analyze, None),
+        ("rocket", rocket, None),
+        ("style", lambda: tracker_grid(tracker_table(win), max_ce_oi, max_pe_oi).to_frame(), None),
+        ("serialize", lambda: marshal_styler(tracker_styler(display, max_ce_oi, max_pe_oi)), None),
+        ("render_cached", render_cached, None),
+        ("rules", evaluate_rules, None),
+    ]
+    results = {name: measure(fn, setup, repeat, min_time) for name, fn, setup in stages}
+    info = {
+        "bytes": len(payload),
+        "sha256": hashlib.sha256(payload).hexdigest(),
+        "expiries": len(chain.expiry_dates),
+        "rows": sum(len(chain.rows(e)) for e in chain.expiry_dates),
+        "strikes": len(df),
+    }
+    return results, info
+
+
+def _versions():
+    out = {"python": platform.python_version()}
+    for name in ("numpy", "pandas", "msgspec", "orjson", "pyarrow"):
+        module = sys.modules.get(name)
+        if module is None:
+            try:
+                module = __import__(name)
+            except ImportError:
+                continue
+        out[name] = getattr(module, "__version__", "?")
+    return out
+
+
+def run(symbols=BENCH_SYMBOLS, sizes=tuple(BENCH_SIZES), repeat=20, min_time=0.2, progress=None):
+    report = {
+        "version": REPORT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "decoder": BACKEND,
+        "packages": _versions(),
+        "fixtures": {},
+        "results": {},
+    }
+    for symbol in symbols:
+        for size in sizes:
+            case = f"{symbol}/{size}"
+            results, info = run_case(symbol, size, repeat, min_time)
+            report["fixtures"][case] = info
+            report["results"][case] = results
+            if progress is not None:
+                progress(case, results)
+    return report
+
+
+def compare(report, baseline, threshold=1.25):
+    """[(case, stage, baseline ms, current ms, ratio)] for stages slower than ``threshold``."""
+    regressions = []
+    for case, stages in report["results"].items():
+        base_case = baseline.get("results", {}).get(case)
+        if base_case is None:
+            continue
+        if baseline.get("fixtures", {}).get(case, {}).get("sha256") != report["fixtures"][case]["sha256"]:
+            print(f"warning: {case} fixture differs from the baseline's", file=sys.stderr)
+        for stage, t in stages.items():
+            base = base_case.get(stage)
+            if base is None or max(base["median_ms"], t["median_ms"]) < NOISE_FLOOR_MS:
+                continue
+            ratio = t["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+            if ratio > threshold:
+                regressions.append((case, stage, base["median_ms"], t["median_ms"], ratio))
+    return regressions
+
+
+def notify_throughput(messages, latency=0.0, fail_rate=0.0, slow=0.0, concurrency=1, path=None, seed=0):
+    """Deliver ``messages`` notifications to a sink transport; returns throughput and outcome counts."""
+    notifier = Notifier(backoff=0.01, queue_size=messages)
+    sink = SinkTransport(path, latency=latency, fail_rate=fail_rate, keep=1, seed=seed)
+    sink.concurrency = concurrency
+    slow_sink = SinkTransport(latency=slow, keep=1, name="slow-sink") if slow else None
+    t0 = time.perf_counter()
+    futures = []
+    for i in range(messages):
+        note = Notification(f"alert {i}", "synthetic notification body")
+        futures.append(notifier.submit(sink, note))
+        if slow_sink is not None:
+            notifier.submit(slow_sink, note)
+    submitted = time.perf_counter() - t0
+    failed = sum(f.exception() is not None for f in futures)
+    elapsed = time.perf_counter() - t0
+    report = {"messages": messages, "delivered": sink.delivered, "failed": failed,
+              "injected_failures": sink.failures, "submit_us": round(submitted / messages * 1e6, 2),
+              "seconds": round(elapsed, 3), "per_second": round(sink.delivered / elapsed, 1)}
+    if slow_sink is not None:
+        report["slow_sink_delivered"] = slow_sink.delivered
+    else:
+        notifier.stop()  # a slow sink's backlog is left to die with the process
+    return report
+
+
+def _print_case(case, results):
+    print(f"{case}")
+    for stage, t in results.items():
+        print(f"  {stage:<15} median {t['median_ms']:9.3f} ms   p95 {t['p95_ms']:9.3f} ms   (n={t['n']})")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m oi_core.bench", description=__doc__.split("\n\n")[0])
+    p.add_argument("--symbols", nargs="+", default=list(BENCH_SYMBOLS))
+    p.add_argument("--sizes", nargs="+", default=list(BENCH_SIZES), choices=list(BENCH_SIZES))
+    p.add_argument("--repeat", type=int, default=20, help="minimum samples per stage")
+    p.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per stage")
+    p.add_argument("--out", default="bench_output.json", help="JSON report path ('-' for stdout)")
+    p.add_argument("--compare", metavar="BASELINE", help="earlier report; exit 1 on regressions")
+    p.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    p.add_argument("--notify", type=int, metavar="N", help="only benchmark delivery of N notifications")
+    p.add_argument("--sink-latency", type=float, default=0.0, help="--notify: seconds per send")
+    p.add_argument("--sink-fail", type=float, default=0.0, help="--notify: failure probability per send")
+    p.add_argument("--sink-concurrency", type=int, default=1, help="--notify: sends in flight")
+    p.add_argument("--sink-file", metavar="PATH", help="--notify: also append JSON lines to PATH")
+    p.add_argument("--slow-sink", type=float, default=0.0, help="--notify: seconds per send on a second sink")
+    args = p.parse_args(argv)
+
+    if args.notify:
+        print(json.dumps(notify_throughput(args.notify, args.sink_latency, args.sink_fail, args.slow_sink,
+                                           args.sink_concurrency, args.sink_file)))
+        return 0
+
+    report = run(args.symbols, args.sizes, args.repeat, args.min_time,
+                 progress=None if args.out == "-" else _print_case)
+    if args.out == "-":
+        json.dump(report, sys.stdout, indent=1)
+    else:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"report written to {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for case, stage, base, now, ratio in regressions:
+            print(f"REGRESSION {case} {stage}: {base:.3f} -> {now:.3f} ms ({ratio:.2f}x)", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Server-side, single-flight snapshot cache shared by every browser session.
+
+Each Streamlit session's autorefresh tick used to hit NSE on its own.  The
+cache below keeps one decoded snapshot per key (symbol) for ``ttl`` seconds.
+Concurrent misses for the same key coalesce onto one in-flight load, and
+once an entry is older than ``ttl`` but younger than ``stale_ttl`` readers get
+the stale snapshot immediately while a single background refresh runs.
+An optional ``parser(data, previous)`` runs once per stored snapshot (on the
+loading thread) so readers share the parsed form as well as the decoded
+payload; ``previous`` is the parsed form of the snapshot it replaces, if any.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    key: str
+    data: Any
+    fetched_at: float  # wall clock (time.time())
+    loaded_at: float   # time.monotonic(), used for TTL checks
+    parsed: Any = None  # parser(data, previous), if the cache has a parser
+
+    @property
+    def age(self):
+        return time.monotonic() - self.loaded_at
+
+
+class _Flight:
+    __slots__ = ("done", "snapshot", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.snapshot = None
+        self.error = None
+
+
+class SnapshotCache:
+    def __init__(self, loader: Callable[[str], Any], ttl: float = 15, stale_ttl: float = 60,
+                 parser: Callable[[Any, Any], Any] = None):
+        self.loader = loader
+        self.parser = parser
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._flights = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.coalesced = 0  # waited on another caller's load instead of loading
+
+    def _make(self, key, data, fetched_at=None):
+        parsed = None
+        if self.parser is not None:
+            with self._lock:
+                prev = self._entries.get(key)
+            parsed = self.parser(data, prev.parsed if prev is not None else None)
+        return Snapshot(key, data, fetched_at or time.time(), time.monotonic(), parsed)
+
+    def _load(self, key, flight):
+        try:
+            flight.snapshot = self._make(key, self.loader(key))
+        except Exception as e:
+            flight.error = e
+        with self._lock:
+            if flight.snapshot is not None:
+                self._entries[key] = flight.snapshot
+            self._flights.pop(key, None)
+        flight.done.set()
+
+    def get_snapshot(self, key: str) -> Snapshot:
+        """Return the cached snapshot for ``key``, loading it at most once concurrently."""
+        with self._lock:
+            entry = self._entries.get(key)
+            age = entry.age if entry is not None else None
+            if entry is not None and age < self.ttl:
+                self.hits += 1
+                return entry
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            if entry is not None and age < self.stale_ttl:
+                # stale-while-revalidate: serve what we have, refresh in the background
+                self.stale_hits += 1
+                if leader:
+                    threading.Thread(target=self._load, args=(key, flight),
+                                     name=f"snapshot-refresh-{key}", daemon=True).start()
+                return entry
+            if leader:
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if leader:
+            self._load(key, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.snapshot
+
+    def get(self, key: str):
+        return self.get_snapshot(key).data
+
+    def peek(self, key: str):
+        """Latest snapshot for ``key`` without triggering a load (None if absent)."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def snapshots(self):
+        """Current snapshot of every key (for metrics; no loads)."""
+        with self._lock:
+            return list(self._entries.values())
+
+    def put(self, key: str, data, fetched_at=None):
+        snap = self._make(key, data, fetched_at)
+        with self._lock:
+            self._entries[key] = snap
+        return snap
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
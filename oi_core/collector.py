@@ -0,0 +1,136 @@
+"""Background collector that polls NSE independently of page reruns.
+
+A single daemon thread per server process fetches every configured symbol
+(concurrently, see :mod:`oi_core.async_fetch`) on a fixed schedule and
+publishes the decoded payloads into the shared snapshot cache.  Page reruns then only read the latest published snapshot, so render
+time no longer depends on NSE latency and no script thread sits in a
+``while True: time.sleep(...)`` loop.
+"""
+import logging
+import os
+import threading
+import time
+
+from .alerts import get_alert_engine
+from .archive import get_archive
+from .async_fetch import INDEX_SYMBOLS, OptionChainPoller
+from .exporter import start_metrics_server
+from .fetch import option_chain_cache
+from .history import max_oi_history
+from .metrics import collector_snapshots
+from .replay import get_recorder, get_replay
+from .store import get_tick_store
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SYMBOLS = INDEX_SYMBOLS
+COLLECT_INTERVAL = float(os.environ.get("NSE_COLLECT_INTERVAL", "10"))
+MAX_BACKOFF = 120
+
+
+class Collector:
+    def __init__(self, symbols=DEFAULT_SYMBOLS, interval=COLLECT_INTERVAL,
+                 loader=None, cache=option_chain_cache):
+        self.symbols = tuple(symbols)
+        self.interval = interval
+        # loader(symbols) -> {symbol: payload or exception}, fetched concurrently; the default
+        # keeps its event loop and HTTP client (connections) between ticks
+        self.loader = loader if loader is not None else OptionChainPoller()
+        self.cache = cache
+        self.errors = {}
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self, callback):
+        """Call ``callback(snapshot)`` from the collector thread after each publish."""
+        self._subscribers.append(callback)
+        return callback
+
+    def latest(self, symbol):
+        return self.cache.peek(symbol)
+
+    def collect_once(self):
+        """Fetch every symbol once; returns the snapshots published this round."""
+        published = []
+        try:
+            results = self.loader(self.symbols)
+        except Exception as e:
+            results = {symbol: e for symbol in self.symbols}
+        for symbol, data in results.items():
+            if isinstance(data, BaseException):
+                self.errors[symbol] = data
+                log.warning("collector: fetch %s failed: %s", symbol, data)
+                continue
+            self.errors.pop(symbol, None)
+            snap = self.cache.put(symbol, data)
+            published.append(snap)
+            collector_snapshots.inc(symbol=symbol)
+            for cb in list(self._subscribers):
+                try:
+                    cb(snap)
+                except Exception:
+                    log.exception("collector: subscriber %r failed", cb)
+        return published
+
+    def _run(self):
+        delay = self.interval
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                ok = self.collect_once()
+                # back off while NSE is failing for every symbol, reset on success
+                delay = self.interval if ok else min(delay * 2, MAX_BACKOFF)
+                self._stop.wait(max(0.0, delay - (time.monotonic() - started)))
+        finally:
+            close = getattr(self.loader, "close", None)
+            if close is not None:
+                close()
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="nse-collector", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_collector = None
+_collector_lock = threading.Lock()
+
+
+def get_collector():
+    global _collector
+    if _collector is None:
+        with _collector_lock:
+            if _collector is None:
+                # a replay only serves the symbols it recorded; polling the others would fail every tick
+                replay = get_replay()
+                _collector = Collector(symbols=DEFAULT_SYMBOLS if replay is None else replay.symbols)
+                # persist / record every published snapshot (disabled sinks are None); replayed
+                # snapshots carry replay-time timestamps and must not land in the real history
+                history = () if replay is not None else (get_tick_store(), get_archive())
+                sinks = (*history, max_oi_history, get_recorder(), get_alert_engine())
+                for sink in sinks:
+                    if sink is not None:
+                        sink.attach(_collector)
+    return _collector
+
+
+def start_collector():
+    """Start the process-wide collector (idempotent; safe to call on every rerun).
+
+    Also starts the ``/metrics`` exporter when ``NSE_METRICS_PORT`` is set.
+    """
+    collector = get_collector()
+    start_metrics_server(collector=collector)
+    return collector.start()
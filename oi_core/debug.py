@@ -0,0 +1,37 @@
+"""Optional debug sidebar for the pages (``?debug=1`` in the URL or ``NSE_DEBUG=1``)."""
+import os
+
+import pandas as pd
+
+from .collector import get_collector
+from .fetch import option_chain_cache
+from .render import render_cache
+from .timing import stage_timer
+
+DEBUG = os.environ.get("NSE_DEBUG", "0") in ("1", "true", "yes")
+
+
+def _cache_stats():
+    rows = {
+        "snapshots": (option_chain_cache.hits + option_chain_cache.stale_hits, option_chain_cache.misses),
+        "rendered tables": (render_cache.hits, render_cache.misses),
+    }
+    return pd.DataFrame.from_dict(rows, orient="index", columns=["hits", "misses"])
+
+
+def debug_sidebar():
+    """Stage timing percentiles and cache counters in a sidebar expander."""
+    import streamlit as st
+
+    if not DEBUG and st.query_params.get("debug") not in ("1", "true"):
+        return
+    with st.sidebar.expander("⏱️ Stage timings (ms)", expanded=True):
+        table = stage_timer.table()
+        if table.empty:
+            st.caption("No timings recorded yet.")
+        else:
+            st.dataframe(table.round(3), use_container_width=True)
+        st.dataframe(_cache_stats(), use_container_width=True)
+        errors = get_collector().errors
+        if errors:
+            st.caption("Collector errors: " + "; ".join(f"{k}: {v}" for k, v in errors.items()))
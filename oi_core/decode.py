@@ -0,0 +1,82 @@
+"""Fast decoding of the option-chain payload.
+
+Preference order, picked at import time:
+
+* ``msgspec`` - typed decode into structs that only declare the fields the
+  pages read; every other field (bid/ask quantities, identifiers, IV, ...)
+  is skipped by the parser instead of being materialised.
+* ``orjson`` - full decode, but several times faster than the stdlib.
+* ``json`` - stdlib fallback.
+
+The result is always plain dicts/lists with the same keys the NSE payload
+uses, so callers do not care which backend ran.
+"""
+import json
+from typing import List, Optional, Union
+
+try:
+    import msgspec
+except ImportError:  # optional dependency
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+Number = Union[int, float]  # keep ints as ints, like the stdlib decoder
+
+if msgspec is not None:
+    class Leg(msgspec.Struct):
+        openInterest: Number = 0
+        changeinOpenInterest: Number = 0
+        pchangeinOpenInterest: Number = 0
+        lastPrice: Number = 0
+        underlyingValue: Optional[Number] = None
+
+    # omit_defaults: a missing CE/PE leg stays absent instead of becoming None
+    class StrikeRow(msgspec.Struct, omit_defaults=True):
+        strikePrice: Number = 0
+        expiryDate: Optional[str] = None
+        CE: Optional[Leg] = None
+        PE: Optional[Leg] = None
+
+    class Records(msgspec.Struct, omit_defaults=True):
+        expiryDates: List[str] = []
+        data: List[StrikeRow] = []
+        underlyingValue: Optional[Number] = None
+        timestamp: Optional[str] = None
+
+    class Filtered(msgspec.Struct, omit_defaults=True):
+        data: List[StrikeRow] = []
+
+    class OptionChainPayload(msgspec.Struct, omit_defaults=True):
+        records: Optional[Records] = None
+        filtered: Optional[Filtered] = None
+        data: Optional[List[StrikeRow]] = None
+        underlyingValue: Optional[Number] = None
+
+    _decoder = msgspec.json.Decoder(OptionChainPayload, strict=False)
+    BACKEND = "msgspec"
+elif orjson is not None:
+    BACKEND = "orjson"
+else:
+    BACKEND = "json"
+
+
+def _loads(content):
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def decode_option_chain(content):
+    """Decode raw response bytes/str of ``option-chain-indices`` into dicts."""
+    if msgspec is not None:
+        try:
+            return msgspec.to_builtins(_decoder.decode(content))
+        except msgspec.ValidationError:
+            # unexpected shape/type somewhere: fall back to a lossless decode
+            pass
+    return _loads(content)
@@ -0,0 +1,68 @@
+"""Per-(expiry, strike, side) change sets between consecutive snapshots.
+
+Each expiry is compared as strike-sorted column arrays (see
+``parse.leg_arrays``), and only the leg fields the strike frames are built
+from take part, so churn in fields the pages never read (volumes, bid/ask,
+the per-leg underlying) does not count as a change.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+SIDE_COLUMNS = {
+    "CE": ("CE_OI", "CE_pchgOI", "CE_LTP"),
+    "PE": ("PE_OI", "PE_pchgOI", "PE_LTP"),
+}
+
+
+@dataclass(frozen=True)
+class ChangeSet:
+    legs: frozenset = frozenset()     # {(expiry, strike, side)} with a changed OI / %OI / LTP
+    added: frozenset = frozenset()    # {(expiry, strike)} not in the previous snapshot
+    removed: frozenset = frozenset()  # {(expiry, strike)} gone since the previous snapshot
+    spot_moved: bool = False
+    initial: bool = False             # no previous snapshot: treat everything as changed
+
+    def __bool__(self):
+        return self.initial or self.spot_moved or bool(self.legs or self.added or self.removed)
+
+
+def changed_rows(prev, curr):
+    """Row positions of ``curr`` whose legs differ from ``prev`` -> ``{side: positions}``.
+
+    Both arguments are ``leg_arrays`` results over the same strikes.
+    """
+    out = {}
+    for side, cols in SIDE_COLUMNS.items():
+        mask = np.zeros(len(curr["strikePrice"]), dtype=bool)
+        for c in cols:
+            mask |= prev[c] != curr[c]
+        out[side] = np.flatnonzero(mask)
+    return out
+
+
+def diff_snapshots(prev_arrays, curr_arrays, prev_spot, curr_spot):
+    """Compare two ``{expiry: leg_arrays}`` snapshots of one symbol.
+
+    Returns ``(ChangeSet, {expiry: changed row positions})``; the positions
+    are only given for expiries whose strikes did not change.
+    """
+    legs, added, removed, positions = [], [], [], {}
+    for expiry in prev_arrays.keys() | curr_arrays.keys():
+        prev = prev_arrays.get(expiry)
+        curr = curr_arrays.get(expiry)
+        prev_strikes = prev["strikePrice"] if prev is not None else np.empty(0)
+        curr_strikes = curr["strikePrice"] if curr is not None else np.empty(0)
+        if not np.array_equal(prev_strikes, curr_strikes):
+            added += [(expiry, s) for s in np.setdiff1d(curr_strikes, prev_strikes).tolist()]
+            removed += [(expiry, s) for s in np.setdiff1d(prev_strikes, curr_strikes).tolist()]
+            continue
+        if prev is None or curr is None:
+            continue
+        by_side = changed_rows(prev, curr)
+        strikes = curr_strikes.tolist()
+        for side, pos in by_side.items():
+            legs += [(expiry, strikes[i], side) for i in pos.tolist()]
+        positions[expiry] = np.union1d(by_side["CE"], by_side["PE"])
+    changes = ChangeSet(frozenset(legs), frozenset(added), frozenset(removed), prev_spot != curr_spot)
+    return changes, positions
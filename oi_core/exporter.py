@@ -0,0 +1,119 @@
+"""``/metrics`` endpoint next to the Streamlit server.
+
+Started by ``start_collector`` when ``NSE_METRICS_PORT`` is set; serves
+the :mod:`oi_core.metrics` registry from a daemon thread on
+``NSE_METRICS_HOST`` (default 127.0.0.1).  Besides the metrics updated on
+the hot path, every scrape reads the snapshot/render cache counters, the
+age of each cached snapshot, collector errors, active Streamlit sessions,
+notification queue depths and the rolling stage timings.
+"""
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .fetch import option_chain_cache
+from .metrics import registry
+from .notify import get_notifier
+from .render import render_cache
+from .timing import PERCENTILES, stage_timer
+
+log = logging.getLogger(__name__)
+
+METRICS_HOST = os.environ.get("NSE_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("NSE_METRICS_PORT", "0"))  # 0: no exporter
+
+
+def _cache_families():
+    c = option_chain_cache
+    yield ("nse_snapshot_cache_requests_total", "counter",
+           "Snapshot cache lookups (coalesced = waited on another caller's load).",
+           [({"result": "hit"}, c.hits), ({"result": "stale"}, c.stale_hits), ({"result": "miss"}, c.misses),
+            ({"result": "coalesced"}, c.coalesced)])
+    now = time.time()
+    yield ("nse_snapshot_age_seconds", "gauge", "Age of the cached snapshot per symbol.",
+           [({"symbol": s.key}, now - s.fetched_at) for s in c.snapshots()])
+    yield ("render_cache_requests_total", "counter", "Rendered-table cache lookups.",
+           [({"result": "hit"}, render_cache.hits), ({"result": "miss"}, render_cache.misses)])
+
+
+def _stage_families():
+    samples = []
+    for stage, s in stage_timer.summary().items():
+        samples += [({"stage": stage, "quantile": str(q / 100)}, s[f"p{q}_ms"] / 1000) for q in PERCENTILES]
+        samples += [("_sum", {"stage": stage}, s["mean_ms"] * s["count"] / 1000),
+                    ("_count", {"stage": stage}, s["count"])]
+    yield ("oi_stage_seconds", "summary", "Hot-path stage durations (quantiles over the recent window).",
+           samples)
+
+
+def _session_families():
+    try:
+        from streamlit import runtime
+        sessions = runtime.get_instance()._session_mgr.num_active_sessions() if runtime.exists() else 0
+    except Exception:  # private API: report nothing rather than fail the scrape
+        return
+    yield ("streamlit_active_sessions", "gauge", "Connected Streamlit sessions.", [({}, sessions)])
+
+
+def _notify_families():
+    yield ("notification_queue_depth", "gauge", "Undelivered (queued, sending or retrying) notifications per transport.",
+           [({"transport": name}, n) for name, n in get_notifier().depths().items()])
+
+
+def collector_families(collector):
+    def collect():
+        yield ("nse_collector_up", "gauge", "1 while the background collector thread runs.",
+               [({}, int(collector.running))])
+        yield ("nse_collector_failing", "gauge", "1 for symbols whose last collector fetch failed.",
+               [({"symbol": s}, 1) for s in collector.errors])
+    return collect
+
+
+registry.add_collector(_cache_families)
+registry.add_collector(_stage_families)
+registry.add_collector(_session_families)
+registry.add_collector(_notify_families)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, fmt, *args):
+        log.debug("metrics: " + fmt, *args)
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server = None
+_server_tried = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST, collector=None):
+    """Serve ``/metrics`` once per process; returns the server, or None if disabled/unavailable."""
+    global _server, _server_tried
+    if not port:
+        return None
+    with _server_lock:
+        if not _server_tried:
+            _server_tried = True
+            try:
+                _server = ThreadingHTTPServer((host, port), _Handler)
+            except OSError as e:  # e.g. a second Streamlit process on the same box
+                log.warning("metrics: cannot listen on %s:%s: %s", host, port, e)
+                return None
+            _server.daemon_threads = True
+            if collector is not None:
+                registry.add_collector(collector_families(collector))
+            threading.Thread(target=_server.serve_forever, name="nse-metrics", daemon=True).start()
+            log.info("metrics: serving on http://%s:%s/metrics", host, _server.server_address[1])
+    return _server
@@ -0,0 +1,53 @@
+"""NSE option-chain fetch on top of the shared session pool."""
+import os
+
+from .cache import SnapshotCache
+from .decode import decode_option_chain
+from .parse import ChainIndex
+from .replay import get_replay
+from .session import get_pool
+from .timing import timed
+
+OPTION_CHAIN_PATH = "/api/option-chain-indices"
+
+SNAPSHOT_TTL = float(os.environ.get("NSE_SNAPSHOT_TTL", "15"))
+SNAPSHOT_STALE_TTL = float(os.environ.get("NSE_SNAPSHOT_STALE_TTL", "60"))
+
+
+def fetch_option_chain(symbol: str, timeout: float = 10):
+    replay = get_replay()
+    with timed("fetch", symbol=symbol):
+        if replay is not None:  # NSE_REPLAY_DIR: recorded payloads instead of NSE
+            content = replay.load(symbol)
+        else:
+            r = get_pool().get(OPTION_CHAIN_PATH, params={"symbol": symbol}, timeout=timeout)
+            r.raise_for_status()
+            content = r.content
+    with timed("decode", symbol=symbol):
+        return decode_option_chain(content)
+
+
+def parse_option_chain(raw, previous=None) -> ChainIndex:
+    """Snapshot parser of the shared cache: ``ChainIndex`` diffed against ``previous``."""
+    with timed("parse"):
+        return ChainIndex.from_payload(raw, previous)
+
+
+# One cache for the whole server process: N sessions -> 1 NSE request per TTL
+# and the payload is indexed by expiry once per snapshot, not once per rerun.
+option_chain_cache = SnapshotCache(fetch_option_chain, ttl=SNAPSHOT_TTL, stale_ttl=SNAPSHOT_STALE_TTL,
+                                   parser=parse_option_chain)
+
+
+def get_option_chain(symbol: str):
+    """Decoded option chain for ``symbol`` from the shared snapshot cache."""
+    return option_chain_cache.get(symbol)
+
+
+def get_chain(symbol: str) -> ChainIndex:
+    """Expiry-indexed parse of the shared snapshot for ``symbol``."""
+    return option_chain_cache.get_snapshot(symbol).parsed
+
+
+def invalidate_option_chain(symbol: str = None):
+    option_chain_cache.invalidate(symbol)
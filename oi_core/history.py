@@ -0,0 +1,116 @@
+"""Server-wide history of the max-OI strikes per (symbol, expiry).
+
+The collector records one row per published snapshot whose legs or spot
+actually changed, so every session reads the same history, a widget rerun
+does not add a point, and reloading a page does not reset it.  Each series
+is a fixed-capacity ``StrikeRing``; ``frame`` copies the retained rows under
+the ring's lock, so a chart never sees a row the collector is overwriting.
+Rings of expiries that left the chain are dropped.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .analytics import nearest_index
+from .parse import safe_float
+
+MAX_OI_FIELDS = ("Max_CE_OI", "Max_CE_%OI", "Max_PE_OI", "Max_PE_%OI")
+_SOURCE_COLUMNS = ("CE_OI", "CE_pchgOI", "PE_OI", "PE_pchgOI")
+HISTORY_SIZE = int(os.environ.get("NSE_MAX_OI_HISTORY", "20"))
+ATM_SPAN = 6  # the ATM ± 6 window of the option-chain tables
+
+
+class StrikeRing:
+    """Fixed-capacity ring of ``(epoch-ms, row)`` entries backed by numpy arrays.
+
+    Every row is written twice, at ``i`` and ``i + capacity``, so the newest
+    ``len(self)`` rows are always one contiguous slice and ``view`` need not
+    copy.  Views are live: a later ``append`` overwrites their oldest row.
+    """
+
+    def __init__(self, capacity=HISTORY_SIZE, width=len(MAX_OI_FIELDS)):
+        self.capacity = capacity
+        self._times = np.zeros(2 * capacity, dtype=np.int64)
+        self._rows = np.zeros((2 * capacity, width))
+        self._written = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._written, self.capacity)
+
+    def append(self, ms, row):
+        with self._lock:
+            i = self._written % self.capacity
+            self._times[i] = self._times[i + self.capacity] = ms
+            self._rows[i] = self._rows[i + self.capacity] = row
+            self._written += 1
+
+    def view(self, copy=False):
+        """(times, rows) of the retained entries, oldest first, as views (or copies taken under the lock)."""
+        with self._lock:
+            start = self._written % self.capacity if self._written > self.capacity else 0
+            end = start + len(self)
+            times, rows = self._times[start:end], self._rows[start:end]
+            return (times.copy(), rows.copy()) if copy else (times, rows)
+
+
+class MaxOiHistory:
+    """Rings of the ``MAX_OI_FIELDS`` strikes, keyed by (symbol, expiry, window).
+
+    ``window=None`` takes the maxima over every strike of the expiry,
+    ``window=k`` over the ATM ± k strikes.
+    """
+
+    def __init__(self, capacity=HISTORY_SIZE, windows=(None, ATM_SPAN)):
+        self.capacity = capacity
+        self.windows = tuple(windows)
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def ring(self, symbol, expiry, window=None):
+        key = (symbol, expiry, window)
+        ring = self._rings.get(key)
+        if ring is None:
+            with self._lock:
+                ring = self._rings.setdefault(key, StrikeRing(self.capacity))
+        return ring
+
+    def record(self, symbol, chain, fetched_at=None):
+        """Append the max-OI strikes of every expiry of a ``ChainIndex``."""
+        ms = int((fetched_at or time.time()) * 1000)
+        spot = safe_float(chain.underlying_value)
+        for expiry in chain.expiry_dates:
+            arrays = chain.arrays(expiry)
+            if arrays is None or not len(arrays["strikePrice"]):
+                continue
+            strikes = arrays["strikePrice"]
+            atm = nearest_index(strikes, spot)
+            for window in self.windows:
+                lo, hi = (0, len(strikes)) if window is None else (max(0, atm - window), atm + window + 1)
+                row = [strikes[lo + int(np.argmax(arrays[c][lo:hi]))] for c in _SOURCE_COLUMNS]
+                self.ring(symbol, expiry, window).append(ms, row)
+        with self._lock:
+            for key in [k for k in self._rings if k[0] == symbol and k[1] not in chain.expiry_dates]:
+                del self._rings[key]  # expired
+
+    def on_snapshot(self, snapshot):
+        """Collector subscriber; republished, unchanged snapshots are skipped."""
+        chain = snapshot.parsed
+        if chain is not None and chain.changes:
+            self.record(snapshot.key, chain, snapshot.fetched_at)
+
+    def attach(self, collector):
+        collector.subscribe(self.on_snapshot)
+        return self
+
+    def frame(self, symbol, expiry, window=None) -> pd.DataFrame:
+        """History as a frame indexed by IST ``HH:MM:SS``, ready to chart (a copy, safe to keep)."""
+        times, rows = self.ring(symbol, expiry, window).view(copy=True)
+        index = pd.to_datetime(times, unit="ms", utc=True).tz_convert("Asia/Kolkata").strftime("%H:%M:%S")
+        return pd.DataFrame(rows, index=pd.Index(index, name="time"), columns=list(MAX_OI_FIELDS))
+
+
+max_oi_history = MaxOiHistory()
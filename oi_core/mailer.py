@@ -0,0 +1,80 @@
+"""SMTP plumbing for alert emails: message composition and a kept-open connection.
+
+Pages used to open ``SMTP_SSL``, log in and send inside the script on every
+CE_PE_Diff flip, blocking the rerun for the whole TLS handshake and login.
+Alert emails are now delivered by ``SmtpTransport`` on the notifier's event
+loop (see :mod:`oi_core.notify`) over one ``SmtpConnection`` per recipient,
+kept open between alerts and closed after ``NSE_SMTP_IDLE`` idle seconds
+(the next alert reconnects).  Up to ``NSE_SMTP_BATCH`` queued messages are
+sent back to back over that connection in one worker pass.  If the server
+dropped the connection (its own idle timeout), the send is retried once on
+a fresh one.
+"""
+import os
+import smtplib
+import ssl
+import time
+from email.mime.text import MIMEText
+
+SMTP_HOST = os.environ.get("NSE_SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("NSE_SMTP_PORT", "465"))
+SMTP_TIMEOUT = 20
+IDLE_TIMEOUT = float(os.environ.get("NSE_SMTP_IDLE", "120"))
+BATCH_SIZE = int(os.environ.get("NSE_SMTP_BATCH", "20"))
+
+
+def compose(subject, body, sender, recipient):
+    """Plain-text alert message."""
+    msg = MIMEText(body, "plain")
+    msg["From"] = sender
+    msg["To"] = recipient
+    msg["Subject"] = subject
+    return msg
+
+
+class SmtpConnection:
+    """One logged-in SMTP-over-SSL connection, opened on demand."""
+
+    def __init__(self, user, password, host=SMTP_HOST, port=SMTP_PORT, timeout=SMTP_TIMEOUT):
+        self.user = user
+        self.password = password
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._smtp = None
+        self.last_used = 0.0
+        self.logins = 0
+
+    @property
+    def connected(self):
+        return self._smtp is not None
+
+    def open(self):
+        if self._smtp is None:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout,
+                                    context=ssl.create_default_context())
+            try:
+                smtp.login(self.user, self.password)
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self.logins += 1
+        return self._smtp
+
+    def send(self, msg):
+        """Send ``msg``, re-opening the connection once if the server dropped it."""
+        try:
+            self.open().send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError, ssl.SSLError):
+            self.close()
+            self.open().send_message(msg)
+        self.last_used = time.monotonic()
+
+    def close(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except Exception:  # already gone
+                smtp.close()
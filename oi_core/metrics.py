@@ -0,0 +1,184 @@
+"""Minimal Prometheus-style metrics (counters, gauges, histograms) and text exposition.
+
+The hot-path modules update the module-level metrics below directly; values
+that already live elsewhere (cache counters, snapshot ages, stage timings)
+are read at scrape time by collectors registered on the ``registry`` (see
+:mod:`oi_core.exporter`).  No ``prometheus_client`` dependency: the
+exposition format is a few lines of text.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[0][i] += 1
+                    break
+            counts[1] += value
+            counts[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        lines = self.header()
+        names = self.labelnames + ("le",)
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_labels(names, key + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """``collect()`` -> iterable of ``(name, kind, help, samples)`` at scrape time.
+
+        Samples are ``(labels dict, value)``, or ``(suffix, labels dict, value)``
+        for the ``_sum`` / ``_count`` lines of a summary.
+        """
+        with self._lock:
+            self._collectors.append(collect)
+        return collect
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        for collect in collectors:
+            for name, kind, help, samples in collect():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                for sample in samples:
+                    suffix, labels, value = sample if len(sample) == 3 else ("", *sample)
+                    lines.append(f"{name}{suffix}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+nse_requests = registry.counter(
+    "nse_requests_total", "Option-chain API requests to NSE by HTTP status ('error' = no response).", ("status",))
+nse_request_seconds = registry.histogram(
+    "nse_request_seconds", "Latency of option-chain API requests to NSE, including a cookie re-warm.")
+cookie_refreshes = registry.counter("nse_cookie_refreshes_total", "Homepage visits to (re)load NSE cookies.")
+collector_snapshots = registry.counter(
+    "nse_collector_snapshots_total", "Snapshots published by the background collector.", ("symbol",))
+alerts_raised = registry.counter("alerts_total", "Alerts raised by the alert engine by kind (flip / rocket / rule).",
+                                 ("kind",))
+alerts_suppressed = registry.counter(
+    "alerts_suppressed_total", "Alert changes held back by the dwell time or cooldown.", ("reason",))
+notifications = registry.counter(
+    "notifications_total", "Alert notifications by transport and outcome (sent / retried / failed / dropped).",
+    ("transport", "result"))
+notification_seconds = registry.histogram(
+    "notification_seconds", "Time for a transport to deliver one notification (per attempt).", ("transport",))
@@ -0,0 +1,291 @@
+"""Local stand-in for the NSE option-chain endpoint.
+
+Mimics what the fetch layer has to cope with on the real site: a cookie
+handshake on ``/``, 401 for API calls without (or with expired) cookies,
+response latency with jitter, 429 rate limiting per client and truncated
+JSON bodies.  Payloads come from a ``SyntheticMarket`` (a random walk, so
+every response differs) or from recorded payloads (``--replay``, see
+:mod:`oi_core.replay`).  Point the app at it with ``NSE_BASE_URL``::
+
+    python -m oi_core.mock_nse --port 8765 --latency 0.2 --jitter 0.1 --rate 5 --truncate 0.02
+    NSE_BASE_URL=http://127.0.0.1:8765 streamlit run pages13_Option.py
+
+Not imported by the package; it is a development tool.
+"""
+import argparse
+import json
+import logging
+import random
+import secrets
+import threading
+import time
+from datetime import date, timedelta
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from .fetch import OPTION_CHAIN_PATH
+
+log = logging.getLogger(__name__)
+
+# symbol -> (starting spot, strike step)
+MARKETS = {
+    "NIFTY": (24000.0, 50),
+    "BANKNIFTY": (52000.0, 100),
+    "FINNIFTY": (23500.0, 50),
+    "MIDCPNIFTY": (12500.0, 25),
+}
+
+
+def weekly_expiries(n, today=None):
+    """The next ``n`` Thursdays in NSE's ``30-Oct-2026`` format."""
+    day = today or date.today()
+    day += timedelta(days=(3 - day.weekday()) % 7)
+    return [(day + timedelta(weeks=i)).strftime("%d-%b-%Y") for i in range(n)]
+
+
+class SyntheticMarket:
+    """Random-walk option chains; each ``load`` advances the symbol by one tick."""
+
+    def __init__(self, strikes_per_side=40, expiries=4, seed=None, today=None):
+        self.strikes_per_side = strikes_per_side
+        self.expiry_dates = weekly_expiries(expiries, today)
+        self._rng = np.random.default_rng(seed)
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def _init(self, symbol):
+        spot, step = MARKETS.get(symbol, (10000.0, 50))
+        n = 2 * self.strikes_per_side + 1
+        strikes = spot - self.strikes_per_side * step + step * np.arange(n, dtype=float)
+        shape = (len(self.expiry_dates), n)
+        oi = self._rng.integers(1_000, 200_000, size=(2,) + shape).astype(float)
+        return {"spot": spot, "strikes": strikes, "oi": oi, "open_oi": oi.copy()}
+
+    def _tick(self, s):
+        s["spot"] = round(s["spot"] * (1 + self._rng.normal(0, 0.0005)), 2)
+        s["oi"] = np.maximum(0, s["oi"] + self._rng.normal(0, 500, size=s["oi"].shape).round())
+
+    def payload(self, symbol):
+        with self._lock:
+            s = self._state.get(symbol)
+            if s is None:
+                s = self._state[symbol] = self._init(symbol)
+            self._tick(s)
+            spot, strikes, oi, open_oi = s["spot"], s["strikes"], s["oi"].copy(), s["open_oi"]
+            noise = self._rng.uniform(0, 1, size=oi.shape)
+        data = []
+        for e, expiry in enumerate(self.expiry_dates):
+            time_value = 40 * (e + 1) ** 0.5 * np.exp(-np.abs(strikes - spot) / (spot * 0.02))
+            for i, k in enumerate(strikes.tolist()):
+                row = {"strikePrice": k, "expiryDate": expiry}
+                for side, iv in (("CE", max(spot - k, 0)), ("PE", max(k - spot, 0))):
+                    j = 0 if side == "CE" else 1
+                    chg = oi[j, e, i] - open_oi[j, e, i]
+                    row[side] = {
+                        "strikePrice": k, "expiryDate": expiry, "underlying": symbol,
+                        "identifier": f"OPTIDX{symbol}{expiry}{side}{k:g}",
+                        "openInterest": oi[j, e, i], "changeinOpenInterest": chg,
+                        "pchangeinOpenInterest": 100 * chg / open_oi[j, e, i] if open_oi[j, e, i] else 0,
+                        "totalTradedVolume": int(noise[j, e, i] * 1e6), "impliedVolatility": 10 + 10 * noise[j, e, i],
+                        "lastPrice": round(iv + time_value[i] * (0.9 + 0.2 * noise[j, e, i]), 2),
+                        "change": 0, "pChange": 0, "totalBuyQuantity": 0, "totalSellQuantity": 0,
+                        "bidQty": 0, "bidprice": 0, "askQty": 0, "askPrice": 0, "underlyingValue": spot,
+                    }
+                data.append(row)
+        return {
+            "records": {"expiryDates": self.expiry_dates, "data": data, "underlyingValue": spot,
+                        "timestamp": time.strftime("%d-%b-%Y %H:%M:%S"), "strikePrices": strikes.tolist()},
+            "filtered": {"data": [r for r in data if r["expiryDate"] == self.expiry_dates[0]]},
+        }
+
+    def load(self, symbol) -> bytes:
+        return json.dumps(self.payload(symbol)).encode()
+
+
+class MockNSEServer:
+    """Threaded HTTP server with NSE-like cookies, latency, rate limits and truncation.
+
+    ``source.load(symbol) -> bytes`` provides the payloads (a ``SyntheticMarket``
+    or a ``replay.ReplaySource``).  ``rate`` is requests per second per client
+    (cookie, or address before the handshake) with bursts up to ``burst``;
+    ``rate=0`` disables limiting.  ``truncate`` is the probability of cutting
+    a payload short.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, source=None, latency=0.0, jitter=0.0, rate=0.0,
+                 burst=10, truncate=0.0, cookie_ttl=300, seed=None):
+        self.source = source if source is not None else SyntheticMarket(seed=seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.burst = burst
+        self.truncate = truncate
+        self.cookie_ttl = cookie_ttl
+        self._rng = random.Random(seed)
+        self._tokens = {}   # cookie value -> expiry (time.time())
+        self._buckets = {}  # client -> [tokens, last refill]
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "handshakes": 0, "ok": 0, "unauthorized": 0, "rate_limited": 0,
+                      "truncated": 0, "not_found": 0}
+        self.httpd = _Server((host, port), _Handler)
+        self.httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def delay(self):
+        with self._lock:
+            d = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+        if d > 0:
+            time.sleep(d)
+
+    def issue_cookie(self):
+        token = secrets.token_hex(16)
+        with self._lock:
+            self._tokens[token] = time.time() + self.cookie_ttl
+        return token
+
+    def authorised(self, cookie_header):
+        morsel = SimpleCookie(cookie_header or "").get("nsit")
+        if morsel is None:
+            return None
+        with self._lock:
+            expires = self._tokens.get(morsel.value)
+        return morsel.value if expires is not None and expires > time.time() else None
+
+    def allow(self, client):
+        """Token bucket per client."""
+        if not self.rate:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            ok = tokens >= 1
+            self._buckets[client] = (tokens - 1 if ok else tokens, now)
+        return ok
+
+    def cut(self, body):
+        """``body``, or a random prefix of it with probability ``truncate``."""
+        with self._lock:
+            if not self.truncate or self._rng.random() >= self.truncate:
+                return body
+            n = self._rng.randrange(len(body)) if body else 0
+        self.count("truncated")
+        return body[:n]
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-nse", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients dropping keep-alive connections are routine, not errors
+        log.debug("mock nse: connection from %s ended with an error", client_address, exc_info=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse shows up in benchmarks
+
+    def log_message(self, fmt, *args):
+        log.debug("mock nse: " + fmt, *args)
+
+    def _send(self, status, body=b"", content_type="application/json", headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        mock = self.server.mock
+        mock.count("requests")
+        mock.delay()
+        url = urlsplit(self.path)
+        if url.path in ("", "/"):
+            token = mock.issue_cookie()
+            mock.count("handshakes")
+            cookies = [f"{name}={token}; Path=/; Max-Age={int(mock.cookie_ttl)}" for name in ("nsit", "nseappid")]
+            return self._send(200, b"<html>NSE</html>", "text/html", [("Set-Cookie", c) for c in cookies])
+        if url.path != OPTION_CHAIN_PATH:
+            mock.count("not_found")
+            return self._send(404, b'{"error":"not found"}')
+        token = mock.authorised(self.headers.get("Cookie"))
+        if token is None:
+            mock.count("unauthorized")
+            return self._send(401, b"{}")
+        if not mock.allow(token):
+            mock.count("rate_limited")
+            return self._send(429, b'{"error":"too many requests"}', headers=[("Retry-After", "1")])
+        symbol = parse_qs(url.query).get("symbol", ["NIFTY"])[0]
+        try:
+            body = mock.source.load(symbol)
+        except KeyError:
+            body = b"{}"  # NSE answers unknown symbols with an empty object
+        mock.count("ok")
+        self._send(200, mock.cut(body))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m oi_core.mock_nse", description=__doc__.split("\n\n")[0])
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    p.add_argument("--jitter", type=float, default=0.0, help="+/- uniform seconds on top of --latency")
+    p.add_argument("--rate", type=float, default=0.0, help="API requests/s per client (0 = unlimited)")
+    p.add_argument("--burst", type=int, default=10)
+    p.add_argument("--truncate", type=float, default=0.0, help="probability of a truncated payload")
+    p.add_argument("--cookie-ttl", type=float, default=300)
+    p.add_argument("--strikes", type=int, default=40, help="synthetic strikes either side of spot")
+    p.add_argument("--expiries", type=int, default=4)
+    p.add_argument("--replay", metavar="DIR", help="serve recorded payloads instead of synthetic ones")
+    p.add_argument("--speed", default="1", help="replay time warp (number or 'max')")
+    p.add_argument("--seed", type=int)
+    args = p.parse_args(argv)
+    if args.replay:
+        from .replay import ReplaySource
+        source = ReplaySource(args.replay, speed=args.speed)
+    else:
+        source = SyntheticMarket(args.strikes, args.expiries, seed=args.seed)
+    server = MockNSEServer(args.host, args.port, source, args.latency, args.jitter, args.rate, args.burst,
+                           args.truncate, args.cookie_ttl, args.seed)
+    print(f"mock NSE on {server.url}  (NSE_BASE_URL={server.url})", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+"""Alert delivery over pluggable transports behind one async interface.
+
+A transport implements one coroutine, ``send(notification)``, and may
+override ``send_batch(notifications)`` to deliver several queued ones in one
+go (``batch_size`` > 1):
+
+* ``SmtpTransport``    - the alert email, over a kept-open SMTP connection;
+  batches of up to ``NSE_SMTP_BATCH`` go out back to back in one thread hop
+* ``WebhookTransport`` - JSON POST (``text`` field for Slack-style hooks)
+* ``SocketTransport``  - JSON lines to a TCP listener
+* ``SinkTransport``    - local sink: keeps notifications in memory and
+  optionally appends them as JSON lines to a file; ``latency`` and
+  ``fail_rate`` simulate a slow or flaky channel for tests and benchmarks
+
+The ``Notifier`` runs all transports on one event loop in a daemon thread,
+each behind its own bounded queue and worker task(s).  ``submit`` never
+blocks and returns a ``Future``.  A failed send is put on that transport's
+retry queue and re-sent after an exponential backoff (``NSE_NOTIFY_BACKOFF``
+doubling, up to ``NSE_NOTIFY_RETRIES`` times) without holding up the
+notifications behind it, so a slow or failing channel only delays itself.
+Outcomes and send latency per transport go to the ``notifications`` /
+``notification_seconds`` metrics.
+
+Delivery throughput can be measured offline against sink transports with
+``python -m oi_core.bench --notify 5000`` (see :mod:`oi_core.bench`).
+"""
+import abc
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field, is_dataclass
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # optional dependency
+    httpx = None
+
+from .mailer import BATCH_SIZE, IDLE_TIMEOUT, SMTP_HOST, SMTP_PORT, SmtpConnection, compose
+from .metrics import notification_seconds, notifications
+
+log = logging.getLogger(__name__)
+
+NOTIFY_RETRIES = int(os.environ.get("NSE_NOTIFY_RETRIES", "3"))
+NOTIFY_BACKOFF = float(os.environ.get("NSE_NOTIFY_BACKOFF", "2"))  # seconds before the first retry
+QUEUE_SIZE = 256
+WEBHOOK_TIMEOUT = 10
+
+
+@dataclass(frozen=True)
+class Notification:
+    subject: str
+    body: str
+    alerts: tuple = ()  # the alerts behind it (one, or a digest)
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self):
+        return {"subject": self.subject, "body": self.body, "created_at": self.created_at,
+                "alerts": [asdict(a) if is_dataclass(a) else a for a in self.alerts]}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, default=str)
+
+
+class Transport(abc.ABC):
+    """Base class: ``await send(notification)`` delivers one notification or raises."""
+
+    name = "transport"
+    concurrency = 1      # sends in flight at once
+    batch_size = 1       # queued notifications a worker hands to one ``send_batch``
+    idle_timeout = None  # quiet seconds before ``idle()`` releases connections
+
+    @abc.abstractmethod
+    async def send(self, notification):
+        """Deliver ``notification``; raising marks the attempt as failed (and retried)."""
+
+    async def send_batch(self, notifications):
+        """Deliver several notifications -> one result per item: None, or the exception it failed with."""
+        results = []
+        for notification in notifications:
+            try:
+                await self.send(notification)
+            except Exception as e:
+                results.append(e)
+            else:
+                results.append(None)
+        return results
+
+    async def idle(self):
+        pass
+
+
+class SmtpTransport(Transport):
+    name = "smtp"
+
+    def __init__(self, user, password, recipient, sender=None, host=SMTP_HOST, port=SMTP_PORT,
+                 idle_timeout=IDLE_TIMEOUT, batch_size=BATCH_SIZE):
+        self.connection = SmtpConnection(user, password, host, port)
+        self.recipient = recipient
+        self.sender = sender or user
+        self.idle_timeout = idle_timeout
+        self.batch_size = max(1, batch_size)
+
+    def _compose(self, notification):
+        return compose(notification.subject, notification.body, self.sender, self.recipient)
+
+    async def send(self, notification):
+        await asyncio.to_thread(self.connection.send, self._compose(notification))
+
+    async def send_batch(self, notifications):
+        return await asyncio.to_thread(self._send_all, [self._compose(n) for n in notifications])
+
+    def _send_all(self, messages):
+        results = []
+        for msg in messages:
+            try:
+                self.connection.send(msg)
+            except Exception as e:
+                results.append(e)
+            else:
+                results.append(None)
+        return results
+
+    async def idle(self):
+        if self.connection.connected:
+            await asyncio.to_thread(self.connection.close)
+
+
+class WebhookTransport(Transport):
+    """POST the notification as JSON; uses ``httpx`` when installed, else ``requests`` on a thread."""
+
+    name = "webhook"
+
+    def __init__(self, url, headers=None, timeout=WEBHOOK_TIMEOUT, concurrency=2, idle_timeout=60):
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.idle_timeout = idle_timeout
+        self._client = None
+
+    async def send(self, notification):
+        payload = notification.to_dict()
+        payload["text"] = f"{notification.subject}\n\n{notification.body}"
+        if httpx is None:
+            r = await asyncio.to_thread(requests.post, self.url, json=payload, headers=self.headers,
+                                        timeout=self.timeout)
+        else:
+            if self._client is None:
+                self._client = httpx.AsyncClient(headers=self.headers, timeout=self.timeout)
+            r = await self._client.post(self.url, json=payload)
+        r.raise_for_status()
+
+    async def idle(self):
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+class SocketTransport(Transport):
+    """JSON lines over a TCP connection, opened on demand and kept until idle or broken."""
+
+    name = "socket"
+
+    def __init__(self, host, port, idle_timeout=60):
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self._writer = None
+
+    async def send(self, notification):
+        if self._writer is None or self._writer.is_closing():
+            _, self._writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            self._writer.write(notification.to_json().encode() + b"\n")
+            await self._writer.drain()
+        except (ConnectionError, OSError):
+            await self.idle()
+            raise
+
+    async def idle(self):
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+
+class SinkTransport(Transport):
+    """Local sink: the last ``keep`` notifications in ``received``, plus JSON lines in ``path`` if given."""
+
+    def __init__(self, path=None, latency=0.0, fail_rate=0.0, keep=1000, name="sink", seed=None):
+        self.path = path
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.name = name
+        self.received = deque(maxlen=keep)
+        self.delivered = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+
+    async def send(self, notification):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_rate and self._random.random() < self.fail_rate:
+            self.failures += 1
+            raise ConnectionError(f"{self.name}: injected failure")
+        if self.path:
+            await asyncio.to_thread(self._append, notification.to_json())
+        self.received.append(notification)
+        self.delivered += 1
+
+    def _append(self, line):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class _Lane:
+    """One transport's queue and workers; ``pending`` counts notifications not yet resolved."""
+
+    def __init__(self, transport, queue_size):
+        self.transport = transport
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.workers = []
+        self.pending = 0  # queued, sending or waiting for a retry
+
+
+class Notifier:
+    def __init__(self, retries=NOTIFY_RETRIES, backoff=NOTIFY_BACKOFF, queue_size=QUEUE_SIZE):
+        self.retries = retries
+        self.backoff = backoff
+        self.queue_size = queue_size
+        self._lanes = {}  # transport -> _Lane, touched on the loop thread only
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # -- producer side (any thread) -------------------------------------------
+
+    def submit(self, transport, notification) -> Future:
+        """Queue ``notification`` on ``transport``; never blocks.
+
+        The returned future resolves to None once delivered, or to the last
+        exception once the retries are used up (``asyncio.QueueFull`` when the
+        transport's queue was full).
+        """
+        future = Future()
+        self.start()
+        try:
+            self._loop.call_soon_threadsafe(self._enqueue, transport, notification, future, 0)
+        except RuntimeError as e:  # stopped meanwhile
+            future.set_exception(e)
+        return future
+
+    def depths(self):
+        """Undelivered (queued, sending or retrying) notifications per transport name."""
+        out = {}
+        for lane in list(self._lanes.values()):
+            out[lane.transport.name] = out.get(lane.transport.name, 0) + lane.pending
+        return out
+
+    # -- event loop side -------------------------------------------------------
+
+    def _lane(self, transport):
+        lane = self._lanes.get(transport)
+        if lane is None:
+            lane = self._lanes[transport] = _Lane(transport, self.queue_size)
+            lane.workers = [self._loop.create_task(self._work(lane)) for _ in range(max(1, transport.concurrency))]
+        return lane
+
+    def _enqueue(self, transport, notification, future, attempt):
+        lane = self._lane(transport)
+        try:
+            lane.queue.put_nowait((notification, future, attempt))
+        except asyncio.QueueFull as e:
+            notifications.inc(transport=transport.name, result="dropped")
+            log.warning("notify: %s queue full, dropped %r", transport.name, notification.subject)
+            lane.pending -= attempt > 0
+            if not future.done():
+                future.set_exception(e)
+        else:
+            lane.pending += attempt == 0
+
+    async def _work(self, lane):
+        transport = lane.transport
+        while True:
+            try:
+                item = await asyncio.wait_for(lane.queue.get(), transport.idle_timeout)
+            except asyncio.TimeoutError:
+                try:
+                    await transport.idle()
+                except Exception as e:
+                    log.debug("notify: %s idle close failed: %s", transport.name, e)
+                continue
+            batch = [item]
+            while len(batch) < transport.batch_size and not lane.queue.empty():
+                batch.append(lane.queue.get_nowait())
+            batch = [item for item in batch if self._claim(lane, *item)]
+            if len(batch) == 1:
+                await self._deliver(lane, *batch[0])
+            elif batch:
+                await self._deliver_batch(lane, batch)
+
+    @staticmethod
+    def _claim(lane, notification, future, attempt):
+        """False (and no longer pending) if the caller cancelled ``future`` before its first send."""
+        if attempt == 0 and not future.set_running_or_notify_cancel():
+            lane.pending -= 1
+            return False
+        return True
+
+    async def _deliver(self, lane, notification, future, attempt):
+        try:
+            with notification_seconds.time(transport=lane.transport.name):
+                await lane.transport.send(notification)
+        except Exception as e:
+            self._resolve(lane, notification, future, attempt, e)
+        else:
+            self._resolve(lane, notification, future, attempt, None)
+
+    async def _deliver_batch(self, lane, batch):
+        transport = lane.transport
+        t0 = time.perf_counter()
+        try:
+            results = await transport.send_batch([notification for notification, _, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        per_item = (time.perf_counter() - t0) / len(batch)
+        for (notification, future, attempt), error in zip(batch, results):
+            notification_seconds.observe(per_item, transport=transport.name)
+            self._resolve(lane, notification, future, attempt, error)
+
+    def _resolve(self, lane, notification, future, attempt, error):
+        transport = lane.transport
+        if error is None:
+            notifications.inc(transport=transport.name, result="sent")
+            future.set_result(None)
+        elif attempt < self.retries:
+            notifications.inc(transport=transport.name, result="retried")
+            self._loop.call_later(self.backoff * 2 ** attempt, self._enqueue, transport, notification, future,
+                                  attempt + 1)
+            return
+        else:
+            notifications.inc(transport=transport.name, result="failed")
+            log.warning("notify: %s could not deliver %r: %s", transport.name, notification.subject, error)
+            future.set_exception(error)
+        lane.pending -= 1
+
+    async def _drain(self):
+        while any(lane.pending for lane in self._lanes.values()):
+            await asyncio.sleep(0.01)
+
+    async def _shutdown(self):
+        await self._drain()
+        for lane in self._lanes.values():
+            for task in lane.workers:
+                task.cancel()
+            await asyncio.gather(*lane.workers, return_exceptions=True)
+            try:
+                await lane.transport.idle()
+            except Exception as e:
+                log.debug("notify: %s close failed: %s", lane.transport.name, e)
+        self._lanes.clear()
+
+    # -- lifecycle -------------------------------------------------------------
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            with self._lock:
+                if not self.running:
+                    self._loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=self._loop.run_forever, name="notifier", daemon=True)
+                    self._thread.start()
+        return self
+
+    def drain(self, timeout=None):
+        """Block until every queued notification is delivered or has failed for good."""
+        if self.running:
+            asyncio.run_coroutine_threadsafe(self._drain(), self._loop).result(timeout)
+
+    def stop(self, timeout=None):
+        """Deliver whatever is queued, close the transports and stop the loop."""
+        if not self.running:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier():
+    """Process-wide notifier (its event loop starts on the first submit)."""
+    global _notifier
+    if _notifier is None:
+        with _notifier_lock:
+            if _notifier is None:
+                _notifier = Notifier()
+    return _notifier
@@ -0,0 +1,307 @@
+"""Parsing of the raw NSE ``option-chain-indices`` payload."""
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .analytics import OiLadder
+from .diff import ChangeSet, diff_snapshots
+from .timing import timed
+
+# Display names used by the pages for the %-change-in-OI columns
+PCT_COLUMNS = {"CE_pchgOI": "CE_%OI", "PE_pchgOI": "PE_%OI"}
+
+# Risk formulas used across the pages:
+#   "premium": CE_Risk = CE_LTP - CE_IV ; PE_Risk = PE_LTP - PE_IV
+#   "cross":   CE_Risk = CE_IV - PE_LTP ; PE_Risk = PE_IV - CE_LTP
+RISK_MODES = ("premium", "cross")
+
+
+def safe_int(x):
+    try:
+        return int(round(float(x)))
+    except Exception:
+        return 0
+
+
+def safe_float(x, ndigits=1):
+    try:
+        return round(float(x), ndigits)
+    except Exception:
+        return 0.0
+
+
+@dataclass
+class ChainData:
+    expiry_dates: list = field(default_factory=list)
+    data_list: list = field(default_factory=list)
+    underlying_value: object = None
+
+    @property
+    def spot_price(self):
+        return float(self.underlying_value) if self.underlying_value is not None else 0.0
+
+
+def find_underlying_value(raw, data_list):
+    records = raw.get("records") or {}
+    underlying_value = records.get("underlyingValue") or raw.get("underlyingValue") or None
+    if underlying_value is None:
+        # fall back to the first CE/PE leg that carries it
+        for d in data_list:
+            for side in ("CE", "PE"):
+                s = d.get(side)
+                if s and s.get("underlyingValue") is not None:
+                    return s.get("underlyingValue")
+    return underlying_value
+
+
+def extract_chain(raw) -> ChainData:
+    """Pull expiry list, strike records and spot out of a raw payload."""
+    records = raw.get("records") or {}
+    expiry_dates = records.get("expiryDates") or []
+    data_list = records.get("data") or raw.get("filtered", {}).get("data") or raw.get("data") or []
+    if not expiry_dates and data_list:
+        expiry_dates = sorted({d.get("expiryDate") for d in data_list if d.get("expiryDate")})
+    return ChainData(expiry_dates, data_list, find_underlying_value(raw, data_list))
+
+
+def rows_for_expiry(data_list, expiry):
+    return [r for r in data_list if r.get("expiryDate") == expiry]
+
+
+CHAIN_COLUMNS = ["strikePrice", "CE_OI", "CE_pchgOI", "CE_LTP", "CE_Risk", "PE_LTP",
+                 "PE_pchgOI", "PE_OI", "PE_Risk", "CE_PE_Diff"]
+
+_NO_LEG = {}
+
+
+def _floats(values):
+    try:
+        arr = np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        # None / strings somewhere in the column: coerce them to NaN
+        arr = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float, copy=True)
+    arr[~np.isfinite(arr)] = 0.0
+    return arr
+
+
+def _numeric(values, ndigits=None):
+    """Vectorized ``safe_int`` / ``safe_float``: bad or missing values become 0."""
+    return _round(_floats(values), ndigits)
+
+
+def _round(arr, ndigits=None):
+    if ndigits is None:
+        return np.rint(arr).astype(np.int64)
+    scale = 10.0 ** ndigits
+    scaled = arr * scale
+    out = np.rint(scaled) / scale
+    # x.x5-style ties after scaling: defer to round() so results match safe_float
+    for i in np.flatnonzero(np.abs(scaled - np.trunc(scaled)) == 0.5):
+        out[i] = round(float(arr[i]), ndigits)
+    return out
+
+
+def build_chain_df(rows, spot_price, risk="premium", ndigits=None):
+    """One row per strike (deduplicated, ascending) with OI, LTP and risk columns.
+
+    ``ndigits=None`` rounds every value to an int (the default look of the
+    pages); pass e.g. ``ndigits=1`` to keep one decimal instead.  Fields are
+    pulled into columns in a single pass and coerced/derived as array ops.
+    """
+    if risk not in RISK_MODES:
+        raise ValueError(f"unknown risk mode: {risk!r}")
+    if not rows:
+        return pd.DataFrame(columns=CHAIN_COLUMNS)
+    return chain_df_from_columns(row_columns(rows), spot_price, risk, ndigits)
+
+
+def chain_df_from_columns(cols, spot_price, risk="premium", ndigits=None):
+    """Second half of ``build_chain_df``: dedupe and sort ``row_columns`` output, derive the risk columns."""
+    strike = _numeric(cols["strikePrice"], ndigits)
+    # first occurrence of each strike, already in ascending strike order
+    strike, keep = np.unique(strike, return_index=True)
+    out = {"strikePrice": strike}
+    out.update((name, _numeric(values, ndigits)[keep]) for name, values in cols.items() if name != "strikePrice")
+    out["CE_Risk"], out["PE_Risk"], out["CE_PE_Diff"] = _risk_columns(
+        strike, out["CE_LTP"], out["PE_LTP"], spot_price, risk, ndigits)
+    return pd.DataFrame(out, columns=CHAIN_COLUMNS)
+
+
+def row_columns(rows):
+    """Raw per-row field lists, pulled out of the row dicts in one pass (first half of ``build_chain_df``)."""
+    strike, ce_oi, ce_pchg, ce_ltp, pe_oi, pe_pchg, pe_ltp = ([] for _ in range(7))
+    for r in rows:
+        ce = r.get("CE") or _NO_LEG
+        pe = r.get("PE") or _NO_LEG
+        strike.append(r.get("strikePrice", 0))
+        ce_oi.append(ce.get("openInterest", 0))
+        ce_pchg.append(ce.get("pchangeinOpenInterest", 0))
+        ce_ltp.append(ce.get("lastPrice", 0))
+        pe_oi.append(pe.get("openInterest", 0))
+        pe_pchg.append(pe.get("pchangeinOpenInterest", 0))
+        pe_ltp.append(pe.get("lastPrice", 0))
+    return {"strikePrice": strike, "CE_OI": ce_oi, "CE_pchgOI": ce_pchg, "CE_LTP": ce_ltp,
+            "PE_LTP": pe_ltp, "PE_pchgOI": pe_pchg, "PE_OI": pe_oi}
+
+
+def _risk_columns(strike, ce_ltp, pe_ltp, spot_price, risk, ndigits):
+    # intrinsic values (IV)
+    ce_iv = np.maximum(spot_price - strike, 0)
+    pe_iv = np.maximum(strike - spot_price, 0)
+    if risk == "premium":
+        ce_risk = _round(ce_ltp - ce_iv, ndigits)
+        pe_risk = _round(pe_ltp - pe_iv, ndigits)
+    else:
+        ce_risk = _round(ce_iv - pe_ltp, ndigits)
+        pe_risk = _round(pe_iv - ce_ltp, ndigits)
+    return ce_risk, pe_risk, _round(ce_risk - pe_risk, ndigits)
+
+
+def risk_columns(arrays, spot_price, risk="premium", ndigits=None):
+    """CE_Risk / PE_Risk / CE_PE_Diff of ``leg_arrays`` output, as the frames compute them."""
+    strike, ce_ltp, pe_ltp = (_round(arrays[name], ndigits) for name in ("strikePrice", "CE_LTP", "PE_LTP"))
+    return dict(zip(("CE_Risk", "PE_Risk", "CE_PE_Diff"),
+                    _risk_columns(strike, ce_ltp, pe_ltp, spot_price, risk, ndigits)))
+
+
+def leg_arrays(rows):
+    """Unrounded float columns, first row per strike in ascending strike order.
+
+    One extraction pass per expiry and snapshot; the frames (any risk mode
+    or rounding) are derived from these arrays, and consecutive snapshots are
+    diffed on them.
+    """
+    cols = row_columns(rows)
+    strike, keep = np.unique(_floats(cols.pop("strikePrice")), return_index=True)
+    out = {"strikePrice": strike}
+    out.update((name, _floats(values)[keep]) for name, values in cols.items())
+    return out
+
+
+def _frame_from_arrays(arrays, spot_price, risk, ndigits):
+    strike = _round(arrays["strikePrice"], ndigits)
+    if not len(strike) or np.any(np.diff(strike) == 0):
+        return None  # empty, or rounding merged strikes: let build_chain_df dedupe
+    out = {name: _round(values, ndigits) for name, values in arrays.items()}
+    out["CE_Risk"], out["PE_Risk"], out["CE_PE_Diff"] = _risk_columns(
+        out["strikePrice"], out["CE_LTP"], out["PE_LTP"], spot_price, risk, ndigits)
+    return pd.DataFrame(out, columns=CHAIN_COLUMNS)
+
+
+def patch_chain_df(prev_df, arrays, pos, spot_price, risk="premium", ndigits=None, spot_moved=True):
+    """Frame for ``arrays`` built from ``prev_df`` (same strikes), touching only rows ``pos``.
+
+    The leg columns are re-rounded for the changed rows ``pos`` alone, and so
+    are the risk columns unless ``spot_moved``.  Returns ``prev_df`` itself
+    when nothing changed.
+    """
+    if not len(pos) and not spot_moved:
+        return prev_df
+    cols = {name: prev_df[name].to_numpy(copy=True) for name in CHAIN_COLUMNS}
+    for name, values in arrays.items():
+        cols[name][pos] = _round(values[pos], ndigits)
+    rows = slice(None) if spot_moved else pos
+    risks = _risk_columns(cols["strikePrice"][rows], cols["CE_LTP"][rows], cols["PE_LTP"][rows],
+                          spot_price, risk, ndigits)
+    for name, values in zip(("CE_Risk", "PE_Risk", "CE_PE_Diff"), risks):
+        cols[name][rows] = values
+    return pd.DataFrame(cols, columns=CHAIN_COLUMNS)
+
+
+class ChainIndex:
+    """Parsed snapshot: strike records grouped by expiry, plus per-expiry frames.
+
+    Built once per fetched snapshot.  Switching expiries is a dict lookup; the
+    strike-sorted frame for an expiry is built on first use (the default
+    int/premium frames eagerly) and then shared read-only by every session.
+
+    Given the ``previous`` index of the same symbol, ``changes`` holds the
+    per-(expiry, strike, side) change set and the previous frames are patched
+    for the changed strikes only (or reused as-is when nothing changed).
+    """
+
+    def __init__(self, chain: ChainData, eager=True, previous=None):
+        self.expiry_dates = list(chain.expiry_dates)
+        self.underlying_value = chain.underlying_value
+        self._rows = {}
+        for r in chain.data_list:
+            self._rows.setdefault(r.get("expiryDate"), []).append(r)
+        self._arrays = {expiry: leg_arrays(rows) for expiry, rows in self._rows.items()}
+        self._frames = {}
+        self._ladders = {}
+        self._lock = threading.Lock()
+        if previous is None:
+            self.changes = ChangeSet(initial=True)
+        else:
+            self.changes, changed = diff_snapshots(previous._arrays, self._arrays,
+                                                   previous.underlying_value, self.underlying_value)
+            self._inherit(previous, changed)
+        if eager:
+            for expiry in self.expiry_dates:
+                self.frame(expiry)
+
+    @classmethod
+    def from_payload(cls, raw, previous=None, eager=True):
+        return cls(extract_chain(raw), eager=eager, previous=previous)
+
+    def _spot(self, ndigits):
+        return self.spot_price if ndigits is None else safe_float(self.underlying_value, ndigits)
+
+    def _inherit(self, previous, changed):
+        for (expiry, risk, ndigits), prev_df in previous._frames.items():
+            arrays = self._arrays.get(expiry)
+            if expiry not in changed or len(prev_df) != len(arrays["strikePrice"]):
+                continue  # strikes changed: rebuilt on demand
+            spot = self._spot(ndigits)
+            self._frames[(expiry, risk, ndigits)] = patch_chain_df(
+                prev_df, arrays, changed[expiry], spot, risk=risk, ndigits=ndigits,
+                spot_moved=spot != previous._spot(ndigits))
+        for (expiry, ndigits), ladder in previous._ladders.items():
+            if expiry in changed and not len(changed[expiry]):
+                self._ladders[(expiry, ndigits)] = ladder
+
+    @property
+    def spot_price(self):
+        return float(self.underlying_value) if self.underlying_value is not None else 0.0
+
+    def __contains__(self, expiry):
+        return bool(self._rows.get(expiry))
+
+    def rows(self, expiry):
+        return self._rows.get(expiry, [])
+
+    def arrays(self, expiry):
+        """``leg_arrays`` of ``expiry`` (unrounded, one entry per strike) or None."""
+        return self._arrays.get(expiry)
+
+    def frame(self, expiry, risk="premium", ndigits=None):
+        """Strike-sorted frame for ``expiry``; treat it as read-only."""
+        key = (expiry, risk, ndigits)
+        df = self._frames.get(key)
+        if df is None:
+            if risk not in RISK_MODES:
+                raise ValueError(f"unknown risk mode: {risk!r}")
+            spot = self._spot(ndigits)
+            with timed("frame", expiry=expiry):
+                df = None
+                if expiry in self._arrays:
+                    df = _frame_from_arrays(self._arrays[expiry], spot, risk, ndigits)
+                if df is None:
+                    df = build_chain_df(self.rows(expiry), spot, risk=risk, ndigits=ndigits)
+            with self._lock:
+                df = self._frames.setdefault(key, df)
+        return df
+
+    def ladder(self, expiry, ndigits=None) -> OiLadder:
+        """Prefix-sum OI ladder over ``frame(expiry, ndigits=ndigits)`` (risk does not affect OI)."""
+        key = (expiry, ndigits)
+        ladder = self._ladders.get(key)
+        if ladder is None:
+            df = self.frame(expiry, ndigits=ndigits)
+            with timed("analytics", expiry=expiry):
+                ladder = OiLadder(df)
+            with self._lock:
+                ladder = self._ladders.setdefault(key, ladder)
+        return ladder
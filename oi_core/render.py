@@ -0,0 +1,100 @@
+"""Process-wide cache of styled tables, serialised the way ``st.dataframe`` sends them.
+
+Entries are keyed by ``(symbol, expiry, window, digest)`` where the digest
+covers the displayed frame.  A miss builds the ``Styler``, runs Streamlit's
+own styler marshalling and Arrow serialisation once and keeps the encoded
+``Dataframe`` element; a rerun on an unchanged snapshot - most of them
+outside market hours - only decodes those bytes into a fresh element, so
+neither the styling rules nor the serialisation run again and nothing
+cached is ever handed to Streamlit to mutate.
+
+The marshalling helpers are Streamlit internals; if a release moves them,
+``styled_dataframe`` falls back to a plain (uncached) ``st.dataframe``.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import pandas as pd
+import streamlit as st
+
+try:  # what st.dataframe(styler) runs, so its output can be cached
+    from streamlit import dataframe_util
+    from streamlit.elements.lib.column_config_utils import INDEX_IDENTIFIER, marshall_column_config
+    from streamlit.elements.lib.layout_utils import LayoutConfig
+    from streamlit.elements.lib.pandas_styler_utils import marshall_styler
+    from streamlit.proto.Dataframe_pb2 import Dataframe as DataframeProto
+except ImportError:  # moved in this Streamlit release
+    marshall_styler = None
+
+from .timing import timed
+
+RENDER_CACHE_SIZE = int(os.environ.get("NSE_RENDER_CACHE_SIZE", "64"))
+
+
+def frame_digest(df: pd.DataFrame, *extra) -> str:
+    """Content hash of ``df`` (values, index and column names) plus ``extra``."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    h.update(repr((list(df.columns), extra)).encode())
+    return h.hexdigest()
+
+
+class RenderCache:
+    def __init__(self, maxsize: int = RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: Hashable, render: Callable):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            self.misses += 1
+        # render outside the lock; a concurrent duplicate render is harmless
+        payload = render()
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+render_cache = RenderCache()
+
+
+def marshal_styler(styler, hide_index=True, uuid="oi") -> bytes:
+    """The ``Dataframe`` element ``st.dataframe(styler, hide_index=...)`` sends, encoded."""
+    proto = DataframeProto()
+    proto.editing_mode = DataframeProto.EditingMode.READ_ONLY
+    marshall_styler(proto.arrow_data, styler, uuid)
+    df = dataframe_util.convert_anything_to_pandas_df(styler, ensure_copy=False)
+    proto.arrow_data.data = dataframe_util.convert_pandas_df_to_arrow_bytes(df)
+    marshall_column_config(proto, {INDEX_IDENTIFIER: {"hidden": hide_index}})
+    return proto.SerializeToString()
+
+
+def styled_dataframe(key: Hashable, build_styler: Callable, hide_index=True):
+    """``st.dataframe(build_styler(), width="stretch", hide_index=...)``, styled and serialised once per ``key``."""
+    if marshall_styler is None:
+        return st.dataframe(build_styler(), width="stretch", hide_index=hide_index)
+
+    def render():
+        with timed("style", key=key[:3] if isinstance(key, tuple) else key):
+            return marshal_styler(build_styler(), hide_index)
+
+    encoded = render_cache.get_or_render((key, hide_index), render)
+    return st._main._enqueue("dataframe", DataframeProto.FromString(encoded),
+                             layout_config=LayoutConfig(width="stretch"))
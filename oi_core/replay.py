@@ -0,0 +1,247 @@
+"""Offline replay of recorded option-chain payloads.
+
+``PayloadRecorder`` (a collector sink, enabled by ``NSE_RECORD_DIR``) saves
+every published payload as ``<root>/<symbol>/<epoch ms>.json`` from its own
+writer thread, so the collector never waits on the disk.
+``ReplaySource`` serves those files back through ``fetch_option_chain`` on a
+virtual clock running ``speed`` times faster than real time, so the whole
+fetch -> decode -> parse -> analytics -> render path can be exercised, and
+signal flips reproduced, without NSE.  ``speed="max"`` ignores the clock and
+steps each symbol one recording per fetch (a replaying collector polls only
+the recorded symbols and writes nothing to the recorder, the tick store or
+the archive)::
+
+    NSE_REPLAY_DIR=recordings NSE_REPLAY_SPEED=10 streamlit run pages13_Option.py
+"""
+import glob
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+from .decode import decode_option_chain
+
+log = logging.getLogger(__name__)
+
+RECORD_DIR = os.environ.get("NSE_RECORD_DIR")  # unset: nothing is recorded
+REPLAY_DIR = os.environ.get("NSE_REPLAY_DIR")  # set: every fetch is served from here
+REPLAY_SPEED = os.environ.get("NSE_REPLAY_SPEED", "1")
+REPLAY_LOOP = os.environ.get("NSE_REPLAY_LOOP", "1") not in ("0", "false", "no")
+QUEUE_SIZE = 1000
+
+
+def recording_path(root, symbol, ms):
+    return os.path.join(root, symbol, f"{ms:013d}.json")
+
+
+def parse_speed(speed) -> float:
+    """Time-warp factor: a positive number, or ``"max"`` for step-per-fetch replay."""
+    if isinstance(speed, str) and speed.strip().lower() in ("max", "inf"):
+        return math.inf
+    speed = float(speed)
+    if not speed > 0:
+        raise ValueError(f"replay speed must be positive or 'max', got {speed!r}")
+    return speed
+
+
+def _dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+class PayloadRecorder:
+    """Collector sink writing each published payload to its own JSON file.
+
+    ``on_snapshot`` only queues the payload; a writer thread records it.
+    If the writer falls behind and the queue is full the payload is dropped
+    and counted.
+    """
+
+    def __init__(self, root=RECORD_DIR, queue_size=QUEUE_SIZE):
+        self.root = root
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, symbol, data, fetched_at=None):
+        path = recording_path(self.root, symbol, int((fetched_at or time.time()) * 1000))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_dumps(data))
+        os.replace(tmp, path)  # a replay running alongside never sees partial files
+        self.written += 1
+        return path
+
+    def on_snapshot(self, snapshot):
+        """Collector subscriber: queues the payload for the writer thread; never blocks."""
+        try:
+            self._queue.put_nowait(snapshot)
+        except queue.Full:
+            self.dropped += 1
+            log.warning("recorder: queue full, dropped %s payload", snapshot.key)
+
+    def attach(self, collector):
+        collector.subscribe(self.on_snapshot)
+        return self.start()
+
+    # -- writer thread -----------------------------------------------------
+
+    def _write(self, snapshot):
+        try:
+            self.record(snapshot.key, snapshot.data, snapshot.fetched_at)
+        except Exception:
+            log.exception("recorder: writing %s to %s failed", snapshot.key, self.root)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._write(self._queue.get(timeout=1))
+            except queue.Empty:
+                pass
+        while True:
+            try:
+                self._write(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="nse-recorder", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the writer after recording whatever is queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+class ReplaySource:
+    """Recorded payloads of every symbol under ``root``, served on a shared virtual clock.
+
+    The clock starts at the earliest recording on the first fetch; a fetch
+    returns the newest recording of that symbol at or before the virtual
+    time.  With ``loop`` the clock wraps around at the last recording,
+    otherwise the last payload keeps being served.
+    """
+
+    def __init__(self, root, speed=1.0, loop=True, clock=time.monotonic):
+        self.root = root
+        self.speed = parse_speed(speed)
+        self.loop = loop
+        self.clock = clock
+        self._times = {}
+        for symbol_dir in sorted(glob.glob(os.path.join(root, "*"))):
+            names = sorted(glob.glob(os.path.join(symbol_dir, "*.json")))
+            if names:
+                stems = [os.path.basename(n)[:-len(".json")] for n in names]
+                self._times[os.path.basename(symbol_dir)] = np.array(stems, dtype=np.int64)
+        if not self._times:
+            raise FileNotFoundError(f"no recorded payloads under {root!r}")
+        self.start_ms = int(min(t[0] for t in self._times.values()))
+        self.end_ms = int(max(t[-1] for t in self._times.values()))
+        self._started = None
+        self._cursor = {}
+        self._lock = threading.Lock()
+
+    @property
+    def symbols(self):
+        return tuple(self._times)
+
+    def __len__(self):
+        return sum(len(t) for t in self._times.values())
+
+    def reset(self):
+        with self._lock:
+            self._started = None
+            self._cursor.clear()
+
+    def now_ms(self) -> int:
+        """Current virtual time, in epoch-ms of the recordings."""
+        with self._lock:
+            if self._started is None:
+                self._started = self.clock()
+            elapsed = (self.clock() - self._started) * 1000 * self.speed
+        span = self.end_ms - self.start_ms
+        if self.loop and span:
+            elapsed %= span
+        return self.start_ms + int(min(elapsed, span))
+
+    def position(self, symbol) -> int:
+        """Index of the recording of ``symbol`` to serve next."""
+        times = self._times.get(symbol)
+        if times is None:
+            raise KeyError(f"no recordings for {symbol!r} under {self.root!r}")
+        if self.speed != math.inf:
+            return max(0, int(np.searchsorted(times, self.now_ms(), side="right")) - 1)
+        with self._lock:
+            i = self._cursor.get(symbol, 0)
+            nxt = i + 1
+            if nxt >= len(times):
+                nxt = 0 if self.loop else i
+            self._cursor[symbol] = nxt
+        return i
+
+    def load(self, symbol, i=None) -> bytes:
+        if i is None:
+            i = self.position(symbol)
+        with open(recording_path(self.root, symbol, int(self._times[symbol][i])), "rb") as f:
+            return f.read()
+
+    def fetch(self, symbol, timeout=None):
+        """Drop-in for ``fetch_option_chain``: the recorded bytes go through the same decoder."""
+        return decode_option_chain(self.load(symbol))
+
+
+_replay = None
+_replay_configured = False
+_replay_lock = threading.Lock()
+
+
+def _configure(root, speed, loop):
+    global _replay, _replay_configured
+    _replay = ReplaySource(root, speed=speed, loop=loop) if root else None
+    _replay_configured = True
+    return _replay
+
+
+def configure_replay(root=REPLAY_DIR, speed=REPLAY_SPEED, loop=REPLAY_LOOP):
+    """Serve every fetch from ``root`` (``root=None`` switches back to NSE)."""
+    with _replay_lock:
+        return _configure(root, speed, loop)
+
+
+def get_replay():
+    """Process-wide replay source, or None when fetching live (NSE_REPLAY_DIR unset)."""
+    if not _replay_configured:
+        with _replay_lock:
+            if not _replay_configured:
+                _configure(REPLAY_DIR, REPLAY_SPEED, REPLAY_LOOP)
+    return _replay
+
+
+def get_recorder():
+    """Payload recorder, or None when NSE_RECORD_DIR is unset or a replay is running."""
+    if RECORD_DIR and get_replay() is None:
+        return PayloadRecorder()
+    return None
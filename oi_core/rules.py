@@ -0,0 +1,412 @@
+"""Declarative alert rules, compiled to vectorized predicates.
+
+A rule is one line of a small language, optionally scoped to symbols::
+
+    pcr(4) crosses above 1.2
+    NIFTY, BANKNIFTY: max_oi_strike(PE) shifts
+    CE_%OI > 50 at any strike within 3
+    rocket becomes Strong Bullish
+    CE_PE_Diff crosses 0 and pcr < 1
+
+Grammar (``and`` binds tighter than ``or``)::
+
+    rule    := [SYMBOL ("," SYMBOL)* ":"] clause (("and" | "or") clause)*
+    clause  := value CMP NUMBER
+             | value "crosses" ["above" | "below"] NUMBER
+             | value ("changes" | "shifts")
+             | "rocket" ("is" | "becomes") STATE
+             | COLUMN CMP NUMBER "at" ("any" | "all") ("strike" | "strikes") ["within" INT]
+    value   := "pcr" ["(" INT ")"] | "spot" | "atm_strike"
+             | "max_oi_strike" "(" ("CE" | "PE") ["," INT] ")"
+             | COLUMN                               (value at the ATM strike)
+    COLUMN  := CE_OI | PE_OI | CE_%OI | PE_%OI | CE_LTP | PE_LTP | CE_Risk | PE_Risk | CE_PE_Diff
+    CMP     := > | >= | < | <= | == | !=
+
+``pcr`` alone is PCR over ATM ±5 (what the pages show), ``within k`` and the
+second ``max_oi_strike`` argument limit to ATM ± k strikes.
+
+Compiling a ``RuleSet`` reduces every clause to a comparison on one scalar
+*feature* of a snapshot (strike predicates become a window max/min: "any
+x > t" is "max(x) > t"), deduplicated across rules.  Per tick the features
+of each (symbol, expiry) are computed once into a row of a matrix, all
+clauses are compared in a few numpy operations, and the and/or structure is
+resolved with two ``reduceat`` passes, so hundreds of rules cost about
+as much as their distinct features.
+"""
+import logging
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from .analytics import pcr, rocket_signal
+from .parse import risk_columns
+
+log = logging.getLogger(__name__)
+
+COLUMNS = {
+    "CE_OI": "CE_OI", "PE_OI": "PE_OI", "CE_%OI": "CE_pchgOI", "PE_%OI": "PE_pchgOI",
+    "CE_LTP": "CE_LTP", "PE_LTP": "PE_LTP", "CE_Risk": "CE_Risk", "PE_Risk": "PE_Risk",
+    "CE_PE_Diff": "CE_PE_Diff",
+}
+ROCKET_STATES = ("Strong Bullish", "Strong Bearish", "Bullish but Risky", "Bearish but Risky", "Conflict / Wait")
+PCR_SPAN = 5      # "pcr" and the rocket's total PCR: ATM ±5
+ATM_OI_SPAN = 4   # the rocket's ATM OI: ATM ±4
+
+# clause ops, in ``RuleSet.atoms_true`` order.  ``crosses above t``: previous < t <= current,
+# ``crosses below t``: previous >= t > current; ``becomes``: ``==`` now and ``!=`` before.
+OPS = (">", ">=", "<", "<=", "==", "!=", "crosses", "crosses above", "crosses below", "changes", "becomes")
+_CMP = (">", ">=", "<", "<=", "==", "!=")
+
+
+class RuleError(ValueError):
+    """A rule that does not parse."""
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    text: str
+    symbols: tuple = ()  # empty: every symbol
+
+
+class _Scanner:
+    _TOKEN = re.compile(r"\s*(>=|<=|==|!=|[><(),:]|-?\d+(?:\.\d+)?|[A-Za-z_][A-Za-z0-9_%]*)")
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def error(self, expected):
+        raise RuleError(f"{self.text!r}: expected {expected} at column {self.pos + 1}")
+
+    def peek(self):
+        m = self._TOKEN.match(self.text, self.pos)
+        return m.group(1) if m else None
+
+    def next(self, expected="a token"):
+        m = self._TOKEN.match(self.text, self.pos)
+        if not m:
+            self.error(expected)
+        self.pos = m.end()
+        return m.group(1)
+
+    def accept(self, *words):
+        tok = self.peek()
+        if tok is not None and tok.lower() in words:
+            self.next()
+            return tok.lower()
+        return None
+
+    def expect(self, *words):
+        tok = self.accept(*words)
+        if tok is None:
+            self.error(" or ".join(repr(w) for w in words))
+        return tok
+
+    def number(self, integer=False):
+        tok = self.next("a number")
+        try:
+            return int(tok) if integer else float(tok)
+        except ValueError:
+            self.error("an integer" if integer else "a number")
+
+    def rest_matches(self, choices):
+        rest = self.text[self.pos:].lstrip()
+        for choice in choices:
+            if rest.lower().startswith(choice.lower()):
+                self.pos = len(self.text) - len(rest) + len(choice)
+                return choice
+        return None
+
+    def at_end(self):
+        return not self.text[self.pos:].strip()
+
+
+def _value(sc):
+    tok = sc.next("a value")
+    low = tok.lower()
+    if low == "pcr":
+        k = PCR_SPAN
+        if sc.accept("("):
+            k = sc.number(integer=True)
+            sc.expect(")")
+        return ("pcr", k)
+    if low in ("spot", "atm_strike"):
+        return (low,)
+    if low == "max_oi_strike":
+        sc.expect("(")
+        side = sc.expect("ce", "pe").upper()
+        k = None
+        if sc.accept(","):
+            k = sc.number(integer=True)
+        sc.expect(")")
+        return ("max_oi_strike", side, k)
+    if tok in COLUMNS:
+        return ("atm", tok)
+    sc.pos -= len(tok)
+    sc.error("pcr, spot, atm_strike, max_oi_strike(...), rocket or a column")
+
+
+def _clause(sc):
+    """One clause -> (feature, op, threshold)."""
+    if sc.accept("rocket"):
+        op = sc.expect("is", "becomes")
+        state = sc.rest_matches(ROCKET_STATES)
+        if state is None:
+            sc.error("one of " + ", ".join(ROCKET_STATES))
+        return ("rocket",), ("==" if op == "is" else "becomes"), float(ROCKET_STATES.index(state))
+    start = sc.pos
+    feature = _value(sc)
+    if sc.accept("crosses"):
+        direction = sc.accept("above", "below")
+        return feature, "crosses" + (f" {direction}" if direction else ""), sc.number()
+    if sc.accept("changes", "shifts"):
+        return feature, "changes", np.nan
+    op = sc.next("a comparison")
+    if op not in _CMP:
+        sc.pos -= len(op)
+        sc.error("a comparison, crosses, changes or shifts")
+    threshold = sc.number()
+    if sc.accept("at"):
+        if feature[0] != "atm":
+            sc.pos = start
+            sc.error("a column before 'at'")
+        quant = sc.expect("any", "all")
+        sc.expect("strike", "strikes")
+        k = sc.number(integer=True) if sc.accept("within") else None
+        if op in ("==", "!="):
+            sc.error("<, <=, > or >= with 'at any/all strikes'")
+        # any(x > t) == max(x) > t, all(x > t) == min(x) > t (mirrored for <)
+        upper = op in (">", ">=")
+        reduce = "max" if upper == (quant == "any") else "min"
+        return (reduce, feature[1], k), op, threshold
+    return feature, op, threshold
+
+
+def parse_rule(text):
+    """``text`` -> (symbols, [[(feature, op, threshold), ...] per or-branch])."""
+    sc = _Scanner(text)
+    symbols = ()
+    head = re.match(r"\s*([A-Z][A-Z0-9&-]*(?:\s*,\s*[A-Z][A-Z0-9&-]*)*)\s*:", text)
+    if head and head.group(1).split(",")[0].strip() not in COLUMNS:
+        symbols = tuple(s.strip() for s in head.group(1).split(","))
+        sc.pos = head.end()
+    branches = [[_clause(sc)]]
+    while not sc.at_end():
+        joiner = sc.expect("and", "or")
+        if joiner == "or":
+            branches.append([])
+        branches[-1].append(_clause(sc))
+    return symbols, branches
+
+
+class _Snapshot:
+    """Lazily extracted columns of one (chain, expiry), shared by its features.
+
+    Columns are derived from the chain's arrays exactly like the default
+    (rounded, premium-risk) frame, without going through pandas.
+    """
+
+    def __init__(self, chain, expiry):
+        self.chain = chain
+        self.expiry = expiry
+        self.arrays = chain.arrays(expiry)
+        self.spot = chain.spot_price
+        self.ladder = chain.ladder(expiry)
+        self.atm = self.ladder.atm(self.spot)
+        self._cols = {}
+
+    def col(self, name):
+        values = self._cols.get(name)
+        if values is None:
+            column = COLUMNS.get(name, name)
+            if self.arrays is None:
+                values = self.chain.frame(self.expiry)[column].to_numpy(dtype=float)
+            elif column in self.arrays:
+                values = np.rint(self.arrays[column])  # = chain.frame(expiry)[column], as the pages show it
+            else:
+                risks = risk_columns(self.arrays, self.spot)
+                self._cols.update((n, risks[c]) for n, c in COLUMNS.items() if c in risks)
+                values = risks[column]
+            self._cols[name] = values
+        return values
+
+    def window(self, name, k):
+        values = self.col(name)
+        if k is None:
+            return values
+        return values[max(0, self.atm - k):self.atm + k + 1]
+
+    # one method per feature kind: ``features[0]`` names it, the rest are its arguments
+
+    def pcr(self, k):
+        return pcr(*self.ladder.window(self.atm, k))
+
+    def atm_strike(self):
+        return self.col("strikePrice")[self.atm]
+
+    def at_atm(self, name):
+        return self.col(name)[self.atm]
+
+    def _outward(self, ufunc, name):
+        """``ufunc`` (max/min) over ATM ± k for every k, as two running reductions."""
+        key = (ufunc, name)
+        reach = self._cols.get(key)
+        if reach is None:
+            values = self.col(name)
+            reach = self._cols[key] = (ufunc.accumulate(values[self.atm::-1]).tolist(),
+                                       ufunc.accumulate(values[self.atm:]).tolist())
+        return reach
+
+    def max(self, name, k):
+        left, right = self._outward(np.maximum, name)
+        k = len(left) + len(right) if k is None else k
+        return max(left[min(k, len(left) - 1)], right[min(k, len(right) - 1)])
+
+    def min(self, name, k):
+        left, right = self._outward(np.minimum, name)
+        k = len(left) + len(right) if k is None else k
+        return min(left[min(k, len(left) - 1)], right[min(k, len(right) - 1)])
+
+    def max_oi_strike(self, side, k):
+        oi = self.window(f"{side}_OI", k)
+        return self.window("strikePrice", k)[int(oi.argmax())]
+
+    def rocket(self):
+        atm_pe_oi, atm_ce_oi = self.ladder.window(self.atm, ATM_OI_SPAN)
+        _, state = rocket_signal(self.pcr(PCR_SPAN), atm_pe_oi, atm_ce_oi,
+                                 int(self.at_atm("PE_%OI")), int(self.at_atm("CE_%OI")))
+        return float(ROCKET_STATES.index(state))
+
+
+_FEATURES = {"pcr": _Snapshot.pcr, "spot": lambda snap: snap.spot, "atm_strike": _Snapshot.atm_strike,
+             "atm": _Snapshot.at_atm, "max": _Snapshot.max, "min": _Snapshot.min,
+             "max_oi_strike": _Snapshot.max_oi_strike, "rocket": _Snapshot.rocket}
+
+
+class RuleSet:
+    """Compiled rules: per-tick evaluation is a few array operations."""
+
+    def __init__(self, rules):
+        self.rules = [r if isinstance(r, Rule) else Rule(*r) for r in rules]
+        names = [r.name for r in self.rules]
+        if len(set(names)) != len(names):
+            raise RuleError("duplicate rule names")
+        features, atoms = {}, {}
+        branches, rule_starts, self._lead = [], [], []
+        for j, rule in enumerate(self.rules):
+            symbols, parsed = parse_rule(rule.text)
+            if symbols and rule.symbols and set(symbols) != set(rule.symbols):
+                raise RuleError(f"{rule.name}: symbols given twice")
+            self.rules[j] = Rule(rule.name, rule.text, rule.symbols or symbols)
+            self._lead.append(features.setdefault(parsed[0][0][0], len(features)))
+            rule_starts.append(len(branches))
+            for clauses in parsed:
+                branch = []
+                for feature, op, threshold in clauses:
+                    f = features.setdefault(feature, len(features))
+                    branch.append(atoms.setdefault((f, op, threshold), len(atoms)))
+                branches.append(branch)
+        self.features = list(features)
+        self._calls = [(_FEATURES[key[0]], key[1:]) for key in self.features]
+        self.atoms = list(atoms)
+        self._atom_feature = np.array([a[0] for a in self.atoms], dtype=np.intp)
+        self._atom_op = np.array([OPS.index(a[1]) for a in self.atoms], dtype=np.intp)
+        self._threshold = np.array([a[2] for a in self.atoms], dtype=float)
+        # and-branches as runs of atom positions, rules as runs of branches (for ufunc.reduceat)
+        self._branch_atoms = np.array([a for branch in branches for a in branch], dtype=np.intp)
+        self._branch_starts = np.cumsum([0] + [len(b) for b in branches[:-1]]).astype(np.intp)
+        self._rule_starts = np.array(rule_starts, dtype=np.intp)
+        self._all_symbols = np.array([not r.symbols for r in self.rules])
+        self._scopes = {}
+
+    def __len__(self):
+        return len(self.rules)
+
+    def features_of(self, chain, expiry):
+        """Feature row of one (chain, expiry)."""
+        snap = _Snapshot(chain, expiry)
+        row = np.empty(len(self._calls))
+        for n, (fn, args) in enumerate(self._calls):
+            try:
+                row[n] = fn(snap, *args)
+            except Exception as e:  # a feature this chain cannot provide: its clauses are false
+                log.warning("rules: feature %s failed on %s: %s", self.features[n], expiry, e)
+                row[n] = np.nan
+        return row
+
+    def _scope(self, symbol):
+        mask = self._scopes.get(symbol)
+        if mask is None:
+            mask = self._scopes[symbol] = self._all_symbols | np.array([symbol in r.symbols for r in self.rules])
+        return mask
+
+    def atoms_true(self, current, previous):
+        """(rows, atoms) clause results for feature matrices ``current`` / ``previous``.
+
+        Every op is computed for every atom (a dozen vector operations) and
+        each atom then picks its own op's result.
+        """
+        cur = np.atleast_2d(current)[:, self._atom_feature]
+        prev = np.atleast_2d(previous)[:, self._atom_feature]
+        thr = self._threshold
+        with np.errstate(invalid="ignore"):
+            known = ~np.isnan(cur)
+            had = ~np.isnan(prev)
+            c_ge, c_gt, c_eq = cur >= thr, cur > thr, cur == thr
+            p_ge = prev >= thr
+            results = np.stack([
+                c_gt,                            # >
+                c_ge,                            # >=
+                known & ~c_ge,                   # <
+                known & ~c_gt,                   # <=
+                c_eq,                            # ==
+                known & ~c_eq,                   # !=
+                known & had & (c_ge != p_ge),    # crosses
+                c_ge & had & ~p_ge,              # crosses above
+                known & ~c_ge & p_ge,            # crosses below
+                known & had & (cur != prev),     # changes
+                c_eq & had & (prev != thr),      # becomes
+            ])
+        return np.take_along_axis(results, self._atom_op[None, None, :], axis=0)[0]
+
+    def evaluate(self, current, previous, symbols):
+        """(rows, rules) boolean matrix: which rules fire for each row's symbol."""
+        atoms = self.atoms_true(current, previous)
+        branches = np.logical_and.reduceat(atoms[:, self._branch_atoms], self._branch_starts, axis=1)
+        fired = np.logical_or.reduceat(branches, self._rule_starts, axis=1)
+        return fired & np.array([self._scope(s) for s in symbols])
+
+    def fired(self, current, previous, symbol):
+        """Indices of the rules firing for one symbol's feature row."""
+        atoms = self.atoms_true(current, previous)[0]
+        branches = np.logical_and.reduceat(atoms[self._branch_atoms], self._branch_starts)
+        fired = np.logical_or.reduceat(branches, self._rule_starts) & self._scope(symbol)
+        return np.flatnonzero(fired).tolist()
+
+    def describe(self, j, row):
+        """Value of rule ``j``'s first feature in a feature row, for display."""
+        value = row[self._lead[j]]
+        if np.isnan(value):
+            return ""
+        if not np.isfinite(value):  # pcr with no CE OI in the window
+            return "∞" if value > 0 else "-∞"
+        if self.features[self._lead[j]] == ("rocket",):
+            return ROCKET_STATES[int(value)]
+        return f"{value:.3f}" if value != int(value) else str(int(value))
+
+
+def load_rules(path) -> RuleSet:
+    """Rules file: one ``name: rule`` per line, ``#`` comments."""
+    rules = []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            name, sep, text = line.partition(":")
+            if not sep or not name.strip() or " " in name.strip():
+                raise RuleError(f"{path}:{n}: expected 'name: rule'")
+            rules.append(Rule(name.strip(), text.strip()))
+    return RuleSet(rules)
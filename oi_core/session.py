@@ -0,0 +1,136 @@
+"""Process-wide pooled HTTP session for the NSE website.
+
+Every page used to build a fresh ``requests.Session()`` per rerun and warm it
+up with a GET to the NSE homepage before the real API call.  The pool below
+keeps one long-lived session (keep-alive + TLS reuse) for the whole Streamlit
+server and only repeats the homepage handshake when the cookies expire or NSE
+answers 401/403.
+"""
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import cookie_refreshes, nse_request_seconds, nse_requests
+
+# Point at a stand-in (e.g. ``python -m oi_core.mock_nse``) for offline testing
+NSE_BASE_URL = os.environ.get("NSE_BASE_URL", "https://www.nseindia.com").rstrip("/")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": f"{NSE_BASE_URL}/",
+}
+
+# Pool limits can be tuned without touching code (env vars win over defaults)
+DEFAULT_POOL_CONNECTIONS = int(os.environ.get("NSE_POOL_CONNECTIONS", "4"))
+DEFAULT_POOL_MAXSIZE = int(os.environ.get("NSE_POOL_MAXSIZE", "16"))
+# NSE cookies (nsit / nseappid) are short lived; refresh a bit before that
+DEFAULT_COOKIE_TTL = float(os.environ.get("NSE_COOKIE_TTL", "240"))
+WARMUP_TIMEOUT = 5
+
+AUTH_STATUSES = (401, 403)
+
+
+class NSESessionPool:
+    """One shared ``requests.Session`` with cookie reuse and lazy warm-up."""
+
+    def __init__(self, base_url=NSE_BASE_URL, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, cookie_ttl=DEFAULT_COOKIE_TTL):
+        self.base_url = base_url.rstrip("/")
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.cookie_ttl = cookie_ttl
+        self._lock = threading.Lock()
+        self._warmed_at = 0.0
+        self.warmups = 0
+        self.session = self._build_session()
+
+    def _build_session(self):
+        s = requests.Session()
+        s.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        return s
+
+    def cookies_expired(self, now=None):
+        now = time.time() if now is None else now
+        if not self.session.cookies or now - self._warmed_at >= self.cookie_ttl:
+            return True
+        for c in self.session.cookies:
+            if c.expires is not None and c.expires <= now:
+                return True
+        return False
+
+    def warm_up(self, force=False, since=None):
+        """Visit the homepage to (re)load cookies; concurrent callers share one visit.
+
+        ``since`` (a ``time.time()`` taken before the request that was
+        rejected) skips a forced visit when another thread already refreshed
+        the cookies after that request started.
+        """
+        with self._lock:
+            if since is not None and self._warmed_at > since:
+                return
+            if not force and not self.cookies_expired():
+                return
+            self.session.cookies.clear()
+            self.session.get(self.base_url, timeout=WARMUP_TIMEOUT)
+            self._warmed_at = time.time()
+            self.warmups += 1
+            cookie_refreshes.inc()
+
+    def store_cookies(self, cookies):
+        """Keep cookies set on a response made outside the session (e.g. by the async client)."""
+        with self._lock:
+            for cookie in cookies:
+                self.session.cookies.set_cookie(cookie)
+
+    def get(self, path, params=None, timeout=10):
+        """GET ``path`` on the NSE host, re-warming once on 401/403."""
+        if self.cookies_expired():
+            self.warm_up()
+        url = f"{self.base_url}{path}"
+        with nse_request_seconds.time():
+            try:
+                started = time.time()
+                r = self.session.get(url, params=params, timeout=timeout)
+                if r.status_code in AUTH_STATUSES:
+                    r.close()
+                    self.warm_up(force=True, since=started)
+                    r = self.session.get(url, params=params, timeout=timeout)
+            except requests.RequestException:
+                nse_requests.inc(status="error")
+                raise
+        nse_requests.inc(status=str(r.status_code))
+        return r
+
+    def close(self):
+        self.session.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide session pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = NSESessionPool()
+    return _pool
+
+
+def configure_pool(**kwargs):
+    """Replace the shared pool (e.g. different limits or base URL)."""
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, NSESessionPool(**kwargs)
+    if old is not None:
+        old.close()
+    return _pool
@@ -0,0 +1,197 @@
+"""Append-only on-disk history of collected option-chain snapshots.
+
+Every snapshot the collector publishes is queued here and a writer thread
+flushes the queue in batches as Parquet files, one new part file per
+partition and flush::
+
+    <root>/date=YYYY-MM-DD/symbol=NIFTY/expiry=30-Oct-2026/part-<ms>-<seq>.parquet
+
+Rows are one strike of one snapshot (``TICK_COLUMNS``) with the unrounded
+leg values, so frames can be rebuilt for replay and backtests without
+refetching from NSE.  ``append`` never blocks: if the writer falls behind
+and the queue is full the snapshot is dropped and counted.  Needs the
+optional ``pyarrow`` dependency; without it the store is disabled.
+"""
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = pq = None
+
+log = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+TICK_DIR = os.environ.get("NSE_TICK_DIR", "tick_data")
+TICK_STORE_ENABLED = os.environ.get("NSE_TICK_STORE", "1") not in ("0", "false", "no")
+FLUSH_INTERVAL = float(os.environ.get("NSE_TICK_FLUSH_INTERVAL", "300"))
+FLUSH_ROWS = 200_000
+QUEUE_SIZE = 1000
+
+LEG_COLUMNS = ("CE_OI", "CE_pchgOI", "CE_LTP", "PE_LTP", "PE_pchgOI", "PE_OI")
+TICK_COLUMNS = ("ts", "symbol", "expiry", "strikePrice", "underlying") + LEG_COLUMNS
+
+
+def trading_day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, IST).strftime("%Y-%m-%d")
+
+
+def partition_dir(root, day, symbol, expiry):
+    return os.path.join(root, f"date={day}", f"symbol={symbol}", f"expiry={expiry}")
+
+
+class TickStore:
+    def __init__(self, root=TICK_DIR, flush_interval=FLUSH_INTERVAL, flush_rows=FLUSH_ROWS,
+                 queue_size=QUEUE_SIZE):
+        if pa is None:
+            raise RuntimeError("TickStore needs pyarrow (pip install pyarrow)")
+        self.root = root
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending = {}  # partition dir -> list of pyarrow tables
+        self._pending_rows = 0
+        self._seq = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.written_rows = 0
+        self.written_files = 0
+        self.dropped = 0
+
+    # -- producer side (collector thread) ---------------------------------
+
+    def append(self, snapshot):
+        """Queue a cache ``Snapshot`` whose ``parsed`` is a ``ChainIndex``; never blocks."""
+        try:
+            self._queue.put_nowait(snapshot)
+        except queue.Full:
+            self.dropped += 1
+            log.warning("tick store: queue full, dropped %s snapshot", snapshot.key)
+
+    def attach(self, collector):
+        collector.subscribe(self.append)
+        return self.start()
+
+    # -- writer side -------------------------------------------------------
+
+    def _tables(self, snapshot):
+        chain = snapshot.parsed
+        day = trading_day(snapshot.fetched_at)
+        ms = int(snapshot.fetched_at * 1000)
+        underlying = float(chain.spot_price)
+        for expiry in chain.expiry_dates:
+            arrays = chain.arrays(expiry)
+            if arrays is None or not len(arrays["strikePrice"]):
+                continue
+            n = len(arrays["strikePrice"])
+            cols = {
+                "ts": pa.array([ms] * n, pa.timestamp("ms", tz="UTC")),
+                "symbol": pa.array([snapshot.key] * n, pa.string()),
+                "expiry": pa.array([expiry] * n, pa.string()),
+                "strikePrice": pa.array(arrays["strikePrice"]),
+                "underlying": pa.array([underlying] * n, pa.float64()),
+            }
+            cols.update((c, pa.array(arrays[c])) for c in LEG_COLUMNS)
+            yield partition_dir(self.root, day, snapshot.key, expiry), pa.table(cols)
+
+    def _take(self, snapshot):
+        for part, table in self._tables(snapshot):
+            self._pending.setdefault(part, []).append(table)
+            self._pending_rows += table.num_rows
+
+    def flush(self):
+        """Write everything pending as one new part file per partition."""
+        pending, self._pending, self._pending_rows = self._pending, {}, 0
+        for part, tables in pending.items():
+            os.makedirs(part, exist_ok=True)
+            self._seq += 1
+            name = f"part-{int(time.time() * 1000)}-{self._seq:06d}.parquet"
+            table = pa.concat_tables(tables)
+            tmp = os.path.join(part, "." + name + ".tmp")
+            pq.write_table(table, tmp)
+            os.replace(tmp, os.path.join(part, name))  # readers never see partial files
+            self.written_rows += table.num_rows
+            self.written_files += 1
+
+    def _drain(self, block_for):
+        try:
+            self._take(self._queue.get(timeout=block_for))
+            while True:
+                self._take(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while not self._stop.is_set():
+            self._drain(max(0.1, self.flush_interval - (time.monotonic() - last_flush)))
+            if self._pending_rows >= self.flush_rows or time.monotonic() - last_flush >= self.flush_interval:
+                self._safe_flush()
+                last_flush = time.monotonic()
+        self._drain(0)
+        self._safe_flush()
+
+    def _safe_flush(self):
+        try:
+            self.flush()
+        except Exception:
+            log.exception("tick store: flush to %s failed", self.root)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="nse-tick-store", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the writer after flushing whatever is queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def read_ticks(symbol, day=None, expiry=None, root=TICK_DIR):
+    """History of ``symbol`` for one trading ``day`` (default: today, IST) as a DataFrame.
+
+    Sorted by ``ts`` then ``strikePrice``; ``expiry=None`` reads every expiry.
+    """
+    if pa is None:
+        raise RuntimeError("read_ticks needs pyarrow (pip install pyarrow)")
+    if day is None:
+        day = trading_day(time.time())
+    elif isinstance(day, date):
+        day = day.strftime("%Y-%m-%d")
+    pattern = os.path.join(partition_dir(root, day, symbol, expiry or "*"), "part-*.parquet")
+    tables = [pq.read_table(path) for path in sorted(glob.glob(pattern))]
+    if not tables:
+        return pd.DataFrame(columns=list(TICK_COLUMNS))
+    df = pa.concat_tables(tables).to_pandas()
+    return df.sort_values(["ts", "strikePrice"], kind="stable").reset_index(drop=True)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_tick_store():
+    """Process-wide tick store, or None when disabled (NSE_TICK_STORE=0) or pyarrow is missing."""
+    global _store
+    if _store is None and TICK_STORE_ENABLED and pa is not None:
+        with _store_lock:
+            if _store is None:
+                _store = TickStore()
+    return _store
@@ -0,0 +1,97 @@
+"""Mask-based table styling for ``pandas.Styler``.
+
+Instead of a per-row ``style_row`` callback, rules are applied to whole
+columns at once: each rule is a boolean row mask, a list of columns and a
+CSS declaration.  ``set`` replaces a cell's CSS, ``add`` appends to it, and
+the finished grid is handed to ``Styler.apply(axis=None)`` in one go.
+
+``tracker_table`` / ``tracker_styler`` build the ATM-window table of the
+full OI tracker pages (pages13/14); the benchmark times the same code.
+"""
+import numpy as np
+import pandas as pd
+
+
+class CssGrid:
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._col = {c: i for i, c in enumerate(df.columns)}
+        self.css = np.full(df.shape, "", dtype=object)
+
+    def _rows(self, rows):
+        if rows is None:
+            return np.arange(len(self.df))
+        return np.flatnonzero(np.asarray(rows, dtype=bool))
+
+    def set(self, rows, cols, css):
+        """Replace the CSS of ``cols`` on the rows where ``rows`` is True (None = all)."""
+        idx = self._rows(rows)
+        for c in cols:
+            self.css[idx, self._col[c]] = css
+        return self
+
+    def add(self, rows, cols, css):
+        """Append ``css`` to whatever ``cols`` already have on those rows."""
+        idx = self._rows(rows)
+        for c in cols:
+            j = self._col[c]
+            cur = self.css[idx, j]
+            self.css[idx, j] = np.where(cur == "", css, cur + "; " + css)
+        return self
+
+    def add_row(self, rows, css):
+        return self.add(rows, self.df.columns, css)
+
+    def signed(self, col, pos, neg, zero=None, replace=False):
+        """Colour ``col`` by the sign of its values (``zero=None`` leaves zeros alone)."""
+        values = self.df[col].to_numpy()
+        paint = self.set if replace else self.add
+        paint(values > 0, [col], pos)
+        paint(values < 0, [col], neg)
+        if zero is not None:
+            paint(values == 0, [col], zero)
+        return self
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.css, index=self.df.index, columns=self.df.columns)
+
+    def style(self):
+        """``Styler`` for the grid's frame with all the CSS applied in one pass."""
+        return self.df.style.apply(lambda _: self.to_frame(), axis=None)
+
+
+TRACKER_COLUMNS = ["CE_OI", "CE_%OI", "CE_Risk", "CE_PE_Diff", "CE_LTP", "Strike", "PE_LTP", "PE_Risk", "PE_%OI",
+                   "PE_OI"]
+
+
+def tracker_table(window) -> pd.DataFrame:
+    """Display frame of an ``AtmWindow``: ``TRACKER_COLUMNS``, ATM strike labelled ``[ATM] <strike>``."""
+    display = window.df.copy()
+    display["Strike"] = display["strikePrice"].apply(lambda s: f"[ATM] {s}" if s == window.atm_strike else f"{s}")
+    return display[TRACKER_COLUMNS]
+
+
+def tracker_grid(display, max_ce_oi, max_pe_oi) -> CssGrid:
+    grid = CssGrid(display)
+
+    # Fresh OI
+    grid.set(display["CE_%OI"] > 0, ["CE_OI", "CE_%OI", "CE_Risk", "CE_PE_Diff", "CE_LTP"], "background-color:#ffcdd2")
+    grid.set(display["PE_%OI"] > 0, ["PE_OI", "PE_%OI", "PE_Risk", "PE_LTP"], "background-color:#c8e6c9")
+
+    # Max OI highlight
+    grid.set(display["CE_OI"] == max_ce_oi, ["CE_OI"], "background-color:#e57373;font-weight:700")
+    grid.set(display["PE_OI"] == max_pe_oi, ["PE_OI"], "background-color:#81c784;font-weight:700")
+
+    # Risk colors
+    for col in ["CE_Risk", "PE_Risk", "CE_PE_Diff"]:
+        grid.signed(col, "color:green;font-weight:700", "color:red;font-weight:700", replace=True)
+
+    # ATM strike
+    atm_rows = display["Strike"].astype(str).str.startswith("[ATM]")
+    grid.add_row(atm_rows, "background-color:#fff8cc")
+    grid.add(atm_rows, ["Strike"], "border:2px solid #000;font-weight:700")
+    return grid
+
+
+def tracker_styler(display, max_ce_oi, max_pe_oi):
+    return tracker_grid(display, max_ce_oi, max_pe_oi).style().format(precision=1)  # frame is rounded to 1 decimal
@@ -0,0 +1,101 @@
+"""Rolling per-stage timings of the hot path.
+
+The fetch, decode, parse, frame, analytics and style steps run inside
+``timed(stage)``; each stage keeps its last ``NSE_TIMING_WINDOW`` durations
+in a fixed-size buffer, so p50/p95/p99 always describe recent behaviour.
+Every timing is also logged as one JSON object on the ``oi_core.timing``
+logger (DEBUG, or INFO with ``NSE_TIMING_LOG=1``).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+STAGES = ("fetch", "decode", "parse", "frame", "analytics", "style")
+PERCENTILES = (50, 95, 99)
+TIMING_WINDOW = int(os.environ.get("NSE_TIMING_WINDOW", "512"))
+LOG_LEVEL = logging.INFO if os.environ.get("NSE_TIMING_LOG", "0") in ("1", "true", "yes") else logging.DEBUG
+
+
+class StageStats:
+    """Durations (ms) of one stage: the last ``window`` in a ring, plus lifetime totals."""
+
+    def __init__(self, window=TIMING_WINDOW):
+        self._ms = np.zeros(window)
+        self.count = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+
+    def add(self, ms):
+        self._ms[self.count % len(self._ms)] = ms
+        self.count += 1
+        self.total_ms += ms
+        self.last_ms = ms
+
+    def recent(self):
+        return self._ms[:min(self.count, len(self._ms))]
+
+    def percentiles(self, qs=PERCENTILES):
+        recent = self.recent()
+        if not len(recent):
+            return [0.0] * len(qs)
+        return np.percentile(recent, qs).tolist()
+
+
+class StageTimer:
+    def __init__(self, window=TIMING_WINDOW):
+        self.window = window
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, ms, **fields):
+        with self._lock:
+            stats = self._stats.get(stage)
+            if stats is None:
+                stats = self._stats[stage] = StageStats(self.window)
+            stats.add(ms)
+        if log.isEnabledFor(LOG_LEVEL):
+            log.log(LOG_LEVEL, json.dumps({"event": "stage", "stage": stage, "ms": round(ms, 3), **fields},
+                                          default=str))
+
+    @contextmanager
+    def time(self, stage, **fields):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - t0) * 1000, **fields)
+
+    def summary(self):
+        """``{stage: {count, last_ms, mean_ms, p50_ms, p95_ms, p99_ms}}`` in pipeline order."""
+        with self._lock:
+            items = sorted(self._stats.items(),
+                           key=lambda kv: STAGES.index(kv[0]) if kv[0] in STAGES else len(STAGES))
+            out = {}
+            for stage, s in items:
+                row = {"count": s.count, "last_ms": s.last_ms, "mean_ms": s.total_ms / s.count}
+                row.update((f"p{q}_ms", v) for q, v in zip(PERCENTILES, s.percentiles()))
+                out[stage] = row
+        return out
+
+    def table(self) -> pd.DataFrame:
+        return pd.DataFrame.from_dict(self.summary(), orient="index").rename_axis("stage")
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+stage_timer = StageTimer()
+
+
+def timed(stage, **fields):
+    """``with timed("decode", symbol=s): ...`` - time a block into ``stage_timer``."""
+    return stage_timer.time(stage, **fields)
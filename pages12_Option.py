@@ -1,40 +1,25 @@
 # filename: pages11_Option.py
-import requests
-import pandas as pd
 import streamlit as st
+from oi_core import (
+    INDEX_SYMBOLS, CssGrid, atm_window, debug_sidebar, fmt_pcr, frame_digest, get_chain, pcr,
+    rocket_signal, safe_int, start_collector, styled_dataframe, trend_label,
+)
 from datetime import datetime
 from streamlit_autorefresh import st_autorefresh
 
-st.set_page_config(page_title="NIFTY & BANKNIFTY Option Chain - OI Tracker", layout="wide")
+st.set_page_config(page_title="NSE Index Option Chain - OI Tracker", layout="wide")
+
+# Shared background poller: reruns read its latest snapshot instead of hitting NSE
+start_collector()
+debug_sidebar()  # stage timings, with ?debug=1 in the URL or NSE_DEBUG=1
 
 # ----------------- Auto-refresh (30 seconds) -----------------
 # triggers a rerun every 30000 ms (30s)
 _ = st_autorefresh(interval=30000, limit=None, key="refresh_counter")
 
-# ----------------- Helpers -----------------
-def fetch_option_chain(symbol: str):
-    url = f"https://www.nseindia.com/api/option-chain-indices?symbol={symbol}"
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": "https://www.nseindia.com/"
-    }
-    s = requests.Session()
-    # initial visit to set cookies (NSE often needs this)
-    s.get("https://www.nseindia.com", headers=headers, timeout=5)
-    r = s.get(url, headers=headers, timeout=10)
-    r.raise_for_status()
-    return r.json()
-
-def safe_int(x):
-    try:
-        return int(round(float(x)))
-    except Exception:
-        return 0
-
 # ----------------- UI -----------------
-st.title("📊 NIFTY / BANKNIFTY Option Chain — OI Tracker")
-symbol = st.radio("Select Index", ["NIFTY", "BANKNIFTY"], horizontal=True)
+st.title("📊 NSE Index Option Chain — OI Tracker")
+symbol = st.radio("Select Index", list(INDEX_SYMBOLS), horizontal=True)
 
 # Manual refresh (label chosen: ♻️ Manual Refresh)
 if st.button("♻️ Manual Refresh"):
@@ -42,155 +27,60 @@ if st.button("♻️ Manual Refresh"):
 
 # ----------------- Fetch data -----------------
 try:
-    raw = fetch_option_chain(symbol)
+    chain = get_chain(symbol)
 except Exception as e:
     st.error(f"Failed to fetch option chain: {e}")
     st.stop()
 
-records = raw.get("records") or {}
-expiry_dates = records.get("expiryDates") or []
-data_list = records.get("data") or raw.get("filtered", {}).get("data") or raw.get("data") or []
-
-# robust underlying value lookup
-underlying_value = records.get("underlyingValue") or raw.get("underlyingValue") or None
-if underlying_value is None:
-    for d in data_list:
-        for side in ("CE", "PE"):
-            s = d.get(side)
-            if s and s.get("underlyingValue") is not None:
-                underlying_value = s.get("underlyingValue")
-                break
-        if underlying_value is not None:
-            break
-
-# build expiry list if missing
-if not expiry_dates and data_list:
-    expiry_dates = sorted({d.get("expiryDate") for d in data_list if d.get("expiryDate")})
-
-if not expiry_dates:
+if not chain.expiry_dates:
     st.error("Could not find expiry dates in the NSE response.")
     st.stop()
 
 # ----------------- Expiry selection -----------------
-selected_expiry = st.selectbox(
-    "Select Expiry (default = current week)",
-    options=expiry_dates,
-    index=0
-)
-
-filtered_rows = [r for r in data_list if r.get("expiryDate") == selected_expiry]
-if not filtered_rows:
+selected_expiry = st.selectbox("Select Expiry (default = current week)", options=chain.expiry_dates, index=0)
+if selected_expiry not in chain:
     st.error(f"No strikes found for selected expiry: {selected_expiry}")
     st.stop()
 
-spot_price = float(underlying_value) if underlying_value is not None else 0.0
+spot_price = chain.spot_price
 
 # ----------------- Build DataFrame -----------------
-rows = []
-for r in filtered_rows:
-    strike = safe_int(r.get("strikePrice", 0))
-    ce = r.get("CE") or {}
-    pe = r.get("PE") or {}
-
-    # intrinsic values (IV)
-    ce_iv = max(spot_price - strike, 0)    # CE intrinsic
-    pe_iv = max(strike - spot_price, 0)    # PE intrinsic
-
-    ce_ltp = safe_int(ce.get("lastPrice", 0))
-    pe_ltp = safe_int(pe.get("lastPrice", 0))
-
-    # risk formulas as per your provided code:
-    # CE_Risk = CE_LTP - CE_IV ; PE_Risk = PE_LTP - PE_IV
-    ce_risk = safe_int(ce_ltp - ce_iv)
-    pe_risk = safe_int(pe_ltp - pe_iv)
-
-    rows.append({
-        "strikePrice": strike,
-        "CE_OI": safe_int(ce.get("openInterest", 0)),
-        "CE_pchgOI": safe_int(ce.get("pchangeinOpenInterest", 0)),
-        "CE_LTP": ce_ltp,
-        "CE_Risk": ce_risk,
-        "PE_LTP": pe_ltp,
-        "PE_pchgOI": safe_int(pe.get("pchangeinOpenInterest", 0)),
-        "PE_OI": safe_int(pe.get("openInterest", 0)),
-        "PE_Risk": pe_risk
-    })
-
-df = pd.DataFrame(rows).drop_duplicates(subset=["strikePrice"]).sort_values("strikePrice").reset_index(drop=True)
+df = chain.frame(selected_expiry)
 
 if df.empty:
     st.error("No strike data available.")
     st.stop()
 
 # ----------------- ATM-centric selection (±5 strikes) -----------------
-atm_idx_full = (df["strikePrice"] - spot_price).abs().idxmin()
-window_before = 5
-window_after = 5
-start_idx = max(0, int(atm_idx_full) - window_before)
-end_idx = min(len(df) - 1, int(atm_idx_full) + window_after)
-df_filtered = df.iloc[start_idx:end_idx + 1].copy().reset_index(drop=True)
-
-# ensure ascending order
-df_filtered = df_filtered.sort_values("strikePrice").reset_index(drop=True)
-
-# recompute ATM index & strike
-atm_idx_filtered = (df_filtered["strikePrice"] - spot_price).abs().idxmin()
-atm_strike = int(df_filtered.loc[atm_idx_filtered, "strikePrice"])
-
-# ----------------- Derived columns -----------------
-# CE-PE difference column
-df_filtered["CE_PE_Diff"] = df_filtered["CE_Risk"] - df_filtered["PE_Risk"]
-
-# PCR calculations
-total_pe_oi = int(df_filtered["PE_OI"].sum())
-total_ce_oi = int(df_filtered["CE_OI"].sum())
-total_pcr = (total_pe_oi / total_ce_oi) if total_ce_oi != 0 else float("inf")
-trend = "🟢 Bullish" if total_pcr > 1 else "🔴 Bearish"
+ladder = chain.ladder(selected_expiry)
+atm_idx_full = ladder.atm(spot_price)
+win = atm_window(df, spot_price, before=5, after=5, atm_idx=atm_idx_full)
+df_filtered = win.df
+atm_idx_filtered = win.atm_idx
+atm_strike = int(win.atm_strike)
+
+# ----------------- PCR calculations -----------------
+total_pe_oi, total_ce_oi = ladder.window(atm_idx_full, 5)
+total_pcr = pcr(total_pe_oi, total_ce_oi)
+trend = trend_label(total_pcr)
 
 # ATM ±4 PCR
-start_atm_idx = max(0, int(atm_idx_filtered) - 4)
-end_atm_idx = min(len(df_filtered) - 1, int(atm_idx_filtered) + 4)
-df_atm_window = df_filtered.iloc[start_atm_idx:end_atm_idx+1]
-atm_pe_oi = int(df_atm_window["PE_OI"].sum())
-atm_ce_oi = int(df_atm_window["CE_OI"].sum())
-atm_pcr = (atm_pe_oi / atm_ce_oi) if atm_ce_oi != 0 else float("inf")
-atm_trend = "🟢 Bullish" if atm_pcr > 1 else "🔴 Bearish"
+atm_pe_oi, atm_ce_oi = ladder.window(atm_idx_full, 4)
+atm_pcr = pcr(atm_pe_oi, atm_ce_oi)
+atm_trend = trend_label(atm_pcr)
 
 # ATM ±5 PCR (for reference)
-start_atm_idx_5 = max(0, int(atm_idx_filtered) - 5)
-end_atm_idx_5 = min(len(df_filtered) - 1, int(atm_idx_filtered) + 5)
-df_atm_window_5 = df_filtered.iloc[start_atm_idx_5:end_atm_idx_5+1]
-atm5_pe_oi = df_atm_window_5["PE_OI"].sum()
-atm5_ce_oi = df_atm_window_5["CE_OI"].sum()
-atm5_pcr = (atm5_pe_oi / atm5_ce_oi) if atm5_ce_oi != 0 else float("inf")
-atm5_trend = "🟢 Bullish" if atm5_pcr > 1 else "🔴 Bearish"
+atm5_pe_oi, atm5_ce_oi = ladder.window(atm_idx_full, 5)
+atm5_pcr = pcr(atm5_pe_oi, atm5_ce_oi)
+atm5_trend = trend_label(atm5_pcr)
 
 # ATM row percent change values for rocket logic
-atm_row = df_filtered.iloc[atm_idx_filtered]
+atm_row = win.atm_row
 atm_ce_pct = int(atm_row.get("CE_pchgOI", 0))
 atm_pe_pct = int(atm_row.get("PE_pchgOI", 0))
 
 # ----------------- Rocket logic (your chosen rules) -----------------
-rocket_symbol = "⚪"
-rocket_text = "Neutral"
-
-if (total_pcr > 1) and (atm_pe_oi > atm_ce_oi) and (atm_pe_pct > 0):
-    rocket_symbol = "🟢🚀"
-    rocket_text = "Strong Bullish"
-elif (total_pcr < 1) and (atm_ce_oi > atm_pe_oi) and (atm_ce_pct > 0):
-    rocket_symbol = "🔴🚀"
-    rocket_text = "Strong Bearish"
-else:
-    # partial confirmations or divergence
-    if (total_pcr > 1 and atm_pe_oi > atm_ce_oi) or (atm_pe_pct > 0 and atm_pe_oi > atm_ce_oi):
-        rocket_symbol = "🟡⚠️"
-        rocket_text = "Bullish but Risky"
-    elif (total_pcr < 1 and atm_ce_oi > atm_pe_oi) or (atm_ce_pct > 0 and atm_ce_oi > atm_pe_oi):
-        rocket_symbol = "🟡⚠️"
-        rocket_text = "Bearish but Risky"
-    else:
-        rocket_symbol = "🤔"
-        rocket_text = "Conflict / Wait"
+rocket_symbol, rocket_text = rocket_signal(total_pcr, atm_pe_oi, atm_ce_oi, atm_pe_pct, atm_ce_pct)
 
 # ----------------- Prepare display table (symmetric layout) -----------------
 display = df_filtered.copy()
@@ -223,73 +113,51 @@ max_pe_oi = int(display["PE_OI"].max()) if not display["PE_OI"].empty else 0
 
 ATM_BG = "#fff8cc"  # light yellow
 
-def style_row(row):
-    styles = [''] * len(row)
-    col_idx = {col: i for i, col in enumerate(display.columns)}
+def style_table():
+    grid = CssGrid(display)
 
     # CE%OI positive => shade CE side columns (light red)
-    if int(row["CE_%OI"]) > 0:
-        for c in ["CE_LTP", "CE_%OI", "CE_Risk", "CE_OI"]:
-            styles[col_idx[c]] = 'background-color: #ffcdd2'
+    grid.set(display["CE_%OI"] > 0, ["CE_LTP", "CE_%OI", "CE_Risk", "CE_OI"], 'background-color: #ffcdd2')
 
     # PE%OI positive => shade PE side columns (light green)
-    if int(row["PE_%OI"]) > 0:
-        for c in ["PE_LTP", "PE_%OI", "PE_Risk", "PE_OI"]:
-            styles[col_idx[c]] = 'background-color: #c8e6c9'
+    grid.set(display["PE_%OI"] > 0, ["PE_LTP", "PE_%OI", "PE_Risk", "PE_OI"], 'background-color: #c8e6c9')
 
     # Max OI emphasis
-    if int(row["CE_OI"]) == max_ce_oi and max_ce_oi > 0:
-        styles[col_idx["CE_OI"]] = 'background-color: #e57373; font-weight: bold'
-    if int(row["PE_OI"]) == max_pe_oi and max_pe_oi > 0:
-        styles[col_idx["PE_OI"]] = 'background-color: #81c784; font-weight: bold'
+    grid.set((display["CE_OI"] == max_ce_oi) & (max_ce_oi > 0), ["CE_OI"], 'background-color: #e57373; font-weight: bold')
+    grid.set((display["PE_OI"] == max_pe_oi) & (max_pe_oi > 0), ["PE_OI"], 'background-color: #81c784; font-weight: bold')
 
     # CE-PE Diff color coding
-    diff_val = int(row["CE_PE_Diff"])
-    if diff_val > 0:
-        styles[col_idx["CE_PE_Diff"]] = 'color: green; font-weight: 700'
-    elif diff_val < 0:
-        styles[col_idx["CE_PE_Diff"]] = 'color: red; font-weight: 700'
-    else:
-        styles[col_idx["CE_PE_Diff"]] = 'color: black'
+    grid.signed("CE_PE_Diff", 'color: green; font-weight: 700', 'color: red; font-weight: 700', 'color: black', replace=True)
 
     # Signed Risk colors for CE_Risk / PE_Risk
     for col in ["CE_Risk", "PE_Risk"]:
-        val = int(row[col])
-        prev = styles[col_idx[col]]
-        if val > 0:
-            styles[col_idx[col]] = (prev + '; color: green') if prev else 'color: green'
-        elif val < 0:
-            styles[col_idx[col]] = (prev + '; color: red') if prev else 'color: red'
-        else:
-            styles[col_idx[col]] = (prev + '; color: black') if prev else 'color: black'
-
-    # Entire ATM row highlight (full background) using validation check
-    strike_label = str(row["StrikeLabel"])
-    if strike_label.startswith("[ATM]"):
-        for i in range(len(styles)):
-            styles[i] = (styles[i] + f'; background-color: {ATM_BG}') if styles[i] else f'background-color: {ATM_BG}'
-        # bold + border for StrikeLabel cell
-        styles[col_idx["StrikeLabel"]] = (styles[col_idx["StrikeLabel"]] + '; border: 2px solid #000; font-weight: 700') if styles[col_idx["StrikeLabel"]] else '; border: 2px solid #000; font-weight: 700'
-
-    return styles
-
-styled = display.style.apply(style_row, axis=1)
+        grid.signed(col, 'color: green', 'color: red', 'color: black')
+
+    # Entire ATM row highlight (full background), bold + border for StrikeLabel cell
+    atm_rows = display["StrikeLabel"].astype(str).str.startswith("[ATM]")
+    grid.add_row(atm_rows, f'background-color: {ATM_BG}')
+    grid.add(atm_rows, ["StrikeLabel"], 'border: 2px solid #000; font-weight: 700')
+    return grid.style()
 
 # ----------------- Top PCR display -----------------
 st.markdown(f"### 🧭 Spot: **{safe_int(spot_price)}** ({symbol})")
-pcr_display = (f"{total_pcr:.2f}" if total_pcr != float("inf") else "∞")
-atm_pcr_display = (f"{atm_pcr:.2f}" if atm_pcr != float("inf") else "∞")
-atm5_pcr_display = (f"{atm5_pcr:.2f}" if atm5_pcr != float("inf") else "∞")
+pcr_display = fmt_pcr(total_pcr)
+atm_pcr_display = fmt_pcr(atm_pcr)
+atm5_pcr_display = fmt_pcr(atm5_pcr)
 st.markdown(f"**PCR (Put/Call Ratio on displayed strikes): {pcr_display} → {trend}**")
 st.markdown(f"**PCR (ATM ±4 strikes): {atm_pcr_display} → {atm_trend}**")
 st.markdown(f"**PCR (ATM ±5 strikes): {atm5_pcr_display} → {atm5_trend}**")
 
 # ----------------- Display table -----------------
+with st.expander("📐 PCR by ATM window (±2 … ±20)"):
+    pcr_windows = ladder.pcr_table(atm_idx_full)
+    pcr_windows["Trend"] = pcr_windows["PCR"].apply(trend_label)
+    pcr_windows["PCR"] = pcr_windows["PCR"].apply(fmt_pcr)
+    st.dataframe(pcr_windows, use_container_width=True, hide_index=True)
+
 st.write("### 🔍 ATM ±5 Strike Option Chain (ascending strikes)")
-try:
-    st.dataframe(styled, use_container_width=True, hide_index=True)
-except Exception:
-    st.write(styled.to_html(), unsafe_allow_html=True)
+table_key = (symbol, selected_expiry, 5, frame_digest(display, atm_strike))
+styled_dataframe(table_key, style_table)
 
 # ----------------- Summary columns -----------------
 col1, col2 = st.columns([1,1])
@@ -1,145 +1,75 @@
 # filename: pages_Option_Chain_Full.py
-import requests
 import pandas as pd
 import streamlit as st
+from oi_core import (
+    INDEX_SYMBOLS, PCT_COLUMNS, OiSeries, atm_window, debug_sidebar, frame_digest, get_chain,
+    max_oi_history, nearest_index, pcr, safe_float, start_collector, styled_dataframe,
+    tracker_styler, tracker_table, trend_label,
+)
 from datetime import datetime, timedelta
 from streamlit_autorefresh import st_autorefresh
 import altair as alt
 
-st.set_page_config(page_title="NIFTY & BANKNIFTY Option Chain - Full OI Tracker", layout="wide")
+st.set_page_config(page_title="NSE Index Option Chain - Full OI Tracker", layout="wide")
+
+# Shared background poller: reruns read its latest snapshot instead of hitting NSE
+start_collector()
+debug_sidebar()  # stage timings, with ?debug=1 in the URL or NSE_DEBUG=1
 
 # ----------------- Auto-refresh (every 30 sec) -----------------
 _ = st_autorefresh(interval=30*1000, limit=None, key="auto_refresh")  # 30 sec
 
-# ----------------- Helpers -----------------
-def fetch_option_chain(symbol):
-    url = f"https://www.nseindia.com/api/option-chain-indices?symbol={symbol}"
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": "https://www.nseindia.com/"
-    }
-    s = requests.Session()
-    s.get("https://www.nseindia.com", headers=headers, timeout=5)
-    r = s.get(url, headers=headers, timeout=10)
-    r.raise_for_status()
-    return r.json()
-
-def safe_float(x):
-    try:
-        return round(float(x), 1)
-    except:
-        return 0.0
-
 # ----------------- UI -----------------
-st.title("📊 NIFTY / BANKNIFTY Option Chain — Full OI Tracker")
-symbol = st.radio("Select Index", ["NIFTY", "BANKNIFTY"], horizontal=True)
+st.title("📊 NSE Index Option Chain — Full OI Tracker")
+symbol = st.radio("Select Index", list(INDEX_SYMBOLS), horizontal=True)
 
 if st.button("🔄 Refresh Now"):
-    st.experimental_rerun()
+    st.rerun()
 
 # ----------------- Fetch data -----------------
 try:
-    raw = fetch_option_chain(symbol)
+    chain = get_chain(symbol)
 except Exception as e:
     st.error(f"Failed to fetch option chain: {e}")
     st.stop()
 
-records = raw.get("records") or {}
-expiry_dates = records.get("expiryDates") or []
-data_list = records.get("data") or raw.get("filtered", {}).get("data") or raw.get("data") or []
-
-underlying_value = records.get("underlyingValue") or raw.get("underlyingValue")
-if underlying_value is None:
-    for d in data_list:
-        for side in ("CE", "PE"):
-            s = d.get(side)
-            if s and s.get("underlyingValue") is not None:
-                underlying_value = s.get("underlyingValue")
-                break
-        if underlying_value is not None:
-            break
-
-if not expiry_dates and data_list:
-    expiry_dates = sorted({d.get("expiryDate") for d in data_list if d.get("expiryDate")})
-if not expiry_dates:
+if not chain.expiry_dates:
     st.error("Could not find expiry dates in the NSE response.")
     st.stop()
 
 # ----------------- Expiry selection -----------------
-selected_expiry = st.selectbox(
-    "Select Expiry (default = current week)",
-    options=expiry_dates,
-    index=0
-)
-filtered_rows = [r for r in data_list if r.get("expiryDate") == selected_expiry]
-if not filtered_rows:
+selected_expiry = st.selectbox("Select Expiry (default = current week)", options=chain.expiry_dates, index=0)
+if selected_expiry not in chain:
     st.error(f"No strikes found for selected expiry: {selected_expiry}")
     st.stop()
 
-spot_price = safe_float(underlying_value)
+spot_price = safe_float(chain.underlying_value)
 
 # ----------------- Build DataFrame -----------------
-rows = []
-for r in filtered_rows:
-    strike = safe_float(r.get("strikePrice", 0))
-    ce = r.get("CE") or {}
-    pe = r.get("PE") or {}
-
-    ce_ltp = safe_float(ce.get("lastPrice", 0))
-    pe_ltp = safe_float(pe.get("lastPrice", 0))
-
-    ce_iv = max(spot_price - strike,0)
-    pe_iv = max(strike - spot_price,0)
-
-    ce_risk = safe_float(ce_ltp - ce_iv)
-    pe_risk = safe_float(pe_ltp - pe_iv)
-    ce_pe_diff = safe_float(ce_risk - pe_risk)
-
-    rows.append({
-        "strikePrice": strike,
-        "CE_LTP": ce_ltp,
-        "CE_%OI": safe_float(ce.get("pchangeinOpenInterest",0)),
-        "CE_Risk": ce_risk,
-        "CE_OI": safe_float(ce.get("openInterest",0)),
-        "PE_LTP": pe_ltp,
-        "PE_%OI": safe_float(pe.get("pchangeinOpenInterest",0)),
-        "PE_Risk": pe_risk,
-        "PE_OI": safe_float(pe.get("openInterest",0)),
-        "CE_PE_Diff": ce_pe_diff
-    })
-
-df = pd.DataFrame(rows).drop_duplicates(subset=["strikePrice"]).sort_values("strikePrice").reset_index(drop=True)
+df = chain.frame(selected_expiry, ndigits=1).rename(columns=PCT_COLUMNS)
 if df.empty:
     st.error("No strike data available after parsing.")
     st.stop()
 
 # ----------------- ATM ±6 table -----------------
-atm_idx = (df["strikePrice"] - spot_price).abs().idxmin()
-window_before = 6
-window_after = 6
-start_idx = max(0,int(atm_idx)-window_before)
-end_idx = min(len(df)-1,int(atm_idx)+window_after)
-df_filtered = df.iloc[start_idx:end_idx+1].copy().reset_index(drop=True)
-atm_strike = df_filtered["strikePrice"].iloc[(df_filtered["strikePrice"]-spot_price).abs().argmin()]
+ladder = chain.ladder(selected_expiry, ndigits=1)
+atm_idx_full = ladder.atm(spot_price)
+win = atm_window(df, spot_price, before=6, after=6, atm_idx=atm_idx_full)
+df_filtered = win.df
+atm_idx_filtered = win.atm_idx
+atm_strike = win.atm_strike
 
 # ----------------- PCR -----------------
-total_pe_oi = df_filtered["PE_OI"].sum()
-total_ce_oi = df_filtered["CE_OI"].sum()
-total_pcr = (total_pe_oi/total_ce_oi) if total_ce_oi!=0 else float("inf")
-trend = "🟢 Bullish" if total_pcr>1 else "🔴 Bearish"
-
-atm_idx_filtered = df_filtered["strikePrice"].sub(spot_price).abs().idxmin()
-start_atm_idx = max(0,int(atm_idx_filtered)-4)
-end_atm_idx = min(len(df_filtered)-1,int(atm_idx_filtered)+4)
-df_atm_window = df_filtered.iloc[start_atm_idx:end_atm_idx+1]
-atm_pe_oi = df_atm_window["PE_OI"].sum()
-atm_ce_oi = df_atm_window["CE_OI"].sum()
-atm_pcr = (atm_pe_oi/atm_ce_oi) if atm_ce_oi!=0 else float("inf")
-atm_trend = "🟢 Bullish" if atm_pcr>1 else "🔴 Bearish"
+total_pe_oi, total_ce_oi = ladder.window(atm_idx_full, 6)
+total_pcr = pcr(total_pe_oi, total_ce_oi)
+trend = trend_label(total_pcr)
+
+atm_pe_oi, atm_ce_oi = ladder.window(atm_idx_full, 4)
+atm_pcr = pcr(atm_pe_oi, atm_ce_oi)
+atm_trend = trend_label(atm_pcr)
 
 # ----------------- Rocket logic -----------------
-atm_row = df_filtered[df_filtered["strikePrice"]==atm_strike].iloc[0]
+atm_row = win.atm_row
 rocket_symbol = "⚪"
 rocket_text = "Neutral"
 if (total_pcr>1) and (atm_pe_oi>atm_ce_oi) and (atm_row["PE_%OI"]>0):
@@ -153,50 +83,9 @@ else:
     rocket_text="Conflict / Wait"
 
 # ----------------- Display table -----------------
-display = df_filtered.copy()
-display["Strike"] = display["strikePrice"].apply(lambda s: f"[ATM] {s}" if s==atm_strike else f"{s}")
-
-# Reorder columns as requested
-display = display[["CE_OI","CE_%OI","CE_Risk","CE_PE_Diff","CE_LTP","Strike","PE_LTP","PE_Risk","PE_%OI","PE_OI"]]
-
-# Styling
+display = tracker_table(win)
 max_ce_oi = df_filtered["CE_OI"].max()
 max_pe_oi = df_filtered["PE_OI"].max()
-def style_row(row):
-    styles=[""]*len(row)
-    col_idx = {col:i for i,col in enumerate(display.columns)}
-
-    # Fresh OI
-    if row["CE_%OI"]>0:
-        for c in ["CE_OI","CE_%OI","CE_Risk","CE_PE_Diff","CE_LTP"]:
-            styles[col_idx[c]]='background-color:#ffcdd2'
-    if row["PE_%OI"]>0:
-        for c in ["PE_OI","PE_%OI","PE_Risk","PE_LTP"]:
-            styles[col_idx[c]]='background-color:#c8e6c9'
-
-    # Max OI highlight
-    if row["CE_OI"]==max_ce_oi:
-        styles[col_idx["CE_OI"]]='background-color:#e57373;font-weight:700'
-    if row["PE_OI"]==max_pe_oi:
-        styles[col_idx["PE_OI"]]='background-color:#81c784;font-weight:700'
-
-    # Risk colors
-    if row["CE_Risk"]>0: styles[col_idx["CE_Risk"]]='color:green;font-weight:700'
-    elif row["CE_Risk"]<0: styles[col_idx["CE_Risk"]]='color:red;font-weight:700'
-    if row["PE_Risk"]>0: styles[col_idx["PE_Risk"]]='color:green;font-weight:700'
-    elif row["PE_Risk"]<0: styles[col_idx["PE_Risk"]]='color:red;font-weight:700'
-    if row["CE_PE_Diff"]>0: styles[col_idx["CE_PE_Diff"]]='color:green;font-weight:700'
-    elif row["CE_PE_Diff"]<0: styles[col_idx["CE_PE_Diff"]]='color:red;font-weight:700'
-
-    # ATM strike
-    if str(row["Strike"]).startswith("[ATM]"):
-        for i in range(len(styles)):
-            styles[i] = (styles[i]+'; background-color:#fff8cc') if styles[i] else 'background-color:#fff8cc'
-        styles[col_idx["Strike"]]+='; border:2px solid #000;font-weight:700'
-
-    return styles
-
-styled = display.style.apply(style_row, axis=1)
 
 # ----------------- Display -----------------
 ist_now = datetime.utcnow() + timedelta(hours=5, minutes=30)  # convert UTC → IST
@@ -208,36 +97,18 @@ st.markdown(
 )
 
 st.write("### 🔍 ATM ±6 Strike Option Chain (with CE/PE Risk & CE-PE Diff)")
-st.dataframe(styled,use_container_width=True, hide_index=True)
+table_key = (symbol, selected_expiry, 6, frame_digest(display, atm_strike))
+styled_dataframe(table_key, lambda: tracker_styler(display, max_ce_oi, max_pe_oi))
 
 # ----------------- Max OI history chart -----------------
-if "max_oi_history" not in st.session_state:
-    st.session_state.max_oi_history = []
-
-# IST timestamp
-timestamp = (datetime.utcnow() + timedelta(hours=5, minutes=30)).strftime("%H:%M:%S")
-
-# Only consider ATM ±6 strikes for max OI chart
-atm_window_df = df_filtered.copy()
-
-max_ce_oi_strike = atm_window_df["CE_OI"].idxmax() if not atm_window_df.empty else 0
-max_ce_pct_strike = atm_window_df["CE_%OI"].idxmax() if not atm_window_df.empty else 0
-max_pe_oi_strike = atm_window_df["PE_OI"].idxmax() if not atm_window_df.empty else 0
-max_pe_pct_strike = atm_window_df["PE_%OI"].idxmax() if not atm_window_df.empty else 0
-
-st.session_state.max_oi_history.append({
-    "time":timestamp,
-    "Max_CE_OI":atm_window_df.loc[max_ce_oi_strike,"strikePrice"] if not atm_window_df.empty else 0,
-    "Max_CE_%OI":atm_window_df.loc[max_ce_pct_strike,"strikePrice"] if not atm_window_df.empty else 0,
-    "Max_PE_OI":atm_window_df.loc[max_pe_oi_strike,"strikePrice"] if not atm_window_df.empty else 0,
-    "Max_PE_%OI":atm_window_df.loc[max_pe_pct_strike,"strikePrice"] if not atm_window_df.empty else 0,
-})
-
-st.session_state.max_oi_history = st.session_state.max_oi_history[-20:]
-hist_df = pd.DataFrame(st.session_state.max_oi_history).set_index("time")
+# Shared across sessions; the collector adds one point per changed snapshot (ATM ±6 strikes)
+hist_df = max_oi_history.frame(symbol, selected_expiry, window=6)
 
 # ----------------- Manual Y-axis -----------------
-manual_min_y = st.number_input("Set chart Y-axis minimum:", min_value=0, value=24000, step=50)
+# One input per index: strike levels and spacing differ, so start at the lowest strike shown
+strike_step = max(1, int(df_filtered["strikePrice"].diff().min())) if len(df_filtered) > 1 else 50
+manual_min_y = st.number_input("Set chart Y-axis minimum:", min_value=0, value=int(df_filtered["strikePrice"].min()),
+                               step=strike_step, key=f"min_y_{symbol}")
 
 st.write("### 📈 Max CE/PE OI & %OI Strike Evolution (Last 20 snapshots)")
 
@@ -249,3 +120,28 @@ if not hist_df.empty:
         tooltip=['time', 'variable', 'value']
     ).interactive()
     st.altair_chart(chart, use_container_width=True)
+
+# ----------------- Strike history (memory-mapped OI archive) -----------------
+st.write("### 🗄️ Strike OI & LTP History (archived snapshots)")
+series = OiSeries(symbol, selected_expiry)
+if len(series):
+    archived_strikes = series.strikes
+    c1, c2 = st.columns(2)
+    hist_strike = c1.selectbox("Strike", archived_strikes.tolist(), index=nearest_index(archived_strikes, atm_strike),
+                               format_func=lambda s: f"{s:g}")
+    hist_days = c2.selectbox("Range", [1, 7], format_func=lambda d: "Today" if d == 1 else f"Last {d} days")
+    since = pd.Timestamp.now(tz="Asia/Kolkata").normalize() - pd.Timedelta(days=hist_days - 1)
+    strike_hist = series.strike_history(hist_strike, start=since).reset_index()
+    if not strike_hist.empty:
+        for cols, title in ((["CE_OI", "PE_OI"], "OI"), (["CE_LTP", "PE_LTP"], "LTP")):
+            hist_chart = alt.Chart(strike_hist.melt(id_vars="time", value_vars=cols)).mark_line().encode(
+                x="time:T",
+                y=alt.Y("value:Q", title=title),
+                color="variable:N",
+                tooltip=["time", "variable", "value"]
+            ).interactive()
+            st.altair_chart(hist_chart, use_container_width=True)
+    else:
+        st.info("No archived snapshots for this strike in the selected range.")
+else:
+    st.info("No archived snapshots for this expiry yet.")
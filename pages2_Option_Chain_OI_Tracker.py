@@ -1,22 +1,12 @@
-import requests
 import pandas as pd
 import streamlit as st
+from oi_core import debug_sidebar, get_option_chain, invalidate_option_chain, start_collector
 
 st.set_page_config(page_title="NIFTY & BANKNIFTY Option Chain", layout="wide")
 
-# ----------------- FUNCTION TO FETCH DATA -----------------
-@st.cache_data(ttl=60)
-def get_option_chain(symbol):
-    url = f"https://www.nseindia.com/api/option-chain-indices?symbol={symbol}"
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": "https://www.nseindia.com/",
-    }
-    session = requests.Session()
-    response = session.get(url, headers=headers)
-    data = response.json()
-    return data
+# Shared background poller: reruns read its latest snapshot instead of hitting NSE
+start_collector()
+debug_sidebar()  # stage timings, with ?debug=1 in the URL or NSE_DEBUG=1
 
 # ----------------- MAIN APP -----------------
 st.title("📊 NIFTY / BANKNIFTY Option Chain - OI Tracker")
@@ -117,5 +107,5 @@ with col2:
 
 # ----------------- REFRESH BUTTON -----------------
 if st.button("🔄 Refresh Data"):
-    st.cache_data.clear()
+    invalidate_option_chain(symbol)
     st.rerun()
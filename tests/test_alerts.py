@@ -0,0 +1,96 @@
+import copy
+from types import SimpleNamespace
+
+from oi_core import AlertEngine, ChainIndex, RuleSet
+from oi_core.mock_nse import SyntheticMarket
+
+
+def _chain(market, symbol="NIFTY", previous=None, zero_ce_oi=False):
+    payload = market.payload(symbol)
+    if zero_ce_oi:
+        for row in payload["records"]["data"]:
+            if "CE" in row:
+                row["CE"]["openInterest"] = 0
+                row["CE"]["changeinOpenInterest"] = 0
+                row["CE"]["pchangeinOpenInterest"] = 0
+    return ChainIndex.from_payload(payload, previous=previous)
+
+
+def test_rule_on_infinite_pcr_does_not_break_alerts():
+    market = SyntheticMarket(20, 1, seed=3)
+    engine = AlertEngine(state_path="", rules=RuleSet([("no_calls", "pcr(4) > 2")]), dwell=0, cooldown=0)
+    alerts = engine.evaluate("NIFTY", _chain(market, zero_ce_oi=True), 1000.0)
+    rule_alerts = [a for a in alerts if a.kind == "rule"]
+    assert [a.rule for a in rule_alerts] == ["no_calls"]
+    assert rule_alerts[0].current == "∞"
+    assert engine.signal("NIFTY", rule_alerts[0].expiry) is not None
+
+
+def _leaning(payload, side, previous=None):
+    """``payload`` with ``side`` ("CE" / "PE") premiums raised, so the ATM CE_PE_Diff leans that way."""
+    payload = copy.deepcopy(payload)
+    for row in payload["records"]["data"]:
+        row[side]["lastPrice"] += 100
+    return ChainIndex.from_payload(payload, previous=previous)
+
+
+def _publish(engine, chain, fetched_at):
+    """What the collector does with a snapshot; returns the alerts it raised."""
+    before = len(engine.recent())
+    engine.on_snapshot(SimpleNamespace(key="NIFTY", parsed=chain, fetched_at=fetched_at))
+    return engine.recent()[before:]
+
+
+def _flips(alerts):
+    return [(a.previous, a.current) for a in alerts if a.kind == "flip"]
+
+
+def test_pending_flip_confirms_while_the_chain_is_unchanged():
+    payload = SyntheticMarket(20, 1, seed=3).payload("NIFTY")
+    engine = AlertEngine(state_path="", dwell=30, cooldown=0)
+    positive = _leaning(payload, "CE")
+    assert _publish(engine, positive, 1000.0) == []
+    negative = _leaning(payload, "PE", previous=positive)
+    assert _publish(engine, negative, 1010.0) == []  # pending
+    quiet = _leaning(payload, "PE", previous=negative)
+    assert not quiet.changes
+    raised = []
+    for t in (1020.0, 1040.0, 1060.0):
+        raised += _publish(engine, quiet, t)
+    assert _flips(raised) == [("Positive", "Negative")]
+
+
+def test_change_held_by_cooldown_is_raised_after_it_on_a_quiet_chain():
+    payload = SyntheticMarket(20, 1, seed=3).payload("NIFTY")
+    engine = AlertEngine(state_path="", dwell=0, cooldown=100)
+    positive = _leaning(payload, "CE")
+    _publish(engine, positive, 1000.0)
+    negative = _leaning(payload, "PE", previous=positive)
+    assert _flips(_publish(engine, negative, 1010.0)) == [("Positive", "Negative")]
+    back = _leaning(payload, "CE", previous=negative)
+    assert _flips(_publish(engine, back, 1020.0)) == []  # cooldown
+    quiet = _leaning(payload, "CE", previous=back)
+    assert _flips(_publish(engine, quiet, 1050.0)) == []
+    assert _flips(_publish(engine, quiet, 1300.0)) == [("Negative", "Positive")]
+
+
+def test_watched_views_are_evaluated_on_their_own_frame(tmp_path):
+    payload = SyntheticMarket(20, 2, seed=3).payload("NIFTY")
+    state = str(tmp_path / "alerts.json")
+    engine = AlertEngine(state_path=state, expiries=1, dwell=0, cooldown=0)
+    positive = _leaning(payload, "CE")
+    near, far = positive.expiry_dates[:2]
+    engine.watch("NIFTY", far)
+    engine.watch("NIFTY", near, risk="cross")
+    _publish(engine, positive, 1000.0)
+    negative = _leaning(payload, "PE", previous=positive)
+    flips = [a for a in _publish(engine, negative, 1010.0) if a.kind == "flip"]
+    assert sorted((a.expiry, a.view) for a in flips) == sorted([(near, ""), (far, ""), (near, "cross")])
+    cross = next(a for a in flips if a.view == "cross")
+    df = negative.frame(near, risk="cross")
+    atm = df.iloc[negative.ladder(near).atm(negative.spot_price)]
+    assert cross.row["CE_Risk"] == int(atm["CE_Risk"]) and cross.row["CE_PE_Diff"] == int(atm["CE_PE_Diff"])
+    assert engine.frame("NIFTY", view="cross")["expiry"].tolist() == [near]
+    restarted = AlertEngine(state_path=state, expiries=1, dwell=0, cooldown=0)
+    assert restarted.signal("NIFTY", near, risk="cross").sign == "Negative"
+    assert restarted.signal("NIFTY", far).sign == "Negative"
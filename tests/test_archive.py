@@ -0,0 +1,69 @@
+import os
+from types import SimpleNamespace
+
+from oi_core import ChainIndex, OiArchive, OiSeries
+from oi_core.mock_nse import SyntheticMarket
+
+
+def _chains(n, seed=3):
+    market = SyntheticMarket(20, 1, seed=seed)
+    chain = None
+    for _ in range(n):
+        chain = ChainIndex.from_payload(market.payload("NIFTY"), previous=chain)
+        yield chain
+
+
+def test_reopened_segment_drops_a_torn_row(tmp_path):
+    first, second, third = _chains(3)
+    expiry = first.expiry_dates[0]
+    OiArchive(str(tmp_path)).append("NIFTY", first, 1000.0)
+    OiArchive(str(tmp_path)).append("NIFTY", second, 1030.0)
+    (segment,) = OiSeries("NIFTY", expiry, root=str(tmp_path)).segments
+    times = os.path.join(segment.path, "times.i8")
+    os.truncate(times, os.path.getsize(times) - 8)  # crash between data.f4 and times.i8
+    OiArchive(str(tmp_path)).append("NIFTY", third, 1060.0)
+    series = OiSeries("NIFTY", expiry, root=str(tmp_path))
+    strike = float(series.strikes[0])
+    history = series.strike_history(strike, fields=("CE_OI",))
+    expected = [float(c.frame(expiry).set_index("strikePrice").loc[strike, "CE_OI"]) for c in (first, third)]
+    assert list(history["CE_OI"]) == expected
+
+
+def test_unchanged_snapshots_are_not_queued(tmp_path):
+    archive = OiArchive(str(tmp_path))
+    (chain,) = _chains(1)
+    payload = SyntheticMarket(20, 1, seed=3).payload("NIFTY")
+    again = ChainIndex.from_payload(payload, previous=ChainIndex.from_payload(payload))
+    assert not again.changes
+    for parsed in (chain, again):
+        archive.on_snapshot(SimpleNamespace(key="NIFTY", parsed=parsed, fetched_at=1000.0))
+    assert archive._queue.qsize() == 1
+
+
+def test_prune_deletes_old_closed_segments(tmp_path):
+    (chain,) = _chains(1)
+    expiry = chain.expiry_dates[0]
+    OiArchive(str(tmp_path)).append("NIFTY", chain, 1000.0)
+    (segment,) = OiSeries("NIFTY", expiry, root=str(tmp_path)).segments
+    written = os.path.getmtime(os.path.join(segment.path, "times.i8"))
+    archive = OiArchive(str(tmp_path), max_age_days=1, max_mb=0)
+    archive.prune(now=written + 3600)
+    assert archive.pruned == 0
+    archive.prune(now=written + 2 * 86400)
+    assert archive.pruned == 1
+    assert len(OiSeries("NIFTY", expiry, root=str(tmp_path))) == 0
+
+
+def test_expiry_that_left_the_chain_can_be_pruned(tmp_path):
+    payload = SyntheticMarket(20, 2, seed=3).payload("NIFTY")
+    gone, kept = payload["records"]["expiryDates"]
+    archive = OiArchive(str(tmp_path), max_age_days=1, max_mb=0)
+    archive.append("NIFTY", ChainIndex.from_payload(payload), 1000.0)
+    payload["records"]["expiryDates"] = [kept]
+    payload["records"]["data"] = [r for r in payload["records"]["data"] if r["expiryDate"] == kept]
+    archive.append("NIFTY", ChainIndex.from_payload(payload), 1030.0)
+    assert set(archive._segments) == {("NIFTY", kept)}
+    (segment,) = OiSeries("NIFTY", gone, root=str(tmp_path)).segments
+    archive.prune(now=os.path.getmtime(os.path.join(segment.path, "times.i8")) + 2 * 86400)
+    assert len(OiSeries("NIFTY", gone, root=str(tmp_path))) == 0
+    assert len(OiSeries("NIFTY", kept, root=str(tmp_path))) == 2
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from oi_core import SnapshotCache
+
+
+class _Loader:
+    """Counts loads; each load blocks until ``release`` is set and returns the load number."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, key):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        self.release.wait(5)
+        return f"{key}-{n}"
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_misses_share_one_load():
+    loader = _Loader()
+    cache = SnapshotCache(loader, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("NIFTY"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    _wait_for(lambda: cache.coalesced == 7)
+    loader.release.set()
+    for t in threads:
+        t.join(5)
+    assert results == ["NIFTY-1"] * 8
+    assert loader.calls == 1 and cache.misses == 1
+    assert cache.get("NIFTY") == "NIFTY-1" and cache.hits == 1
+
+
+def test_failed_load_is_raised_and_not_cached():
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        if len(calls) == 1:
+            raise ConnectionError("NSE down")
+        return "ok"
+
+    cache = SnapshotCache(loader, ttl=60)
+    with pytest.raises(ConnectionError):
+        cache.get("NIFTY")
+    assert cache.peek("NIFTY") is None
+    assert cache.get("NIFTY") == "ok"
+
+
+def test_stale_snapshot_is_served_while_one_refresh_runs():
+    loader = _Loader()
+    loader.release.set()
+    cache = SnapshotCache(loader, ttl=0.05, stale_ttl=60)
+    assert cache.get("NIFTY") == "NIFTY-1"
+    loader.release.clear()
+    time.sleep(0.06)
+    started = time.monotonic()
+    assert [cache.get("NIFTY") for _ in range(5)] == ["NIFTY-1"] * 5  # no reader waits on the refresh
+    assert time.monotonic() - started < 1
+    _wait_for(lambda: loader.calls == 2)
+    assert cache.stale_hits == 5 and loader.calls == 2  # one background refresh for all of them
+    loader.release.set()
+    _wait_for(lambda: cache.peek("NIFTY").data == "NIFTY-2")
+    assert cache.get("NIFTY") == "NIFTY-2"
+
+
+def test_parser_sees_the_snapshot_it_replaces():
+    cache = SnapshotCache(lambda key: 1, ttl=0, stale_ttl=0, parser=lambda data, previous: (previous or 0) + data)
+    assert [cache.get_snapshot("NIFTY").parsed for _ in range(3)] == [1, 2, 3]
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from oi_core import ChainIndex, MaxOiHistory, StrikeRing
+from oi_core.mock_nse import SyntheticMarket
+
+
+def test_copied_view_survives_appends():
+    ring = StrikeRing(capacity=2, width=1)
+    for ms in (1, 2):
+        ring.append(ms, [ms])
+    times, rows = ring.view(copy=True)
+    live_times, _ = ring.view()
+    ring.append(3, [3])
+    assert times.tolist() == [1, 2] and rows[:, 0].tolist() == [1, 2]
+    assert live_times.tolist() == [3, 2]  # the live view's oldest row was overwritten
+    assert np.array_equal(ring.view()[0], [2, 3])
+
+
+def test_frame_is_not_overwritten_by_later_snapshots():
+    market = SyntheticMarket(20, 1, seed=5)
+    history = MaxOiHistory(capacity=3)
+    chain = None
+    for t in range(3):
+        chain = ChainIndex.from_payload(market.payload("NIFTY"), previous=chain)
+        history.record("NIFTY", chain, 1000.0 + t)
+    expiry = chain.expiry_dates[0]
+    df = history.frame("NIFTY", expiry)
+    before = df.copy()
+    for t in range(3, 6):
+        chain = ChainIndex.from_payload(market.payload("NIFTY"), previous=chain)
+        history.record("NIFTY", chain, 1000.0 + t)
+    assert df.equals(before)
+    assert len(history.frame("NIFTY", expiry)) == 3
+
+
+def test_rings_of_expired_expiries_are_dropped():
+    market = SyntheticMarket(20, 2, seed=5)
+    history = MaxOiHistory()
+    chain = ChainIndex.from_payload(market.payload("NIFTY"))
+    history.on_snapshot(SimpleNamespace(key="NIFTY", parsed=chain, fetched_at=1000.0))
+    near = chain.expiry_dates[0]
+    payload = market.payload("NIFTY")
+    payload["records"]["expiryDates"] = payload["records"]["expiryDates"][1:]
+    payload["records"]["data"] = [r for r in payload["records"]["data"] if r["expiryDate"] != near]
+    history.record("NIFTY", ChainIndex.from_payload(payload), 1001.0)
+    assert {k[1] for k in history._rings} == {chain.expiry_dates[1]}
@@ -0,0 +1,97 @@
+import smtplib
+import threading
+import time
+
+import pytest
+
+from oi_core import Notification, Notifier, SmtpTransport, Transport
+
+
+class _Connection:
+    """Stands in for ``SmtpConnection``; the first send blocks until ``release`` so the rest queue up."""
+
+    connected = False
+
+    def __init__(self, fail_once=()):
+        self.sent = []
+        self.fail_once = set(fail_once)
+        self.release = threading.Event()
+
+    def send(self, msg):
+        self.release.wait(5)
+        if msg["Subject"] in self.fail_once:
+            self.fail_once.discard(msg["Subject"])
+            raise smtplib.SMTPServerDisconnected("dropped")
+        self.sent.append(msg["Subject"])
+
+
+class _Smtp(SmtpTransport):
+    def __init__(self, connection, batch_size):
+        super().__init__("user", "secret", "to@example.com", batch_size=batch_size)
+        self.connection = connection
+        self.batches = []
+
+    def _send_all(self, messages):
+        self.batches.append(len(messages))
+        return super()._send_all(messages)
+
+
+def test_queued_emails_go_out_in_batches_and_failures_are_retried_alone():
+    connection = _Connection(fail_once={"alert 3"})
+    transport = _Smtp(connection, batch_size=4)
+    notifier = Notifier(retries=2, backoff=0.01)
+    try:
+        futures = [notifier.submit(transport, Notification(f"alert {i}", "body")) for i in range(9)]
+        connection.release.set()
+        for future in futures:
+            assert future.result(5) is None
+    finally:
+        notifier.stop(5)
+    assert sorted(connection.sent) == sorted(f"alert {i}" for i in range(9))
+    assert max(transport.batches) == 4
+    assert len(transport.batches) <= 3  # the 8 or 9 queued while the first send blocked, 4 per pass
+
+
+class _Flaky(Transport):
+    """Fails the first ``failures`` sends of each subject; records when every attempt was made."""
+
+    name = "flaky"
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.attempts = {}
+
+    async def send(self, notification):
+        times = self.attempts.setdefault(notification.subject, [])
+        times.append(time.monotonic())
+        if len(times) <= self.failures:
+            raise ConnectionError(f"attempt {len(times)} failed")
+
+
+def test_failed_sends_are_retried_after_a_doubling_backoff():
+    transport = _Flaky(failures=2)
+    notifier = Notifier(retries=3, backoff=0.05)
+    try:
+        futures = [notifier.submit(transport, Notification(f"alert {i}", "body")) for i in range(3)]
+        for future in futures:
+            assert future.result(5) is None
+        assert notifier.depths() == {"flaky": 0}
+    finally:
+        notifier.stop(5)
+    for times in transport.attempts.values():
+        assert len(times) == 3
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        assert gaps[0] >= 0.05 and gaps[1] >= 0.1  # backoff * 2 ** attempt
+
+
+def test_send_fails_for_good_once_the_retries_are_used_up():
+    transport = _Flaky(failures=10)
+    notifier = Notifier(retries=2, backoff=0.01)
+    try:
+        future = notifier.submit(transport, Notification("alert", "body"))
+        with pytest.raises(ConnectionError, match="attempt 3 failed"):
+            future.result(5)
+        assert notifier.depths() == {"flaky": 0}
+    finally:
+        notifier.stop(5)
+    assert len(transport.attempts["alert"]) == 3  # the first send and two retries
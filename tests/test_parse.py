@@ -0,0 +1,183 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oi_core import PCT_COLUMNS, ChainIndex, build_chain_df, decode_option_chain, safe_float, safe_int
+from oi_core.mock_nse import SyntheticMarket
+from oi_core.parse import CHAIN_COLUMNS
+
+
+# -- the per-row frame builders of the pages before oi_core (first commit) -------------------
+
+def _baseline_int(rows, spot_price, risk="premium"):
+    """pages40 ("premium") / pages4 ("cross") DataFrame build, plus the CE_PE_Diff they derived."""
+    out = []
+    for r in rows:
+        strike = safe_int(r.get("strikePrice", 0))
+        ce = r.get("CE") or {}
+        pe = r.get("PE") or {}
+        ce_iv = max(spot_price - strike, 0)
+        pe_iv = max(strike - spot_price, 0)
+        ce_ltp = safe_int(ce.get("lastPrice", 0))
+        pe_ltp = safe_int(pe.get("lastPrice", 0))
+        if risk == "premium":
+            ce_risk = safe_int(ce_ltp - ce_iv)
+            pe_risk = safe_int(pe_ltp - pe_iv)
+        else:
+            ce_risk = safe_int(ce_iv - safe_int(pe.get("lastPrice", 0)))
+            pe_risk = safe_int(pe_iv - safe_int(ce.get("lastPrice", 0)))
+        out.append({
+            "strikePrice": strike,
+            "CE_OI": safe_int(ce.get("openInterest", 0)),
+            "CE_pchgOI": safe_int(ce.get("pchangeinOpenInterest", 0)),
+            "CE_LTP": ce_ltp,
+            "CE_Risk": ce_risk,
+            "PE_LTP": pe_ltp,
+            "PE_pchgOI": safe_int(pe.get("pchangeinOpenInterest", 0)),
+            "PE_OI": safe_int(pe.get("openInterest", 0)),
+            "PE_Risk": pe_risk,
+        })
+    df = pd.DataFrame(out).drop_duplicates(subset=["strikePrice"]).sort_values("strikePrice").reset_index(drop=True)
+    df["CE_PE_Diff"] = df["CE_Risk"] - df["PE_Risk"]
+    return df
+
+
+def _baseline_1dp(rows, spot_price):
+    """pages13 DataFrame build (one decimal, premium risk)."""
+    out = []
+    for r in rows:
+        strike = safe_float(r.get("strikePrice", 0))
+        ce = r.get("CE") or {}
+        pe = r.get("PE") or {}
+        ce_ltp = safe_float(ce.get("lastPrice", 0))
+        pe_ltp = safe_float(pe.get("lastPrice", 0))
+        ce_iv = max(spot_price - strike, 0)
+        pe_iv = max(strike - spot_price, 0)
+        ce_risk = safe_float(ce_ltp - ce_iv)
+        pe_risk = safe_float(pe_ltp - pe_iv)
+        out.append({
+            "strikePrice": strike,
+            "CE_LTP": ce_ltp,
+            "CE_%OI": safe_float(ce.get("pchangeinOpenInterest", 0)),
+            "CE_Risk": ce_risk,
+            "CE_OI": safe_float(ce.get("openInterest", 0)),
+            "PE_LTP": pe_ltp,
+            "PE_%OI": safe_float(pe.get("pchangeinOpenInterest", 0)),
+            "PE_Risk": pe_risk,
+            "PE_OI": safe_float(pe.get("openInterest", 0)),
+            "CE_PE_Diff": safe_float(ce_risk - pe_risk),
+        })
+    df = pd.DataFrame(out).drop_duplicates(subset=["strikePrice"]).sort_values("strikePrice").reset_index(drop=True)
+    return df.rename(columns={v: k for k, v in PCT_COLUMNS.items()})
+
+
+def _baseline(rows, underlying, risk, ndigits):
+    if ndigits is None:
+        return _baseline_int(rows, float(underlying), risk)
+    return _baseline_1dp(rows, safe_float(underlying))
+
+
+def _assert_same(df, expected):
+    assert list(df["strikePrice"]) == list(expected["strikePrice"])
+    for name in CHAIN_COLUMNS:
+        assert np.array_equal(df[name].to_numpy(), expected[name].to_numpy()), name
+
+
+# -- payloads ----------------------------------------------------------------------------------
+
+def _payloads(n, seed=11):
+    """Decoded synthetic payloads with rounding ties, a duplicate strike and bad legs mixed in."""
+    market = SyntheticMarket(12, 2, seed=seed)
+    for tick in range(n):
+        payload = decode_option_chain(market.load("NIFTY"))
+        records = payload["records"]
+        rows = records["data"]
+        if tick % 2:
+            records["underlyingValue"] = float(int(records["underlyingValue"])) + 0.5  # x.5 and x.x5 spot ties
+        for i, row in enumerate(rows):
+            if i % 5 == tick % 5:
+                row["CE"]["lastPrice"] = float(int(row["CE"]["lastPrice"])) + 0.5      # int tie
+                row["PE"]["lastPrice"] = float(int(row["PE"]["lastPrice"])) + 0.25     # one-decimal tie
+                row["CE"]["pchangeinOpenInterest"] = -2.5
+                row["PE"]["openInterest"] = 1234.5
+        rows[3]["PE"] = None                        # missing leg
+        rows[4]["CE"]["lastPrice"] = "-"            # NSE's placeholder for no trade
+        rows.insert(8, dict(rows[7], CE=dict(rows[7]["CE"], lastPrice=1.0)))  # duplicate strike: first wins
+        yield payload
+
+
+VIEWS = [("premium", None), ("cross", None), ("premium", 1)]
+
+
+@pytest.mark.parametrize("risk, ndigits", VIEWS)
+def test_build_chain_df_matches_the_per_row_pages(risk, ndigits):
+    for payload in _payloads(4):
+        chain = ChainIndex.from_payload(payload, eager=False)
+        for expiry in chain.expiry_dates:
+            rows = chain.rows(expiry)
+            expected = _baseline(rows, chain.underlying_value, risk, ndigits)
+            spot = chain.spot_price if ndigits is None else safe_float(chain.underlying_value, ndigits)
+            _assert_same(build_chain_df(rows, spot, risk=risk, ndigits=ndigits), expected)
+
+
+def _partial_ticks(payloads):
+    """Each payload, then copies of it with only the spot / only one leg / nothing changed."""
+    for payload in payloads:
+        yield payload
+        spot_only = copy.deepcopy(payload)
+        spot_only["records"]["underlyingValue"] += 37.5
+        yield spot_only
+        one_leg = copy.deepcopy(spot_only)
+        one_leg["records"]["data"][10]["CE"]["lastPrice"] = 99.5
+        yield one_leg
+        yield copy.deepcopy(one_leg)
+
+
+@pytest.mark.parametrize("risk, ndigits", VIEWS)
+def test_patched_frames_match_a_fresh_build(risk, ndigits):
+    chain = None
+    for payload in _partial_ticks(_payloads(3)):
+        chain = ChainIndex.from_payload(payload, previous=chain)
+        for expiry in chain.expiry_dates:
+            df = chain.frame(expiry, risk=risk, ndigits=ndigits)  # patched from the previous snapshot
+            _assert_same(df, _baseline(chain.rows(expiry), chain.underlying_value, risk, ndigits))
+    assert not chain.changes.initial
+
+
+def test_half_way_values_round_like_the_pages():
+    values = [0.5, 1.5, 2.5, -2.5, 12.25, 12.35, 0.15, 2.675, 1e9 + 0.5, -0.05]
+    rows = [{"strikePrice": 100 + i, "CE": {"lastPrice": v, "openInterest": v}, "PE": {"lastPrice": -v}}
+            for i, v in enumerate(values)]
+    ints = build_chain_df(rows, 0.0)
+    ones = build_chain_df(rows, 0.0, ndigits=1)
+    assert ints["CE_OI"].tolist() == [safe_int(v) for v in values]
+    assert ones["CE_OI"].tolist() == [safe_float(v) for v in values]
+    assert ones["PE_LTP"].tolist() == [safe_float(-v) for v in values]
+
+
+# -- OiLadder ----------------------------------------------------------------------------------
+
+def test_ladder_windows_and_pcr_table_match_frame_sums():
+    payload = next(_payloads(1))
+    chain = ChainIndex.from_payload(payload)
+    expiry = chain.expiry_dates[0]
+    df = chain.frame(expiry)
+    ladder = chain.ladder(expiry)
+    n = len(df)
+    assert ladder.atm(chain.spot_price) == (df["strikePrice"] - chain.spot_price).abs().idxmin()
+    for center in (0, 1, n // 2, n - 2, n - 1):
+        for k in (0, 1, 4, 5, n):
+            window = df.iloc[max(0, center - k):min(n - 1, center + k) + 1]
+            assert ladder.window(center, k) == (window["PE_OI"].sum(), window["CE_OI"].sum())
+        table = ladder.pcr_table(center)
+        for row in table.itertuples():
+            k = int(row.Window.split("±")[1])
+            window = df.iloc[max(0, center - k):min(n - 1, center + k) + 1]
+            pe, ce = int(window["PE_OI"].sum()), int(window["CE_OI"].sum())
+            assert (row.PE_OI, row.CE_OI) == (pe, ce)
+            assert row.PCR == (pe / ce if ce else float("inf"))
+    low, high = df["strikePrice"].iloc[2], df["strikePrice"].iloc[-3]
+    inside = df[(df["strikePrice"] >= low) & (df["strikePrice"] <= high)]
+    assert ladder.strike_range(low, high) == (inside["PE_OI"].sum(), inside["CE_OI"].sum())
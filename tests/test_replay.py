@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+import oi_core.collector as collector_module
+from oi_core import PayloadRecorder, ReplaySource, decode_option_chain
+from oi_core.mock_nse import SyntheticMarket
+
+
+def test_recorder_writes_from_its_own_thread(tmp_path):
+    market = SyntheticMarket(5, 1, seed=1)
+    recorder = PayloadRecorder(str(tmp_path))
+    payloads = [decode_option_chain(market.load("NIFTY")) for _ in range(3)]
+    for t, payload in enumerate(payloads):
+        recorder.on_snapshot(SimpleNamespace(key="NIFTY", data=payload, fetched_at=1000.0 + t))
+    assert recorder.written == 0  # queued, nothing written on the collector thread
+    recorder.start()
+    recorder.stop()
+    assert recorder.written == 3 and not recorder.running
+    replay = ReplaySource(str(tmp_path), speed="max")
+    assert [replay.fetch("NIFTY")["records"]["underlyingValue"] for _ in payloads] == \
+        [p["records"]["underlyingValue"] for p in payloads]
+
+
+def test_replaying_collector_polls_only_the_recorded_symbols(tmp_path, monkeypatch):
+    PayloadRecorder(str(tmp_path)).record("BANKNIFTY", decode_option_chain(SyntheticMarket(5, 1).load("BANKNIFTY")), 1000.0)
+    replay = ReplaySource(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(collector_module, "_collector", None)
+    monkeypatch.setattr(collector_module, "get_replay", lambda: replay)
+    assert collector_module.get_collector().symbols == ("BANKNIFTY",)
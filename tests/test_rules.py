@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from oi_core import ChainIndex, RuleError, RuleSet, load_rules, parse_rule
+from oi_core.mock_nse import SyntheticMarket
+
+
+def test_parse_rule_scopes_and_branches():
+    text = "NIFTY, BANKNIFTY: pcr(4) crosses above 1.2 and PE_%OI > 10 or rocket is Strong Bullish"
+    symbols, branches = parse_rule(text)
+    assert symbols == ("NIFTY", "BANKNIFTY")
+    assert branches == [
+        [(("pcr", 4), "crosses above", 1.2), (("atm", "PE_%OI"), ">", 10.0)],
+        [(("rocket",), "==", 0.0)],
+    ]
+    # a column before the colon is not a symbol list
+    assert parse_rule("CE_OI > 5")[0] == ()
+    # "at any strike" reduces to a window max, "at all strikes" to a window min
+    assert parse_rule("CE_%OI > 50 at any strike within 3")[1] == [[(("max", "CE_%OI", 3), ">", 50.0)]]
+    assert parse_rule("CE_%OI > 50 at all strikes")[1] == [[(("min", "CE_%OI", None), ">", 50.0)]]
+
+
+@pytest.mark.parametrize("text", [
+    "pcr >",                              # missing threshold
+    "pcr(4 > 1",                          # unclosed call
+    "volume > 3",                         # unknown value
+    "pcr > 1 but spot > 2",               # unknown joiner
+    "rocket becomes Sideways",            # unknown state
+    "CE_OI == 5 at any strike",           # equality on a window
+    "spot > 5 at any strike",             # 'at' after a non-column
+    "max_oi_strike(XX) shifts",           # bad side
+])
+def test_bad_rules_raise_rule_error(text):
+    with pytest.raises(RuleError):
+        RuleSet([("bad", text)])
+
+
+def test_rule_set_errors():
+    with pytest.raises(RuleError):
+        RuleSet([("a", "pcr > 1"), ("a", "spot > 1")])
+    with pytest.raises(RuleError):
+        RuleSet([("scoped", "NIFTY: pcr > 1", ("BANKNIFTY",))])
+
+
+def test_load_rules_reports_the_bad_line(tmp_path):
+    path = tmp_path / "rules.txt"
+    path.write_text("# comment\nok: pcr > 1\nno name here\n", encoding="utf-8")
+    with pytest.raises(RuleError, match="rules.txt:3"):
+        load_rules(str(path))
+
+
+def test_fired_rules_follow_the_features():
+    rules = RuleSet([
+        ("up", "pcr crosses above 1"),
+        ("bank_only", "BANKNIFTY: spot > 0"),
+        ("either", "spot < 0 or atm_strike > 0"),
+    ])
+    chain = ChainIndex.from_payload(SyntheticMarket(10, 1, seed=2).payload("NIFTY"))
+    features = rules.features_of(chain, chain.expiry_dates[0])
+    pcr_col = rules.features.index(("pcr", 5))
+    below, above = features.copy(), features.copy()
+    below[pcr_col], above[pcr_col] = 0.9, 1.1
+    assert rules.fired(above, below, "NIFTY") == [0, 2]
+    assert rules.fired(above, above, "NIFTY") == [2]
+    assert rules.fired(above, np.full_like(above, np.nan), "BANKNIFTY") == [1, 2]  # no previous tick: no cross
+    assert rules.evaluate(np.vstack([above, above]), np.vstack([below, below]), ["NIFTY", "BANKNIFTY"]).tolist() == \
+        [[True, False, True], [True, True, True]]
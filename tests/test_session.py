@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+from oi_core import NSESessionPool
+from oi_core.fetch import OPTION_CHAIN_PATH
+from oi_core.mock_nse import MockNSEServer, SyntheticMarket
+
+
+def test_rejected_cookies_are_refreshed_once_and_the_request_retried():
+    with MockNSEServer(source=SyntheticMarket(5, 1, seed=1)) as server:
+        pool = NSESessionPool(base_url=server.url)
+        try:
+            assert pool.get(OPTION_CHAIN_PATH, params={"symbol": "NIFTY"}).status_code == 200
+            assert pool.warmups == 1
+            assert pool.get(OPTION_CHAIN_PATH, params={"symbol": "NIFTY"}).status_code == 200
+            assert pool.warmups == 1  # cookies reused
+            server._tokens.clear()  # NSE expires the session early
+            r = pool.get(OPTION_CHAIN_PATH, params={"symbol": "NIFTY"})
+            assert r.status_code == 200 and r.json()["records"]["expiryDates"]
+        finally:
+            pool.close()
+        assert pool.warmups == 2
+        assert server.stats["unauthorized"] == 1 and server.stats["handshakes"] == 2
+
+
+@pytest.mark.parametrize("status", [401, 403])
+def test_auth_failures_rewarm(status):
+    pool = NSESessionPool(base_url="http://nse.invalid")
+    statuses = {"http://nse.invalid": [200, 200], f"http://nse.invalid{OPTION_CHAIN_PATH}": [status, 200]}
+    calls = []
+
+    def get(url, params=None, timeout=None):
+        calls.append(url)
+        return SimpleNamespace(status_code=statuses[url].pop(0), close=lambda: None)
+
+    pool.session.get = get
+    assert pool.get(OPTION_CHAIN_PATH).status_code == 200
+    api = f"http://nse.invalid{OPTION_CHAIN_PATH}"
+    assert calls == ["http://nse.invalid", api, "http://nse.invalid", api]
+    assert pool.warmups == 2
+
+
+def test_other_errors_are_not_retried():
+    pool = NSESessionPool(base_url="http://nse.invalid")
+    pool.session.get = lambda url, params=None, timeout=None: SimpleNamespace(status_code=500, close=lambda: None)
+    assert pool.get(OPTION_CHAIN_PATH).status_code == 500
+    assert pool.warmups == 1